@@ -0,0 +1,115 @@
+"""
+Benchmark: parser EXIF header-only (src/utils/exif_reader) vs đường exifread cũ.
+
+Tạo corpus JPEG tổng hợp (EXIF giống máy ảnh thật + payload nhiễu cho file lớn)
+rồi đo thời gian đọc EXIF trung bình mỗi file.
+Trước khi đo: 1 lượt warm-up không tính giờ (page cache, import) → cả 2 cách đọc file "nóng";
+sau đó 2 cách chạy xen kẽ --repeat vòng, báo min + median → kết quả không phụ thuộc thứ tự chạy.
+
+    python benchmarks/bench_exif.py --files 40 --size 4000x3000
+"""
+import os
+import sys
+import time
+import statistics
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from PIL.TiffImagePlugin import IFDRational
+
+from src.utils.exif_reader import read_exif_header
+
+
+def make_exif():
+    exif = Image.Exif()
+    exif[0x010F] = "Canon"
+    exif[0x0110] = "Canon EOS R6"
+    exif[0x0112] = 1
+    sub = exif.get_ifd(0x8769)
+    sub[0x829A] = IFDRational(1, 200)
+    sub[0x829D] = IFDRational(28, 10)
+    sub[0x8827] = 400
+    sub[0x9003] = "2024:05:06 10:11:12"
+    sub[0x920A] = IFDRational(85, 1)
+    sub[0xA434] = "RF85mm F1.2 L USM"
+    gps = exif.get_ifd(0x8825)
+    gps[1] = "N"
+    gps[2] = (IFDRational(10, 1), IFDRational(45, 1), IFDRational(30, 1))
+    gps[3] = "E"
+    gps[4] = (IFDRational(106, 1), IFDRational(40, 1), IFDRational(0, 1))
+    return exif.tobytes()
+
+
+def build_corpus(folder, count, size):
+    exif = make_exif()
+    noise = Image.effect_noise(size, 64).convert("RGB")
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"IMG_{i:04d}.jpg")
+        noise.save(path, "JPEG", quality=95, exif=exif)
+        paths.append(path)
+    return paths
+
+
+def time_pass(fn, paths):
+    started = time.perf_counter()
+    for path in paths:
+        fn(path)
+    return time.perf_counter() - started
+
+
+def report(label, times, count):
+    best = min(times)
+    median = statistics.median(times)
+    print(f"{label:<12} min {best / count * 1000:8.3f} ms/file  "
+          f"median {median / count * 1000:8.3f} ms/file  ({count / best:8.1f} files/s)")
+    return best / count * 1000
+
+
+def run(methods, paths, repeat):
+    """methods: [(label, fn)] → {label: ms/file (min)}; warm-up rồi đo xen kẽ từng vòng."""
+    for _, fn in methods:
+        time_pass(fn, paths)  # warm-up, không tính giờ
+    times = {label: [] for label, _ in methods}
+    for i in range(repeat):
+        # Đảo thứ tự mỗi vòng → không cách nào luôn được chạy trước / sau
+        order = methods if i % 2 == 0 else methods[::-1]
+        for label, fn in order:
+            times[label].append(time_pass(fn, paths))
+    return {label: report(label, times[label], len(paths)) for label, _ in methods}
+
+
+def read_exifread(path):
+    import exifread
+    with open(path, "rb") as f:
+        return exifread.process_file(f, details=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--size", default="4000x3000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = build_corpus(folder, args.files, size)
+        avg_mb = sum(os.path.getsize(p) for p in paths) / len(paths) / 1024 / 1024
+        print(f"Corpus: {len(paths)} JPEG {size[0]}x{size[1]} (~{avg_mb:.1f} MB/file)")
+
+        methods = [("header-only", read_exif_header)]
+        try:
+            import exifread  # noqa: F401
+            methods.append(("exifread", read_exifread))
+        except ImportError:
+            print("exifread not installed → skip baseline")
+        result = run(methods, paths, args.repeat)
+        if "exifread" in result:
+            print(f"Speedup: {result['exifread'] / result['header-only']:.1f}x (min)")
+
+if __name__ == "__main__":
+    main()
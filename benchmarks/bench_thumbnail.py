@@ -0,0 +1,80 @@
+"""
+Benchmark: render thumbnail – đường cũ (decode full-size + exif_transpose + LANCZOS)
+vs render_thumbnail hiện tại (draft() scale DCT + transpose ảnh đã thu nhỏ).
+
+Tạo corpus JPEG tổng hợp (có orientation EXIF như ảnh chụp dọc) rồi đo thời gian trung bình mỗi file.
+
+    python benchmarks/bench_thumbnail.py --files 20 --size 6000x4000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageOps
+
+from src.utils.thumbnail import render_thumbnail, THUMB_SIZE
+
+
+def build_corpus(folder, count, size):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # ảnh dọc: xoay 90° khi hiển thị
+    noise = Image.effect_noise(size, 64).convert("RGB")
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"IMG_{i:04d}.jpg")
+        noise.save(path, "JPEG", quality=92, exif=exif.tobytes())
+        paths.append(path)
+    return paths
+
+
+def render_full_decode(file_path, thumb_path):
+    """Đường cũ của render_thumbnail."""
+    img = Image.open(file_path)
+    img = ImageOps.exif_transpose(img)
+    img = img.convert("RGB")
+    img.thumbnail(THUMB_SIZE, Image.Resampling.LANCZOS)
+    img.save(thumb_path, "JPEG", quality=85)
+
+
+def run(label, fn, paths, out_dir, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for i, path in enumerate(paths):
+            fn(path, os.path.join(out_dir, f"{label}_{i}.jpg"))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    per_file = best / len(paths) * 1000
+    print(f"{label:<12} {per_file:8.1f} ms/thumbnail  ({len(paths) / best:6.1f} files/s)")
+    return per_file
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size", default="6000x4000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = build_corpus(folder, args.files, size)
+        out_dir = os.path.join(folder, "thumbs")
+        os.makedirs(out_dir)
+        avg_mb = sum(os.path.getsize(p) for p in paths) / len(paths) / 1024 / 1024
+        print(f"Corpus: {len(paths)} JPEG {size[0]}x{size[1]} (~{avg_mb:.1f} MB/file), thumbnail {THUMB_SIZE}")
+
+        slow = run("full-decode", render_full_decode, paths, out_dir, args.repeat)
+        fast = run("draft", render_thumbnail, paths, out_dir, args.repeat)
+
+        with Image.open(os.path.join(out_dir, "full-decode_0.jpg")) as a, Image.open(os.path.join(out_dir, "draft_0.jpg")) as b:
+            print(f"Output size: full-decode {a.size}, draft {b.size}")
+        print(f"Speedup: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
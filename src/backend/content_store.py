@@ -0,0 +1,282 @@
+import os
+import sys
+import uuid
+import ctypes
+import shutil
+import hashlib
+from pathlib import Path
+
+from .project_manager import get_current_project_path
+
+# blake2b: nhanh hơn md5/sha256 trên CPU 64-bit, có sẵn trong hashlib
+HASH_DIGEST_SIZE = 20          # → 40 ký tự hex
+PARTIAL_DIGEST_SIZE = 16       # → 32 ký tự hex
+PARTIAL_CHUNK = 64 * 1024      # đọc 64KB đầu + 64KB cuối cho partial hash
+COPY_CHUNK = 1024 * 1024
+
+# Cách đưa bản gốc vào project khi import
+# - copy:      hash + copy trong 1 lượt đọc (hash có sẵn → copy bằng kernel), lưu theo content hash
+# - reflink:   clone copy-on-write (Btrfs/XFS/APFS), không tốn thêm dung lượng; fallback copy
+# - hardlink:  hard link vào kho (cùng ổ đĩa), không tốn thêm dung lượng, không đọc cả file
+#              (tên theo partial hash + size nếu chưa có content hash); fallback copy
+# - reference: giữ file tại chỗ, chỉ ghi đường dẫn
+STORAGE_MODES = ("copy", "reflink", "hardlink", "reference")
+
+FICLONE = 0x40049409  # Linux ioctl clone file
+
+_reflink_unsupported = set()   # st_dev không hỗ trợ reflink → khỏi thử lại
+
+
+# ---------------------------------------------------------
+# HASH
+# ---------------------------------------------------------
+def partial_hash(path: str) -> str:
+    """
+    Hash rẻ để lọc trước: size + 64KB đầu + 64KB cuối.
+    Khác partial hash → chắc chắn khác nội dung, không cần đọc cả file.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(str(size).encode("ascii"), digest_size=PARTIAL_DIGEST_SIZE)
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_CHUNK))
+        if size > PARTIAL_CHUNK * 2:
+            f.seek(-PARTIAL_CHUNK, os.SEEK_END)
+            h.update(f.read(PARTIAL_CHUNK))
+        elif size > PARTIAL_CHUNK:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    """Hash toàn bộ nội dung file (content key)."""
+    h = hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def partial_hash_bytes(data: bytes) -> str:
+    """partial_hash cho nội dung đã nằm trong RAM (vd member của archive) – cùng kết quả với file."""
+    size = len(data)
+    h = hashlib.blake2b(str(size).encode("ascii"), digest_size=PARTIAL_DIGEST_SIZE)
+    h.update(data[:PARTIAL_CHUNK])
+    if size > PARTIAL_CHUNK * 2:
+        h.update(data[-PARTIAL_CHUNK:])
+    elif size > PARTIAL_CHUNK:
+        h.update(data[PARTIAL_CHUNK:])
+    return h.hexdigest()
+
+
+def full_hash_bytes(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=HASH_DIGEST_SIZE).hexdigest()
+
+
+# ---------------------------------------------------------
+# CONTENT-ADDRESSED STORAGE
+# ---------------------------------------------------------
+def store_root(project_root: str = None) -> Path:
+    if project_root is None:
+        project_root = get_current_project_path()
+    return Path(project_root) / "photos"
+
+
+def store_path(content_hash: str, ext: str, project_root: str = None) -> Path:
+    """<project>/photos/<2 ký tự đầu>/<hash><ext>"""
+    return store_root(project_root) / content_hash[:2] / f"{content_hash}{ext.lower()}"
+
+
+def place_original(src: str, mode: str = "copy", project_root: str = None,
+                   content_hash: str = None, partial: str = None):
+    """
+    Đưa bản gốc vào project theo storage mode (xem STORAGE_MODES).
+    - copy / reflink: tên file = content hash → không bao giờ lưu trùng bytes
+    - hardlink: không đọc cả file – tên theo partial hash + size như reference mode,
+      content_hash giữ None nếu caller chưa tính (_dedup_plan tính bù khi partial trùng)
+    - copy: chưa có hash → hash trong cùng lượt đọc khi copy (đọc file 1 lần);
+      có hash sẵn → copy bằng kernel
+    - reflink: clone không đọc dữ liệu, chỉ đọc 1 lần để hash nếu chưa có
+    - reference: không đọc nội dung file, content_hash giữ None nếu caller chưa tính
+    Trả về (dest_path, content_hash, created) – created: file mới được tạo trong kho
+    (caller xóa nếu import bị hủy / lỗi trước khi ghi DB).
+    """
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown storage mode: {mode}")
+    ext = Path(src).suffix
+
+    if mode == "reference":
+        return Path(src), content_hash, False
+
+    if mode == "hardlink":
+        placed = _place_hardlink(src, ext, project_root, content_hash, partial)
+        if placed is not None:
+            return placed
+        mode = "copy"
+
+    if content_hash is not None:
+        dest = store_path(content_hash, ext, project_root)
+        if dest.exists():
+            return dest, content_hash, False
+
+    tmp_path = incoming_path(project_root)
+    try:
+        if mode == "reflink" and _reflink(src, tmp_path):
+            content_hash = content_hash or full_hash(tmp_path)
+        elif content_hash is None:
+            content_hash = _hashing_copy(src, tmp_path)
+        else:
+            _kernel_copy(src, tmp_path)
+        dest = store_path(content_hash, ext, project_root)
+        created = not dest.exists()
+        return _commit_incoming(tmp_path, dest), content_hash, created
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+
+def linked_path(key: str, ext: str, project_root: str = None) -> Path:
+    """<project>/photos/linked/<2 ký tự đầu>/<key><ext> – key: content hash hoặc partial-size."""
+    return store_root(project_root) / "linked" / key[:2] / f"{key}{ext.lower()}"
+
+
+def _place_hardlink(src, ext, project_root, content_hash, partial):
+    """
+    Hard link src vào kho → (dest, content_hash, created); khác ổ đĩa / link lỗi → None (caller copy).
+    Chưa có content hash → key = partial hash + size (đọc 128KB thay vì cả file).
+    Key đã có file khác nội dung (trùng partial) → mới hash toàn bộ, dùng tên theo content hash.
+    """
+    dest = None
+    if content_hash is None:
+        partial = partial or partial_hash(src)
+        dest = linked_path(f"{partial}-{os.path.getsize(src):x}", ext, project_root)
+        if dest.exists():
+            if os.path.samefile(src, dest):
+                return dest, None, False
+            content_hash = full_hash(src)
+            if full_hash(dest) == content_hash:
+                return dest, content_hash, False
+            dest = None
+    if dest is None:
+        dest = linked_path(content_hash, ext, project_root)
+        if dest.exists():
+            return dest, content_hash, False
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if os.stat(src).st_dev != os.stat(dest.parent).st_dev:
+        return None
+    try:
+        os.link(src, dest)
+        return dest, content_hash, True
+    except FileExistsError:
+        return dest, content_hash, False
+    except OSError as e:
+        print(f"[STORE WARN] Hardlink failed, copying instead: {e}")
+        return None
+
+
+def discard_placed(dest):
+    """Xóa file vừa đưa vào kho nhưng không được ghi vào DB (import bị hủy / lỗi)."""
+    try:
+        os.remove(dest)
+    except OSError as e:
+        print(f"[STORE WARN] Cannot remove {dest}: {e}")
+
+
+def store_bytes(data: bytes, ext: str, project_root: str = None, content_hash: str = None) -> Path:
+    """Ghi nội dung (vd member của archive) vào kho theo content hash, đã có → không ghi lại."""
+    content_hash = content_hash or full_hash_bytes(data)
+    dest = store_path(content_hash, ext, project_root)
+    if dest.exists():
+        return dest
+
+    tmp_path = incoming_path(project_root)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        return _commit_incoming(tmp_path, dest)
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+
+def store_file(tmp_path, ext: str, project_root: str = None, content_hash: str = None) -> Path:
+    """Đưa file tạm trong .incoming (vd member lớn của archive) vào kho: đổi tên, không copy."""
+    content_hash = content_hash or full_hash(tmp_path)
+    return _commit_incoming(Path(tmp_path), store_path(content_hash, ext, project_root))
+
+
+def incoming_path(project_root: str = None, suffix: str = ".part") -> Path:
+    """File tạm trong <project>/photos/.incoming (cùng ổ với kho → commit bằng os.replace)."""
+    incoming = store_root(project_root) / ".incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+    return incoming / f"{uuid.uuid4().hex}{suffix}"
+
+
+def _commit_incoming(tmp_path: Path, dest: Path) -> Path:
+    if dest.exists():
+        tmp_path.unlink()
+    else:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, dest)
+    return dest
+
+
+# ---------------------------------------------------------
+# FAST COPY
+# ---------------------------------------------------------
+def _kernel_copy(src, dst):
+    """Copy không qua buffer Python: copy_file_range → sendfile/fcopyfile (shutil) → đọc/ghi."""
+    if hasattr(os, "copy_file_range"):
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            size = os.fstat(fin.fileno()).st_size
+            copied = 0
+            try:
+                while copied < size:
+                    n = os.copy_file_range(fin.fileno(), fout.fileno(), size - copied)
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError:
+                copied = -1  # kernel cũ / khác filesystem → dùng đường khác
+            if copied == size:
+                return
+    # shutil.copyfile tự dùng sendfile (Linux) / fcopyfile (macOS)
+    shutil.copyfile(src, dst)
+
+
+def _hashing_copy(src, dst) -> str:
+    """Copy qua buffer, hash trong cùng lượt đọc → trả về content hash."""
+    h = hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        for chunk in iter(lambda: fin.read(COPY_CHUNK), b""):
+            h.update(chunk)
+            fout.write(chunk)
+    return h.hexdigest()
+
+
+def _reflink(src, dst) -> bool:
+    """Clone copy-on-write. Trả về False nếu filesystem không hỗ trợ."""
+    dev = os.stat(src).st_dev
+    if dev in _reflink_unsupported:
+        return False
+
+    if sys.platform.startswith("linux"):
+        import fcntl
+        try:
+            with open(src, "rb") as fin, open(dst, "wb") as fout:
+                fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+            return True
+        except OSError:
+            pass
+    elif sys.platform == "darwin":
+        libc = ctypes.CDLL(None, use_errno=True)
+        if os.path.exists(dst):
+            os.unlink(dst)  # clonefile yêu cầu dst chưa tồn tại
+        if libc.clonefile(os.fsencode(src), os.fsencode(str(dst)), 0) == 0:
+            return True
+
+    print("[STORE WARN] Reflink not supported on this filesystem, copying instead")
+    _reflink_unsupported.add(dev)
+    return False
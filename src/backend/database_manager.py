@@ -1,7 +1,7 @@
 import os
 from sqlalchemy import (
-    create_engine, Column, Integer, String,
-    Boolean, ForeignKey, DateTime, JSON, Text
+    create_engine, Column, Integer, String, Float,
+    Boolean, ForeignKey, DateTime, JSON, Text, LargeBinary, inspect, text
 )
 from sqlalchemy.orm import Session,sessionmaker, relationship, declarative_base
 from sqlalchemy.exc import SQLAlchemyError
@@ -38,6 +38,7 @@ def init_db(db_url=None):
             echo=False
         )
         Base.metadata.create_all(_engine)
+        _migrate_schema(_engine)
         _Session = sessionmaker(bind=_engine)
         print("✅ MySQL schema initialized")
     except SQLAlchemyError as e:
@@ -45,6 +46,31 @@ def init_db(db_url=None):
         raise
 
 
+def _migrate_schema(engine):
+    """
+    create_all() không thêm cột mới vào bảng đã tồn tại
+    → bổ sung cột / index còn thiếu cho DB cũ.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+
+        with engine.begin() as conn:
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+                print(f"🧩 Added column {table.name}.{column.name}")
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    print(f"🧩 Added index {index.name}")
+
+
 def get_session():
     """Trả về một SQLAlchemy session."""
     global _Session
@@ -61,6 +87,7 @@ class Folder(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
     path = Column(String(500), nullable=False)
+    watch_enabled = Column(Boolean, default=False)  # 👀 tự import file mới trong path
     created_at = Column(DateTime, default=datetime.now)
     photos = relationship("Photo", back_populates="folder", cascade="all, delete")
 
@@ -75,17 +102,30 @@ class Photo(Base):
     file_path = Column(String(500), nullable=False)
     folder_id = Column(Integer, ForeignKey("folders.id", ondelete="CASCADE"))
 
+    # Content hash (dedup + content-addressed storage)
+    content_hash = Column(String(64), nullable=True, index=True)
+    partial_hash = Column(String(32), nullable=True, index=True)
+
     # EXIF + Metadata
     exif_iso = Column(Integer, nullable=True)
     exif_focal_length = Column(String(50), nullable=True)
     exif_aperture = Column(String(50), nullable=True)
     exif_shutter_speed = Column(String(50), nullable=True)
+    exif_lens = Column(String(255), nullable=True)
+    exif_camera = Column(String(255), nullable=True)
+    exif_orientation = Column(Integer, nullable=True)
+    gps_latitude = Column(Float, nullable=True)
+    gps_longitude = Column(Float, nullable=True)
 
     rating = Column(Integer, default=0)
     note = Column(Text, nullable=True)
     tags = Column(JSON, default=[])
     color_palette = Column(JSON, default=[])
 
+    # Placeholder cho gallery (xem utils/placeholder): micro-JPEG ~24px + màu chủ đạo "#rrggbb"
+    placeholder = Column(LargeBinary, nullable=True)
+    dominant_color = Column(String(7), nullable=True)
+
     is_deleted = Column(Boolean, default=False)
     is_favorite = Column(Boolean, default=False)
 
@@ -154,12 +194,17 @@ def delete_folder_permanently(folder_id: int):
 
         # 🧹 Xóa toàn bộ ảnh trong DB (chỉ database)
         photos = session.query(Photo).filter(Photo.folder_id == folder.id).all()
+        photo_ids = [photo.id for photo in photos]
         for photo in photos:
             session.delete(photo)
 
         # 🧾 Commit sau khi xóa ảnh
         session.commit()
 
+        # 🖼️ Thumbnail của các ảnh đã xóa (import trong hàm: project_manager import module này)
+        from ..utils.thumbnail import delete_thumbnails
+        delete_thumbnails(photo_ids)
+
         # 🗑️ Cuối cùng xóa folder khỏi DB
         session.delete(folder)
         session.commit()
@@ -0,0 +1,318 @@
+import io
+import os
+import time
+import shutil
+import tarfile
+import zipfile
+from datetime import datetime
+from pathlib import PurePosixPath
+from PIL import Image
+
+from .import_service import (
+    SUPPORTED_IMAGE_EXTENSIONS, DEFAULT_BATCH_SIZE,
+    _run_pool, _dedup_plan, _photo_record, _finish_batch, _report_progress,
+)
+from .save_to_db import PhotoWriter, find_hashes_by_partial
+from ..backend.project_manager import get_current_project_path
+from ..backend.content_store import (
+    partial_hash, full_hash, partial_hash_bytes, full_hash_bytes,
+    store_bytes, store_file, incoming_path, COPY_CHUNK,
+)
+from ..utils.exif_reader import read_exif_header, read_exif_bytes, EMPTY_EXIF
+from ..utils.raw_preview import is_raw, raw_dimensions, raw_dimensions_bytes
+from ..utils.thumbnail import render_renditions, render_renditions_bytes
+from ..utils.placeholder import placeholder_from_jpeg
+
+# Import thẳng từ ZIP / TAR, không giải nén ra đĩa:
+# member được đọc tuần tự → hash + EXIF + thumbnail từ bytes trong process con
+# → dedup theo batch (1 lookup) → chỉ nội dung mới được ghi vào kho ảnh.
+# Member lớn được stream ra file tạm trong kho (process con nhận đường dẫn, không pickle bytes);
+# member quá lớn / tỉ lệ nén bất thường (zip bomb) bị bỏ qua.
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# Bytes của member được giữ trong RAM tới khi dedup xong → flush sớm nếu batch quá lớn
+MAX_BUFFER_BYTES = 256 * 1024 * 1024
+SPOOL_MEMBER_BYTES = 16 * 1024 * 1024    # member lớn hơn → ghi ra file tạm thay vì giữ trong RAM
+MAX_MEMBER_BYTES = 1024 * 1024 * 1024    # member lớn hơn → bỏ qua
+MAX_COMPRESSION_RATIO = 100              # ZIP: size giải nén / size nén lớn hơn → bỏ qua
+
+
+def is_archive(path) -> bool:
+    return str(path).lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def iter_members(archive_path, project_root=None):
+    """
+    (index, tên member, data) cho từng file ảnh, đọc tuần tự (TAR ở chế độ stream).
+    data: bytes; member > SPOOL_MEMBER_BYTES → đường dẫn file tạm trong kho (caller xóa / commit);
+    member bị bỏ qua (quá lớn / zip bomb) → None.
+    """
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for index, info in enumerate(zf.infolist()):
+                if info.is_dir() or not _is_image_member(info.filename):
+                    continue
+                if not _member_allowed(info.filename, info.file_size, info.compress_size):
+                    yield index, info.filename, None
+                    continue
+                with zf.open(info) as stream:
+                    yield index, info.filename, _read_member(stream, info.filename, info.file_size, project_root)
+        return
+
+    with tarfile.open(archive_path, "r|*") as tf:
+        for index, member in enumerate(tf):
+            if not member.isfile() or not _is_image_member(member.name):
+                continue
+            if not _member_allowed(member.name, member.size):
+                yield index, member.name, None
+                continue
+            yield index, member.name, _read_member(tf.extractfile(member), member.name, member.size, project_root)
+
+
+def _member_allowed(name, size, compressed=None):
+    if size > MAX_MEMBER_BYTES:
+        print(f"[IMPORT WARN] Skipping {name}: {size / (1024 * 1024):.0f} MB exceeds member limit")
+        return False
+    if compressed is not None and size > MAX_COMPRESSION_RATIO * max(compressed, 1):
+        print(f"[IMPORT WARN] Skipping {name}: suspicious compression ratio")
+        return False
+    return True
+
+
+def _read_member(stream, name, size, project_root):
+    """Member nhỏ → bytes; member lớn → stream ra file tạm (giữ đuôi để nhận RAW), trả về đường dẫn."""
+    if size <= SPOOL_MEMBER_BYTES:
+        return stream.read()
+    spool = incoming_path(project_root, os.path.splitext(name)[1].lower())
+    try:
+        with open(spool, "wb") as f:
+            shutil.copyfileobj(stream, f, COPY_CHUNK)
+    except BaseException:
+        _discard_spool(spool)
+        raise
+    return str(spool)
+
+
+def _is_spooled(data):
+    return isinstance(data, str)
+
+
+def _discard_spool(data):
+    if _is_spooled(data):
+        try:
+            os.remove(data)
+        except OSError:
+            pass
+
+
+def _member_size(data):
+    return os.path.getsize(data) if _is_spooled(data) else len(data)
+
+
+def count_members(archive_path):
+    """Số file ảnh trong ZIP (đọc central directory); TAR stream → None (không biết trước)."""
+    if not zipfile.is_zipfile(archive_path):
+        return None
+    with zipfile.ZipFile(archive_path) as zf:
+        return sum(1 for info in zf.infolist() if not info.is_dir() and _is_image_member(info.filename))
+
+
+def _is_image_member(name):
+    parts = PurePosixPath(name).parts
+    if any(p.startswith(".") or p == "__MACOSX" for p in parts):
+        return False
+    return os.path.splitext(name)[1].lower() in SUPPORTED_IMAGE_EXTENSIONS
+
+
+def import_archive(archive_path, folder_id=None, workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                   progress=None, on_batch=None, cancel=None):
+    """
+    Import ảnh trong 1 file ZIP / TAR (kể cả .tar.gz / .tar.bz2 / .tar.xz).
+    - Không giải nén: mỗi member chỉ nằm trong RAM tới khi dedup xong
+      (member lớn: file tạm trong kho, ảnh mới được đổi tên vào kho thay vì ghi lại)
+    - Bỏ qua member quá lớn / tỉ lệ nén bất thường (tính vào failed)
+    - Dedup theo partial / content hash, 1 lookup mỗi batch (như import_originals)
+    - Ảnh mới được ghi vào kho theo content hash (luôn lưu bản sao, không có storage mode)
+    progress / on_batch / cancel: xem import_paths.
+    Trả về stats: imported, duplicates, failed, photo_ids, cancelled, elapsed, files_per_sec.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    archive_path = os.path.abspath(archive_path)
+    project_root = get_current_project_path()
+    total = count_members(archive_path) or 0
+
+    # Bytes / file tạm của member đang xử lý (process con chỉ trả về hash / EXIF / thumbnail)
+    in_flight = {}
+    started = time.perf_counter()
+    path_ids = {}
+    counts = {"done": 0, "failed": 0, "duplicates": 0}
+
+    def members():
+        for index, name, data in iter_members(archive_path, project_root):
+            if data is None:
+                counts["done"] += 1
+                counts["failed"] += 1
+                continue
+            in_flight[index] = data
+            yield index, name, data
+
+    buffer = []
+    buffered_bytes = 0
+
+    def on_flush(pairs):
+        _finish_batch(pairs, project_root)
+        path_ids.update((record["file_path"], photo_id) for photo_id, record in pairs)
+        _report_progress(len(path_ids), started)
+        if on_batch:
+            on_batch([photo_id for photo_id, _ in pairs])
+
+    results = _run_pool(_probe_member, members(), workers)
+    try:
+        with PhotoWriter(batch_size=batch_size, on_flush=on_flush) as writer:
+            now = datetime.now()
+            for result in results:
+                if cancel is not None and cancel.is_set():
+                    print("[IMPORT] Cancelled")
+                    break
+                counts["done"] += 1
+                if progress:
+                    progress("archive", counts["done"], total)
+
+                data = in_flight.pop(_member_key(result), None)
+                if result.get("error") or data is None:
+                    _discard_spool(data)
+                    counts["failed"] += 1
+                    continue
+
+                buffer.append((result, data))
+                if not _is_spooled(data):
+                    buffered_bytes += len(data)
+                if len(buffer) >= batch_size or buffered_bytes >= MAX_BUFFER_BYTES:
+                    counts["duplicates"] += _store_batch(buffer, writer, folder_id, project_root, now)
+                    buffer.clear()
+                    buffered_bytes = 0
+            # Batch cuối (kể cả khi bị hủy: member đã xử lý vẫn được lưu, như import_paths)
+            if buffer:
+                counts["duplicates"] += _store_batch(buffer, writer, folder_id, project_root, now)
+                buffer.clear()
+    finally:
+        results.close()
+        # Hủy / lỗi giữa chừng: file tạm của member chưa được ghi vào kho
+        for data in list(in_flight.values()) + [data for _, data in buffer]:
+            _discard_spool(data)
+
+    elapsed = time.perf_counter() - started
+    imported = len(writer.ids)
+    print(
+        f"✅ Imported {imported} photos from {os.path.basename(archive_path)}, "
+        f"skipped {counts['duplicates']} duplicate(s) in {elapsed:.1f}s"
+    )
+    return {
+        "imported": imported,
+        "updated": 0,
+        "duplicates": counts["duplicates"],
+        "failed": counts["failed"],
+        "photo_ids": writer.ids,
+        "path_ids": path_ids,
+        "cancelled": bool(cancel is not None and cancel.is_set()),
+        "elapsed": elapsed,
+        "files_per_sec": counts["done"] / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+# ---------------------------------------------------------
+# PIPELINE
+# ---------------------------------------------------------
+def _probe_member(item):
+    """Chạy trong process con: hash + EXIF + thumbnail từ bytes (hoặc file tạm) của 1 member."""
+    index, name, data = item
+    result = {"key": index, "path": name, "exif": dict(EMPTY_EXIF), "meta": None, "thumb": None, "hashes": {}}
+    try:
+        spooled = _is_spooled(data)
+        try:
+            result["exif"] = read_exif_header(data) if spooled else read_exif_bytes(data)
+        except ValueError:
+            pass  # PNG / GIF / BMP: không có EXIF header
+        if spooled:
+            result["hashes"] = {"partial_hash": partial_hash(data), "content_hash": full_hash(data)}
+            result["thumb"] = render_renditions(data)
+        else:
+            result["hashes"] = {"partial_hash": partial_hash_bytes(data), "content_hash": full_hash_bytes(data)}
+            result["thumb"] = render_renditions_bytes(data, name)
+        if result["thumb"]:
+            result["placeholder"] = placeholder_from_jpeg(result["thumb"]["grid"])
+        result["size"] = _image_size(data, name, result["exif"])
+    except Exception as e:
+        print(f"[IMPORT ERROR] {name}: {e}")
+        result["error"] = str(e)
+    return result
+
+
+def _member_key(result):
+    # Process con chết → _collect trả về {"path": item} (item = (index, name, data))
+    if "key" in result:
+        return result["key"]
+    return result["path"][0] if isinstance(result["path"], tuple) else None
+
+
+def _image_size(data, name, exif):
+    """Kích thước ảnh: RAW lấy kích thước sensor từ tag TIFF / EXIF, định dạng khác chỉ parse header qua Pillow."""
+    try:
+        if is_raw(name):
+            size = raw_dimensions(data) if _is_spooled(data) else raw_dimensions_bytes(data)
+            if size:
+                return size
+        else:
+            with Image.open(data if _is_spooled(data) else io.BytesIO(data)) as img:
+                return img.size
+    except Exception:
+        pass
+    return exif["width"] or 0, exif["height"] or 0
+
+
+def _store_batch(buffer, writer, folder_id, project_root, now):
+    """Dedup cả batch bằng 1 lookup, ghi nội dung mới vào kho + insert. Trả về số ảnh trùng."""
+    partials = {i: result["hashes"]["partial_hash"] for i, (result, _) in enumerate(buffer)}
+    content_hashes = {i: result["hashes"]["content_hash"] for i, (result, _) in enumerate(buffer)}
+    plan, duplicates = _dedup_plan(
+        partials, find_hashes_by_partial(partials.values()), hash_of=content_hashes.get
+    )
+
+    keep = {i for i, _, _ in plan}
+    for i, (result, data) in enumerate(buffer):
+        if i not in keep:
+            _discard_spool(data)
+            continue
+        member = result["path"]
+        ext = os.path.splitext(member)[1]
+        try:
+            size = _member_size(data)
+            if _is_spooled(data):
+                dest = store_file(data, ext, project_root, content_hashes[i])
+            else:
+                dest = store_bytes(data, ext, project_root, content_hashes[i])
+        except OSError as e:
+            print(f"[IMPORT ERROR] {member}: {e}")
+            _discard_spool(data)
+            continue
+        result["path"] = str(dest)
+        result["meta"] = _member_meta(result, dest, size)
+        writer.add(_photo_record(result, folder_id, now))
+    writer.flush()
+    return duplicates
+
+
+def _member_meta(result, dest, size):
+    """Metadata cache cho ảnh vừa ghi vào kho."""
+    width, height = result.get("size") or (0, 0)
+    return {
+        "filename": os.path.basename(result["path"]),
+        "width": width,
+        "height": height,
+        "size_mb": round(size / (1024 * 1024), 2),
+        "created": os.path.getctime(dest),
+        "modified": os.path.getmtime(dest),
+    }
@@ -0,0 +1,254 @@
+import os
+import sys
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+import threading
+
+from .library_scanner import scan_tree
+
+# Watch-folder: theo dõi thư mục được sync (Google Drive...) và tự import file mới.
+# - Linux: inotify (qua ctypes, không cần thư viện ngoài)
+# - Nền tảng khác / inotify lỗi: polling bằng scan_tree
+# File mới được gom lại (debounce), chỉ import khi đã ghi xong, theo batch.
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyBackend:
+    """Nguồn event inotify, watch đệ quy mọi thư mục con."""
+
+    def __init__(self, root, extensions):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._root = root
+        self._extensions = extensions
+        self._dirs = {}
+        self._add_tree(root)
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            print(f"[WATCH WARN] Cannot watch {path}: errno {ctypes.get_errno()}")
+            return
+        self._dirs[wd] = path
+
+    def _add_tree(self, root):
+        self._add_watch(root)
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for d in dirnames:
+                self._add_watch(os.path.join(dirpath, d))
+
+    def poll(self, timeout):
+        """Trả về list path có thay đổi (chờ tối đa timeout giây)."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        pos = 0
+        overflowed = False
+        while pos + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = os.fsdecode(data[pos:pos + length].rstrip(b"\x00"))
+            pos += length
+
+            if mask & IN_Q_OVERFLOW:
+                overflowed = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith("."):
+                    # Thư mục mới: watch + lấy file đã kịp ghi trước khi watch
+                    self._add_tree(path)
+                    paths.extend(scan_tree(path, self._extensions))
+                continue
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE):
+                paths.append(path)
+        if overflowed:
+            # Tràn queue → có thể mất event (kể cả thư mục mới): watch lại + quét 1 lần từ root
+            self._add_tree(self._root)
+            paths.extend(scan_tree(self._root, self._extensions))
+        return paths
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """Fallback: so sánh snapshot scan_tree mỗi interval giây."""
+
+    def __init__(self, root, extensions, interval=5.0):
+        self._root = root
+        self._extensions = extensions
+        self._interval = interval
+        self._snapshot = scan_tree(root, extensions)
+        self._next_scan = time.monotonic() + interval
+
+    def poll(self, timeout):
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._next_scan = time.monotonic() + self._interval
+
+        current = scan_tree(self._root, self._extensions)
+        changed = [p for p, stat in current.items() if self._snapshot.get(p) != stat]
+        self._snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """
+    Theo dõi 1 Folder và tự import file ảnh mới.
+    - debounce: chờ thư mục "yên" debounce giây sau event cuối rồi mới xử lý
+    - settle: file phải giữ nguyên size/mtime ít nhất settle giây (ghi xong)
+    - max_wait: burst kéo dài vẫn flush sau max_wait giây
+    - on_batch(stats): gọi 1 lần sau mỗi batch import (từ thread watcher)
+    """
+
+    def __init__(self, folder_id, path, import_batch, extensions, on_batch=None,
+                 debounce=2.0, settle=1.0, max_wait=30.0, batch_size=500, poll_interval=5.0):
+        self.folder_id = folder_id
+        self.path = os.path.abspath(path)
+        self.import_batch = import_batch
+        self.extensions = extensions
+        self.on_batch = on_batch
+        self.debounce = debounce
+        self.settle = settle
+        self.max_wait = max_wait
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+        self._pending = {}  # path → (size, mtime_ns) lần kiểm tra trước
+        self._last_event = 0.0
+        self._first_event = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"watch-{self.folder_id}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _make_backend(self):
+        if sys.platform.startswith("linux"):
+            try:
+                return _InotifyBackend(self.path, self.extensions)
+            except Exception as e:
+                print(f"[WATCH WARN] inotify unavailable, polling instead: {e}")
+        return _PollingBackend(self.path, self.extensions, self.poll_interval)
+
+    def _run(self):
+        backend = self._make_backend()
+        print(f"👀 Watching {self.path} ({type(backend).__name__.strip('_')})")
+        try:
+            while not self._stop.is_set():
+                for path in backend.poll(timeout=0.5):
+                    self._on_event(path)
+                if self._pending and self._due():
+                    self._flush()
+        except Exception as e:
+            print(f"[WATCH ERROR] {self.path}: {e}")
+        finally:
+            backend.close()
+
+    # ---------------------------------------------------------
+    def _on_event(self, path):
+        if os.path.splitext(path)[1].lower() not in self.extensions:
+            return
+        now = time.monotonic()
+        if not self._pending:
+            self._first_event = now
+        self._last_event = now
+        self._pending.setdefault(path, None)
+
+    def _due(self):
+        now = time.monotonic()
+        return (
+            now - self._last_event >= self.debounce
+            or now - self._first_event >= self.max_wait
+            or len(self._pending) >= self.batch_size * 4
+        )
+
+    def _flush(self):
+        ready = [p for p in list(self._pending) if self._is_stable(p)]
+        if not ready:
+            # Còn file đang ghi → kiểm tra lại sau debounce
+            self._first_event = self._last_event = time.monotonic()
+            return
+
+        for i in range(0, len(ready), self.batch_size):
+            batch = ready[i:i + self.batch_size]
+            for p in batch:
+                self._pending.pop(p, None)
+            try:
+                stats = self.import_batch(self.path, self.folder_id, batch)
+            except Exception as e:
+                print(f"[WATCH ERROR] Import failed: {e}")
+                continue
+            if self.on_batch and stats:
+                self.on_batch(stats)
+
+        self._first_event = self._last_event = time.monotonic()
+
+    def _is_stable(self, path):
+        """File đã ghi xong: size/mtime không đổi giữa 2 lần kiểm tra, đủ cũ và mở được."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._pending.pop(path, None)  # file tạm đã bị đổi tên / xóa
+            return False
+        except OSError:
+            return False
+
+        stat = (st.st_size, st.st_mtime_ns)
+        previous = self._pending.get(path)
+        self._pending[path] = stat
+        if previous != stat or st.st_size == 0:
+            return False
+        if time.time() - st.st_mtime < self.settle:
+            return False
+        try:
+            with open(path, "rb"):
+                pass  # Windows: file đang bị sync client khóa → chưa mở được
+        except OSError:
+            return False
+        return True
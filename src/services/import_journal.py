@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+import hashlib
+
+from ..backend.project_manager import get_current_project_path
+
+# Journal cho 1 job import_folder (thư mục nguồn + folder_id + loại job), lưu bằng SQLite (WAL)
+# tại <project>/.metadata/import_jobs/<key>.sqlite.
+# Loại job: "scan" (import / rescan cả thư mục) và "watch" (batch của watch-folder) có journal
+# riêng → batch watcher xong không xóa checkpoint của lần scan đang dở.
+# Mỗi file đi qua các stage: hashed → inserted → thumbnailed.
+# App bị tắt / crash giữa chừng → chạy lại cùng job sẽ bỏ qua phần đã xong.
+
+STAGE_HASHED = 1
+STAGE_INSERTED = 2
+STAGE_THUMBNAILED = 3
+
+
+class ImportJournal:
+    """
+    snapshot: kết quả scan_tree của lần chạy hiện tại ({path: [size, mtime_ns, inode]}),
+    dùng để ghi size/mtime cho mỗi file và kiểm tra file có đổi từ lần chạy trước không.
+    """
+
+    def __init__(self, path: str, root: str, snapshot: dict = None):
+        self.path = path
+        self.root = root
+        self.snapshot = snapshot or {}
+        self.resumed = os.path.exists(path)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS job(
+                root TEXT,
+                started_at REAL,
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS files(
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT,
+                stage INTEGER,
+                photo_id INTEGER
+            );
+        """)
+        if not self.resumed:
+            now = time.time()
+            with self._conn:
+                self._conn.execute("INSERT INTO job VALUES (?, ?, ?)", (root, now, now))
+
+    @classmethod
+    def open_for(cls, root: str, folder_id=None, snapshot: dict = None, project_root: str = None,
+                 job: str = "scan"):
+        """Journal của job (root, folder_id, job); có sẵn từ lần chạy dở → resumed=True."""
+        if project_root is None:
+            project_root = get_current_project_path()
+        key = hashlib.md5(f"{os.path.abspath(root)}|{folder_id}|{job}".encode("utf-8")).hexdigest()
+        journal_dir = os.path.join(project_root, ".metadata", "import_jobs")
+        os.makedirs(journal_dir, exist_ok=True)
+        return cls(os.path.join(journal_dir, f"{key}.sqlite"), root, snapshot)
+
+    # ---------------------------------------------------------
+    def entries(self) -> dict:
+        """{path: (size, mtime_ns, content_hash, stage, photo_id)}"""
+        rows = self._conn.execute(
+            "SELECT path, size, mtime_ns, content_hash, stage, photo_id FROM files"
+        )
+        return {row[0]: row[1:] for row in rows}
+
+    def completed(self, paths) -> tuple:
+        """
+        Phần việc đã xong của lần chạy trước, chỉ tính file không đổi size/mtime.
+        Trả về (thumbnailed {path: id}, inserted {path: id}, hashed {path: content_hash}).
+        """
+        thumbnailed, inserted, hashed = {}, {}, {}
+        entries = self.entries()
+        for path in paths:
+            entry = entries.get(path)
+            stat = self.snapshot.get(path)
+            if entry is None or stat is None or list(entry[:2]) != list(stat[:2]):
+                continue
+            _size, _mtime, content_hash, stage, photo_id = entry
+            if stage >= STAGE_THUMBNAILED:
+                thumbnailed[path] = photo_id
+            elif stage == STAGE_INSERTED:
+                inserted[path] = photo_id
+            else:
+                hashed[path] = content_hash
+        return thumbnailed, inserted, hashed
+
+    def mark_hashed(self, items):
+        """items: [(path, content_hash)] – ghi TRƯỚC khi commit DB."""
+        rows = []
+        for path, content_hash in items:
+            size, mtime_ns = (self.snapshot.get(path) or [None, None])[:2]
+            rows.append((path, size, mtime_ns, content_hash, STAGE_HASHED))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files(path, size, mtime_ns, content_hash, stage, photo_id) "
+                "VALUES (?, ?, ?, ?, ?, NULL)",
+                rows,
+            )
+        self._touch()
+
+    def mark_inserted(self, pairs):
+        """pairs: [(path, photo_id)] – ghi ngay sau khi DB commit."""
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE files SET stage=?, photo_id=? WHERE path=? AND stage<?",
+                [(STAGE_INSERTED, photo_id, path, STAGE_INSERTED) for path, photo_id in pairs],
+            )
+
+    def mark_thumbnailed(self, paths):
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE files SET stage=? WHERE path=?",
+                [(STAGE_THUMBNAILED, path) for path in paths],
+            )
+
+    def _touch(self):
+        with self._conn:
+            self._conn.execute("UPDATE job SET updated_at=?", (time.time(),))
+
+    # ---------------------------------------------------------
+    def finish(self):
+        """Job xong (manifest đã ghi) → xóa journal."""
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
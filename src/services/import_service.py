@@ -1,21 +1,323 @@
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait, as_completed
 from datetime import datetime
 from pathlib import Path
 import exifread
 
-from .save_to_db import save_photo
+from .save_to_db import (
+    save_photo, update_photos_bulk, find_hashes_by_partial, find_photos_by_paths, find_unhashed_by_paths,
+    find_rows_by_paths, PhotoWriter,
+)
+from .folder_watcher import FolderWatcher
+from .import_journal import ImportJournal
+from .library_scanner import (
+    scan_tree, diff_snapshot, format_delta, manifest_path, load_manifest, save_manifest
+)
+from ..backend.project_manager import get_current_project_path
+from ..backend.content_store import partial_hash, full_hash, place_original, discard_placed
+from ..utils.config import load_settings
+from ..utils.exif_reader import read_exif_header, EMPTY_EXIF
+from ..utils.metadata_cache import probe_metadata, update_cache
+from ..utils.raw_preview import RAW_EXTENSIONS
+from ..utils.thumbnail import render_renditions, store_renditions
+from ..utils.placeholder import placeholder_from_jpeg, placeholder_columns
 
-SUPPORTED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff"}
+SUPPORTED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff"} | RAW_EXTENSIONS
 
+DEFAULT_BATCH_SIZE = 200
 
-def import_folder(folder_path, folder_id=None):
-    folder = Path(folder_path)
-    if not folder.exists():
+_root_locks = {}  # thư mục nguồn → Lock của job import_folder đang chạy
+_root_locks_guard = threading.Lock()
+
+
+def import_folder(folder_path, folder_id=None, workers=None, batch_size=DEFAULT_BATCH_SIZE, only_paths=None):
+    """
+    Import (hoặc rescan) đệ quy toàn bộ ảnh trong folder theo pipeline:
+    - Scan os.scandir + so với manifest của project → chỉ xử lý file mới / thay đổi
+    - Process pool: đọc EXIF, kích thước, tạo thumbnail
+    - 1 writer duy nhất (process chính) ghi DB theo batch
+    - File bị xóa → chuyển vào Trash, file đổi tên → cập nhật file_path
+    - Journal (import_journal) ghi tiến độ từng file: app crash giữa chừng →
+      chạy lại sẽ bỏ qua file đã xong, không tạo bản ghi trùng
+
+    workers=None → dùng toàn bộ CPU; workers=0 → chạy tuần tự trong process hiện tại.
+    only_paths: chỉ import/cập nhật các file này (watch-folder), file khác để lần sau.
+    Trả về dict thống kê: imported, updated, failed, delta, elapsed, files_per_sec.
+    """
+    root = os.path.abspath(folder_path)
+    if not os.path.isdir(root):
         print(f"❌ Folder not found: {folder_path}")
-        return
+        return None
+
+    # Watcher và import tay cùng thư mục dùng chung manifest → chạy lần lượt
+    with _root_lock(root):
+        return _import_folder(root, folder_id, workers, batch_size, only_paths)
+
+
+def _root_lock(root):
+    with _root_locks_guard:
+        return _root_locks.setdefault(root, threading.Lock())
+
+
+def _import_folder(root, folder_id, workers, batch_size, only_paths):
+    project_root = get_current_project_path()
+    m_path = manifest_path(root, folder_id, project_root)
+    manifest = load_manifest(m_path)
+
+    scan_started = time.perf_counter()
+    if only_paths is None:
+        snapshot = scan_tree(root, SUPPORTED_IMAGE_EXTENSIONS)
+    else:
+        # Watch-folder: chỉ quét lại các thư mục có event, phần còn lại lấy từ manifest
+        only_paths = {os.path.abspath(p) for p in only_paths}
+        dirs = {os.path.dirname(p) for p in only_paths}
+        snapshot = {p: entry[:3] for p, entry in manifest.items() if os.path.dirname(p) not in dirs}
+        for directory in dirs:
+            snapshot.update(scan_tree(directory, SUPPORTED_IMAGE_EXTENSIONS, recursive=False))
+    seeded, trashed = _seed_manifest(manifest, snapshot, folder_id)
+    delta = diff_snapshot(manifest, snapshot)
+    if only_paths is not None:
+        # File chưa ổn định (chưa có trong batch) để lần sau (không vào manifest)
+        delta["added"] = [p for p in delta["added"] if p in only_paths]
+        delta["changed"] = [p for p in delta["changed"] if p in only_paths]
+    print(f"[SCAN] {root}: {format_delta(delta)} ({time.perf_counter() - scan_started:.2f}s)")
+
+    existing_ids = {path: manifest[path][3] for path in delta["changed"]}
+    # File đã bị xóa (row trong Trash) nay quay lại → update + khôi phục row cũ, không insert mới
+    restored = {path: trashed[path] for path in delta["added"] if path in trashed}
+    existing_ids.update(restored)
+    todo = delta["added"] + delta["changed"]
+    job = "scan" if only_paths is None else "watch"
+    journal = ImportJournal.open_for(root, folder_id, snapshot, project_root, job=job)
+    resumed_ids = {}
+    finished = False
+    try:
+        if journal.resumed:
+            todo, resumed_ids = _resume_job(journal, todo, existing_ids, folder_id)
+        stats = import_paths(todo, folder_id, workers, batch_size, existing_ids, journal=journal)
+        stats["path_ids"].update(resumed_ids)
+        _apply_moves_and_removals(delta, manifest)
+        update_photos_bulk([
+            {"id": photo_id, "is_deleted": False}
+            for path, photo_id in restored.items() if path in stats["path_ids"]
+        ])
+
+        if stats["path_ids"] or delta["removed"] or delta["moved"] or seeded:
+            save_manifest(m_path, root, _next_manifest(manifest, snapshot, delta, stats["path_ids"]))
+        finished = True
+    finally:
+        if finished:
+            journal.finish()  # manifest đã ghi mọi file đã commit → journal hết tác dụng
+        else:
+            journal.close()   # lỗi / crash: giữ file journal → lần chạy sau tiếp tục từ checkpoint
 
-    for file in folder.iterdir():
-        if file.is_file() and file.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS:
-            process_photo(file, folder_id)
+    stats["delta"] = delta
+    stats["resumed"] = len(resumed_ids)
+    return stats
+
+
+def _seed_manifest(manifest, snapshot, folder_id):
+    """
+    File trên đĩa chưa có trong manifest nhưng đã có Photo cùng path (manifest mới / bị mất,
+    ảnh import từ bản cũ, file bị xóa rồi quay lại) → dùng lại row thay vì insert mới.
+    - row chưa xóa → thêm vào manifest như file không đổi
+    - row trong Trash → không thêm, caller import lại dạng update + khôi phục
+    Trả về (số entry đã thêm vào manifest, {path: photo_id} của row trong Trash).
+    """
+    rows = find_rows_by_paths([p for p in snapshot if p not in manifest], folder_id)
+    trashed = {}
+    for path, (photo_id, is_deleted) in rows.items():
+        if is_deleted:
+            trashed[path] = photo_id
+        else:
+            manifest[path] = snapshot[path] + [photo_id]
+    return len(rows) - len(trashed), trashed
+
+
+def _resume_job(journal, paths, existing_ids, folder_id):
+    """
+    Tiếp tục job bị dừng giữa chừng (crash / tắt app).
+    - đã thumbnail → bỏ qua hẳn
+    - đã insert, chưa thumbnail → chạy lại dạng update (không insert lần 2)
+    - mới hash: có thể DB đã commit mà journal chưa kịp ghi → tìm lại row theo path + hash
+    Trả về (paths còn phải xử lý, {path: photo_id} đã xong).
+    """
+    thumbnailed, inserted, hashed = journal.completed(paths)
+    for path, (photo_id, content_hash) in find_photos_by_paths(hashed, folder_id).items():
+        if hashed[path] is None or hashed[path] == content_hash:
+            inserted[path] = photo_id
+    journal.mark_inserted(inserted.items())
+    existing_ids.update(inserted)
+
+    remaining = [p for p in paths if p not in thumbnailed]
+    print(f"[RESUME] {len(thumbnailed)} done, {len(inserted)} need thumbnails, {len(remaining)} remaining")
+    return remaining, thumbnailed
+
+
+def import_originals(files, folder_id=None, storage_mode=None, workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                     progress=None, on_batch=None, cancel=None):
+    """
+    Import file được chọn từ dialog, bỏ qua ảnh trùng nội dung.
+    - partial hash (size + đầu/cuối file) cho cả batch → 1 lookup theo index
+    - chỉ file khớp partial mới phải hash toàn bộ để so
+    - storage_mode (copy / reflink / hardlink / reference, mặc định theo settings project):
+      cách đưa bản gốc vào project, xem content_store.place_original.
+      Nhiều file được copy / link song song (copy_workers trong settings).
+    progress / on_batch / cancel: xem import_paths.
+    Trả về stats của pipeline + số ảnh trùng bị bỏ qua.
+    """
+    project_root = get_current_project_path()
+    settings = load_settings(project_root)
+    storage_mode = storage_mode or settings["storage_mode"]
+    files = list(dict.fromkeys(os.path.abspath(f) for f in files))
+
+    partials = {}
+    for f in files:
+        try:
+            partials[f] = partial_hash(f)
+        except OSError as e:
+            print(f"[IMPORT ERROR] {f}: {e}")
+
+    # Ảnh import trước khi có partial_hash: không tìm được theo hash → dedup theo path
+    # như trước, đồng thời tính bù partial_hash cho row đó (lần sau dedup theo hash được)
+    legacy = find_unhashed_by_paths(partials)
+    if legacy:
+        update_photos_bulk([{"id": pid, "partial_hash": partials[f]} for f, pid in legacy.items()])
+    plan, duplicates = _dedup_plan(
+        {f: p for f, p in partials.items() if f not in legacy}, find_hashes_by_partial(partials.values())
+    )
+    duplicates += len(legacy)
+
+    extra_fields = {}
+    created = set()  # file vừa tạo trong kho → xóa nếu không thành Photo (hủy / lỗi)
+    with ThreadPoolExecutor(max_workers=max(1, settings["copy_workers"])) as pool:
+        futures = {
+            pool.submit(place_original, f, storage_mode, project_root, content_hash, p): (f, p)
+            for f, p, content_hash in plan
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            if cancel is not None and cancel.is_set():
+                for pending in futures:
+                    pending.cancel()
+                break
+            if progress:
+                progress(storage_mode, i, len(futures))
+            f, p = futures[future]
+            try:
+                dest, content_hash, is_new = future.result()
+            except OSError as e:
+                print(f"[IMPORT ERROR] {f}: {e}")
+                continue
+            extra_fields[str(dest)] = {"content_hash": content_hash, "partial_hash": p}
+            if is_new:
+                created.add(str(dest))
+    # Hủy giữa chừng: file đang copy dở vẫn chạy xong (with chờ pool) nhưng không được đọc kết quả
+    for future in futures:
+        if future.done() and not future.cancelled() and future.exception() is None:
+            dest, _content_hash, is_new = future.result()
+            if is_new and str(dest) not in extra_fields:
+                created.add(str(dest))
+
+    stats = import_paths(
+        list(extra_fields), folder_id, workers, batch_size, extra_fields=extra_fields,
+        progress=progress, on_batch=on_batch, cancel=cancel,
+    )
+    orphans = created - set(stats["path_ids"])
+    for dest in orphans:
+        discard_placed(dest)
+    if orphans:
+        print(f"[IMPORT] Removed {len(orphans)} file(s) not imported from the store")
+    stats["duplicates"] = duplicates
+    if duplicates:
+        print(f"[IMPORT] Skipped {duplicates} duplicate photo(s)")
+    return stats
+
+
+def _dedup_plan(partials, known, hash_of=full_hash):
+    """
+    partials: {file: partial_hash}, known: kết quả find_hashes_by_partial.
+    Trả về ([(file, partial_hash, content_hash | None)], số file trùng).
+    Full hash chỉ tính khi partial trùng với DB hoặc với file khác trong batch.
+    hash_of(file): cách lấy full hash của file trong batch (archive: đã tính sẵn).
+    """
+    partial_counts = {}
+    for p in partials.values():
+        partial_counts[p] = partial_counts.get(p, 0) + 1
+
+    existing_hashes = {}  # file_path đã có trong DB → content hash (tính bù nếu row chưa có)
+    seen = set()
+    plan = []
+    duplicates = 0
+    for f, p in partials.items():
+        if p not in known and partial_counts[p] == 1:
+            plan.append((f, p, None))
+            continue
+
+        content_hash = hash_of(f)
+        existing = set()
+        for known_hash, known_path in known.get(p, ()):
+            if known_hash is None and os.path.exists(known_path):
+                if known_path not in existing_hashes:
+                    existing_hashes[known_path] = full_hash(known_path)
+                known_hash = existing_hashes[known_path]
+            existing.add(known_hash)
+
+        if content_hash in existing or content_hash in seen:
+            duplicates += 1
+            continue
+        seen.add(content_hash)
+        plan.append((f, p, content_hash))
+    return plan, duplicates
+
+
+def watch_folder(folder_id, folder_path, on_batch=None, **options):
+    """
+    Tạo FolderWatcher cho 1 Folder: file mới được import theo batch
+    qua import_folder (incremental, cập nhật manifest) → không import trùng.
+    """
+    def import_batch(root, fid, paths):
+        return import_folder(root, fid, only_paths=paths)
+
+    return FolderWatcher(
+        folder_id, folder_path, import_batch, SUPPORTED_IMAGE_EXTENSIONS,
+        on_batch=on_batch, **options
+    )
+
+
+def import_paths(paths, folder_id=None, workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                 existing_ids=None, extra_fields=None, progress=None, on_batch=None, cancel=None,
+                 journal=None):
+    """
+    Chạy pipeline import cho danh sách file.
+    existing_ids: {path: photo_id} → file đã có trong DB, chỉ cập nhật EXIF + thumbnail.
+    extra_fields: {path: {cột: giá trị}} → đã tính sẵn (vd content hash), worker không hash lại.
+    progress(stage, done, total): gọi sau mỗi file (từ thread đang import)
+    on_batch(photo_ids): gọi sau mỗi batch đã commit → UI cập nhật dần
+    cancel: threading.Event, set() để dừng; batch đã xử lý vẫn được commit.
+    journal: ImportJournal của job (import_folder) – ghi hashed/inserted/thumbnailed mỗi batch.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    project_root = get_current_project_path()
+    paths = list(paths)
+    extra_fields = extra_fields or {}
+    results = _run_pool(_probe_photo, paths, workers, not extra_fields)
+    try:
+        stats = _write_results(
+            results, folder_id, project_root, batch_size, existing_ids or {}, extra_fields,
+            total=len(paths), progress=progress, on_batch=on_batch, cancel=cancel, journal=journal,
+        )
+    finally:
+        results.close()
+
+    print(
+        f"✅ Imported {stats['imported']} photos, updated {stats['updated']} "
+        f"in {stats['elapsed']:.1f}s ({stats['files_per_sec']:.1f} files/s, {workers or 1} workers)"
+    )
+    return stats
 
 
 def process_photo(image_path: Path, folder_id=None):
@@ -33,17 +335,291 @@ def process_photo(image_path: Path, folder_id=None):
     )
 
 
+# ---------------------------------------------------------
+# PIPELINE
+# ---------------------------------------------------------
+def _probe_photo(file_path: str, hash_file: bool = True) -> dict:
+    """
+    Chạy trong process con: hash + EXIF + kích thước + thumbnail cho 1 file.
+    Thumbnail (các rendition cho lưới) trả về dạng bytes,
+    writer ghi vào kho thumbnail theo photo id sau khi insert.
+    """
+    result = {"path": file_path, "exif": read_exif_fields(Path(file_path)), "meta": None, "thumb": None, "hashes": {}}
+
+    if hash_file:
+        try:
+            result["hashes"] = {"partial_hash": partial_hash(file_path), "content_hash": full_hash(file_path)}
+        except OSError as e:
+            print(f"[HASH ERROR] {file_path}: {e}")
+
+    try:
+        result["meta"] = probe_metadata(file_path)
+    except Exception as e:
+        print(f"[META ERROR] {file_path}: {e}")
+
+    result["thumb"] = render_renditions(file_path)
+    if result["thumb"]:
+        result["placeholder"] = placeholder_from_jpeg(result["thumb"]["grid"])
+
+    return result
+
+
+def _run_pool(fn, items, workers, *args):
+    """
+    Đẩy items vào process pool, trả kết quả theo thứ tự hoàn thành.
+    Số task đang chờ được giới hạn để không submit hết 20k file một lúc.
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(item, *args)
+        return
+
+    max_in_flight = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        try:
+            for item in items:
+                in_flight[pool.submit(fn, item, *args)] = item
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    yield from _collect(done, in_flight)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from _collect(done, in_flight)
+        finally:
+            # Bị hủy giữa chừng (generator close) → bỏ các task chưa chạy
+            for future in in_flight:
+                future.cancel()
+
+
+def _collect(futures, in_flight):
+    for future in futures:
+        item = in_flight.pop(future)
+        try:
+            yield future.result()
+        except Exception as e:
+            print(f"[IMPORT ERROR] Worker failed for {item}: {e}")
+            yield {"path": item, "error": str(e)}
+
+
+def _write_results(results, folder_id, project_root, batch_size, existing_ids, extra_fields,
+                   total=0, progress=None, on_batch=None, cancel=None, journal=None):
+    """
+    Writer stage: file mới → PhotoWriter (insert theo batch),
+    file đã có → update theo batch. Commit 1 lần mỗi batch.
+    Có journal: ghi "hashed" trước khi commit DB, "inserted" / "thumbnailed" ngay sau.
+    Batch ghi DB lỗi: cả batch tính là failed, thumbnail đang giữ của batch bị bỏ
+    (không vào kho thumbnail / manifest → lần scan sau thử lại).
+    """
+    started = time.perf_counter()
+    failed = 0
+    done = 0
+    path_ids = {}
+    updates = []
+
+    def before_flush(records):
+        if journal:
+            journal.mark_hashed([(r["file_path"], r.get("content_hash")) for r in records])
+
+    def on_flush(pairs):
+        if journal:
+            journal.mark_inserted([(record["file_path"], photo_id) for photo_id, record in pairs])
+        _finish_batch(pairs, project_root)
+        if journal:
+            journal.mark_thumbnailed([record["file_path"] for _, record in pairs])
+        path_ids.update((record["file_path"], photo_id) for photo_id, record in pairs)
+        _report_progress(len(path_ids), started)
+        if on_batch:
+            on_batch([photo_id for photo_id, _ in pairs])
+
+    def on_error(records, error):
+        # Thumbnail chỉ vào kho trong on_flush → batch lỗi không để lại thumbnail mồ côi
+        nonlocal failed
+        failed += len(records)
+
+    def flush_updates():
+        before_flush(updates)
+        try:
+            update_photos_bulk(updates)
+        except Exception as e:
+            print(f"[DB ERROR] Batch update failed ({len(updates)} photos): {e}")
+            on_error(updates, e)
+        else:
+            on_flush([(record["id"], record) for record in updates])
+        updates.clear()
+
+    with PhotoWriter(batch_size=batch_size, on_flush=on_flush, before_flush=before_flush,
+                     on_error=on_error) as writer:
+        now = datetime.now()
+        for result in results:
+            if cancel is not None and cancel.is_set():
+                print("[IMPORT] Cancelled")
+                break
+            done += 1
+            if progress:
+                progress("import", done, total)
+            if result.get("error"):
+                failed += 1
+                continue
+            result["hashes"].update(extra_fields.get(result["path"], {}))
+            photo_id = existing_ids.get(result["path"])
+            if photo_id is None:
+                writer.add(_photo_record(result, folder_id, now))
+                continue
+            updates.append(_photo_update(result, photo_id))
+            if len(updates) >= batch_size:
+                flush_updates()
+        if updates:
+            flush_updates()
+
+    imported = len(writer.ids)
+    updated = len(path_ids) - imported
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "updated": updated,
+        "failed": failed,
+        "photo_ids": writer.ids,
+        "path_ids": path_ids,
+        "cancelled": bool(cancel is not None and cancel.is_set()),
+        "elapsed": elapsed,
+        "files_per_sec": len(path_ids) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _photo_record(result, folder_id, now):
+    """Kết quả worker → record cho PhotoWriter (key "_result" đi kèm cho on_flush)."""
+    return {
+        "file_path": result["path"],
+        "folder_id": folder_id,
+        "date_imported": now,
+        "date_created": result["exif"]["datetime_original"] or now,
+        **_exif_columns(result["exif"]),
+        **placeholder_columns(result.get("placeholder")),
+        **result["hashes"],
+        "_result": result,
+    }
+
+
+def _photo_update(result, photo_id):
+    """Kết quả worker → record update cho ảnh đã có (giữ nguyên rating, tags, note...)."""
+    return {
+        "id": photo_id,
+        "file_path": result["path"],
+        **_exif_columns(result["exif"]),
+        **placeholder_columns(result.get("placeholder")),
+        **result["hashes"],
+        "_result": result,
+    }
+
+
+def _finish_batch(pairs, project_root):
+    """Sau khi batch commit: ghi thumbnail vào kho theo photo id (1 lần append) + ghi metadata cache."""
+    metas = {}
+    thumbs = []
+    for photo_id, record in pairs:
+        result = record["_result"]
+        thumbs.append((photo_id, result["path"], result["thumb"]))
+        if result["meta"]:
+            metas[result["path"]] = result["meta"]
+    try:
+        store_renditions(thumbs, project_root)
+    except OSError as e:
+        print(f"[THUMB ERROR] {e}")
+    update_cache(metas)
+
+
+def _apply_moves_and_removals(delta, manifest):
+    """File đổi tên → cập nhật file_path; file biến mất → soft delete (Trash)."""
+    # Thumbnail theo photo id + size/mtime → file đổi tên vẫn dùng được thumbnail cũ
+    rows = []
+    for old_path, new_path in delta["moved"]:
+        photo_id = manifest[old_path][3]
+        rows.append({"id": photo_id, "file_path": new_path})
+    for path in delta["removed"]:
+        rows.append({"id": manifest[path][3], "is_deleted": True})
+    update_photos_bulk(rows)
+
+
+def _next_manifest(manifest, snapshot, delta, path_ids):
+    """
+    Manifest mới sau import. File lỗi giữ entry cũ (hoặc bỏ qua nếu là file mới)
+    để lần scan sau thử lại mà không tạo bản ghi trùng.
+    """
+    files = {}
+    for path, stat in snapshot.items():
+        if path in path_ids:
+            files[path] = stat + [path_ids[path]]
+        elif path in manifest:
+            files[path] = manifest[path]
+    for old_path, new_path in delta["moved"]:
+        files[new_path] = snapshot[new_path] + [manifest[old_path][3]]
+    return files
+
+
+def _report_progress(imported, started):
+    elapsed = time.perf_counter() - started
+    rate = imported / elapsed if elapsed > 0 else 0.0
+    print(f"[IMPORT] {imported} files — {rate:.1f} files/s")
+
+
 def read_exif(image_path: Path):
     """
     Đọc EXIF cơ bản, return (iso, focal, aperture, shutter)
     Nếu thiếu EXIF → trả về None tương ứng.
     """
+    exif = read_exif_fields(image_path)
+    focal = exif["focal_length"]
+    return (
+        exif["iso"],
+        int(focal) if focal is not None else None,
+        exif["aperture"],
+        exif["exposure_time"],
+    )
+
+
+def read_exif_fields(image_path: Path) -> dict:
+    """
+    Đọc EXIF đầy đủ (ISO, focal, aperture, shutter, lens, camera, ngày chụp, GPS, orientation).
+    JPEG / TIFF: parser header-only (chỉ đọc APP1 / IFD).
+    Định dạng khác (PNG, ...): fallback exifread.
+    """
+    try:
+        return read_exif_header(str(image_path))
+    except ValueError:
+        return _read_exif_exifread(image_path)
+    except Exception as e:
+        print(f"⚠️ EXIF read failed for {image_path}: {e}")
+        return dict(EMPTY_EXIF)
+
+
+def _exif_columns(exif: dict) -> dict:
+    """Dict EXIF đã có kiểu → giá trị cột Photo."""
+    focal = exif["focal_length"]
+    if focal is not None and focal == int(focal):
+        focal = int(focal)
+    return {
+        "exif_iso": exif["iso"],
+        "exif_focal_length": focal,
+        "exif_aperture": exif["aperture"],
+        "exif_shutter_speed": exif["exposure_time"],
+        "exif_lens": exif["lens_model"],
+        "exif_camera": exif["camera_model"],
+        "exif_orientation": exif["orientation"],
+        "gps_latitude": exif["gps_latitude"],
+        "gps_longitude": exif["gps_longitude"],
+    }
+
+
+def _read_exif_exifread(image_path: Path) -> dict:
+    """Đường đọc cũ qua exifread (parse toàn bộ tag) – dùng cho định dạng không phải JPEG/TIFF."""
+    exif = dict(EMPTY_EXIF)
     try:
         with open(image_path, "rb") as f:
             tags = exifread.process_file(f, details=False)
     except Exception as e:
         print(f"⚠️ EXIF read failed for {image_path}: {e}")
-        return (None, None, None, None)
+        return exif
 
     iso = tags.get("EXIF ISOSpeedRatings")
     focal = tags.get("EXIF FocalLength")
@@ -68,9 +644,10 @@ def read_exif(image_path: Path):
         except Exception:
             return None
 
-    return (
-        to_int(iso),
-        to_int(focal),
-        to_float(aperture),
-        to_float(shutter),
-    )
+    exif.update({
+        "iso": to_int(iso),
+        "focal_length": to_float(focal),
+        "aperture": to_float(aperture),
+        "exposure_time": to_float(shutter),
+    })
+    return exif
@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import time
+
+from ..backend.project_manager import get_current_project_path
+
+MANIFEST_VERSION = 1
+
+# Windows: scandir không trả inode sẵn, gọi entry.inode() sẽ tốn thêm 1 stat/file
+_READ_INODE = os.name != "nt"
+
+
+# ---------------------------------------------------------
+# SCAN
+# ---------------------------------------------------------
+def scan_tree(root: str, extensions: set, recursive: bool = True) -> dict:
+    """
+    Duyệt đệ quy root bằng os.scandir (không dùng Path.iterdir / os.walk).
+    Trả về {path: [size, mtime_ns, inode]} cho các file có đuôi trong extensions.
+    recursive=False: chỉ file nằm trực tiếp trong root (watch-folder quét lại 1 thư mục).
+    """
+    snapshot = {}
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and not entry.name.startswith("."):
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        if os.path.splitext(entry.name)[1].lower() not in extensions:
+                            continue
+                        st = entry.stat()
+                        inode = entry.inode() if _READ_INODE else 0
+                        snapshot[entry.path] = [st.st_size, st.st_mtime_ns, inode]
+                    except OSError as e:
+                        print(f"[SCAN WARN] {entry.path}: {e}")
+        except OSError as e:
+            print(f"[SCAN WARN] Cannot read {current}: {e}")
+    return snapshot
+
+
+def diff_snapshot(manifest: dict, snapshot: dict) -> dict:
+    """
+    So sánh manifest cũ {path: [size, mtime_ns, inode, photo_id]} với snapshot mới.
+    Trả về delta:
+    - added:   path mới
+    - changed: path có size/mtime khác
+    - removed: path không còn trên đĩa
+    - moved:   [(old_path, new_path)] cùng inode + size (đổi tên / di chuyển)
+    - unchanged: số file không đổi
+    """
+    added, changed, removed = [], [], []
+    unchanged = 0
+
+    for path, stat in snapshot.items():
+        old = manifest.get(path)
+        if old is None:
+            added.append(path)
+        elif old[0] != stat[0] or old[1] != stat[1]:
+            changed.append(path)
+        else:
+            unchanged += 1
+
+    for path in manifest:
+        if path not in snapshot:
+            removed.append(path)
+
+    # Ghép removed + added cùng inode/size → chỉ là đổi tên, không cần import lại
+    moved = []
+    if removed and added:
+        by_inode = {}
+        for path in removed:
+            size, _mtime, inode = manifest[path][:3]
+            if inode:
+                by_inode[(inode, size)] = path
+        for path in added:
+            size, _mtime, inode = snapshot[path]
+            old_path = by_inode.pop((inode, size), None) if inode else None
+            if old_path:
+                moved.append((old_path, path))
+        if moved:
+            # Lọc 1 lần bằng set (list.remove trong vòng lặp = O(n²) khi đổi tên cả cây thư mục)
+            moved_old = {old for old, _ in moved}
+            moved_new = {new for _, new in moved}
+            added = [p for p in added if p not in moved_new]
+            removed = [p for p in removed if p not in moved_old]
+
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "moved": moved,
+        "unchanged": unchanged,
+    }
+
+
+def format_delta(delta: dict) -> str:
+    return (
+        f"+{len(delta['added'])} new, ~{len(delta['changed'])} changed, "
+        f"-{len(delta['removed'])} removed, {len(delta['moved'])} moved, "
+        f"{delta['unchanged']} unchanged"
+    )
+
+
+# ---------------------------------------------------------
+# MANIFEST (per project)
+# ---------------------------------------------------------
+def manifest_path(root: str, folder_id=None, project_root: str = None) -> str:
+    """Mỗi (thư mục nguồn, folder_id) có 1 manifest trong <project>/.metadata/manifests/"""
+    if project_root is None:
+        project_root = get_current_project_path()
+    key = hashlib.md5(f"{os.path.abspath(root)}|{folder_id}".encode("utf-8")).hexdigest()
+    manifest_dir = os.path.join(project_root, ".metadata", "manifests")
+    os.makedirs(manifest_dir, exist_ok=True)
+    return os.path.join(manifest_dir, f"{key}.json")
+
+
+def load_manifest(path: str) -> dict:
+    """Đọc manifest, trả về {file_path: [size, mtime_ns, inode, photo_id]}."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"[SCAN WARN] Manifest unreadable, full rescan: {e}")
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(path: str, root: str, files: dict):
+    """Ghi manifest atomically (file tạm + os.replace)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": MANIFEST_VERSION, "root": root, "scanned_at": time.time(), "files": files},
+            f, ensure_ascii=False, separators=(",", ":"),
+        )
+    os.replace(tmp, path)
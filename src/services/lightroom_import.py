@@ -0,0 +1,259 @@
+import os
+import time
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import select
+from .import_service import _dedup_plan
+from .save_to_db import PhotoWriter, find_hashes_by_partial
+from ..backend.database_manager import get_session, Folder, Photo
+from ..backend.content_store import partial_hash
+
+# Chuyển catalog Lightroom Classic (.lrcat = SQLite) sang Ref:
+# - đọc catalog bằng vài query set-based (JOIN), không mở từng file ảnh gốc
+# - mỗi thư mục Lightroom → 1 Folder, mỗi ảnh (không tính virtual copy) → 1 Photo
+# - rating, pick → rating >= FAVORITE_RATING (view Favorites lọc theo rating), keywords → tags,
+#   EXIF đã harvest → cột exif_*
+# - partial hash (64KB đầu + cuối) đọc song song để dedup như import_originals,
+#   full hash chỉ khi partial trùng; file offline → không có hash (dedup theo path)
+# - ghi DB bằng PhotoWriter (executemany theo batch); thumbnail tạo lazy khi gallery cần
+
+LRCAT_EXTENSION = ".lrcat"
+DEFAULT_LR_BATCH_SIZE = 1000
+HASH_WORKERS = 8
+FAVORITE_RATING = 4  # main_window.show_favorites: rating >= 4
+
+# Orientation của Lightroom (cạnh trên của ảnh sau khi xoay) → EXIF orientation
+LR_ORIENTATIONS = {"AB": 1, "BA": 2, "CD": 3, "DC": 4, "AD": 5, "BC": 6, "CB": 7, "DA": 8}
+
+_FOLDERS_SQL = """
+    SELECT DISTINCT fo.id_local, fo.pathFromRoot, r.absolutePath, r.name
+    FROM Adobe_images i
+    JOIN AgLibraryFile f ON f.id_local = i.rootFile
+    JOIN AgLibraryFolder fo ON fo.id_local = f.folder
+    JOIN AgLibraryRootFolder r ON r.id_local = fo.rootFolder
+    WHERE i.masterImage IS NULL
+"""
+
+_KEYWORDS_SQL = """
+    SELECT ki.image, k.name
+    FROM AgLibraryKeywordImage ki
+    JOIN AgLibraryKeyword k ON k.id_local = ki.tag
+    WHERE k.name IS NOT NULL
+"""
+
+_IMAGES_SQL = """
+    SELECT i.id_local, i.captureTime, i.rating, i.orientation, i.pick,
+           f.baseName, f.extension, f.folder,
+           e.aperture, e.shutterSpeed, e.isoSpeedRating, e.focalLength,
+           cam.value, lens.value, e.gpsLatitude, e.gpsLongitude, e.hasGPS
+    FROM Adobe_images i
+    JOIN AgLibraryFile f ON f.id_local = i.rootFile
+    LEFT JOIN AgHarvestedExifMetadata e ON e.image = i.id_local
+    LEFT JOIN AgInternedExifCameraModel cam ON cam.id_local = e.cameraModelRef
+    LEFT JOIN AgInternedExifLens lens ON lens.id_local = e.lensRef
+    WHERE i.masterImage IS NULL
+    ORDER BY f.folder, i.id_local
+"""
+
+
+def is_lightroom_catalog(path) -> bool:
+    return str(path).lower().endswith(LRCAT_EXTENSION)
+
+
+def import_lightroom_catalog(catalog_path, batch_size=DEFAULT_LR_BATCH_SIZE,
+                             progress=None, on_batch=None, cancel=None):
+    """
+    Import toàn bộ ảnh trong catalog Lightroom (1 lượt, không đọc lại EXIF từ file gốc).
+    Ảnh đã có trong Ref (cùng file_path hoặc cùng nội dung) được bỏ qua → chạy lại không tạo bản ghi trùng.
+    progress / on_batch / cancel: xem import_service.import_paths.
+    Trả về stats: imported, skipped, duplicates, folders_created, photo_ids, cancelled, elapsed, files_per_sec.
+    """
+    started = time.perf_counter()
+    # Catalog có thể đang mở trong Lightroom → chỉ đọc
+    uri = Path(os.path.abspath(catalog_path)).as_uri() + "?mode=ro"
+    catalog = sqlite3.connect(uri, uri=True)
+    session = get_session()
+    try:
+        total = catalog.execute("SELECT COUNT(*) FROM Adobe_images WHERE masterImage IS NULL").fetchone()[0]
+        folder_map, folders_created = _map_folders(catalog, session)
+        keywords = _load_keywords(catalog)
+        existing = _existing_paths(session, {folder_id for folder_id, _ in folder_map.values()})
+        print(f"[LIGHTROOM] {total} photos in {len(folder_map)} folders ({folders_created} new)")
+
+        def on_flush(pairs):
+            if on_batch:
+                on_batch([photo_id for photo_id, _ in pairs])
+
+        done = skipped = duplicates = 0
+        now = datetime.now()
+        with PhotoWriter(batch_size=batch_size, session=session, on_flush=on_flush) as writer, \
+                ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            cursor = catalog.execute(_IMAGES_SQL)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows or (cancel is not None and cancel.is_set()):
+                    break
+                records = []
+                for row in rows:
+                    record = _photo_record(row, folder_map, keywords, now)
+                    if record is None or record["file_path"] in existing:
+                        skipped += 1
+                        continue
+                    existing.add(record["file_path"])
+                    records.append(record)
+                records, batch_duplicates = _add_hashes(records, pool)
+                duplicates += batch_duplicates
+                for record in records:
+                    writer.add(record)
+                writer.flush()  # batch sau dedup được với ảnh vừa ghi
+                done += len(rows)
+                if progress:
+                    progress("lightroom", done, total)
+    finally:
+        catalog.close()
+        session.close()
+
+    elapsed = time.perf_counter() - started
+    imported = len(writer.ids)
+    print(
+        f"✅ Imported {imported} photos from Lightroom catalog, skipped {skipped}, "
+        f"{duplicates} duplicate(s) in {elapsed:.1f}s"
+    )
+    return {
+        "imported": imported,
+        "updated": 0,
+        "skipped": skipped,
+        "duplicates": duplicates,
+        "folders_created": folders_created,
+        "photo_ids": writer.ids,
+        "cancelled": bool(cancel is not None and cancel.is_set()),
+        "elapsed": elapsed,
+        "files_per_sec": done / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+# ---------------------------------------------------------
+# MAPPING
+# ---------------------------------------------------------
+def _map_folders(catalog, session):
+    """Thư mục Lightroom → Folder (dùng lại Folder cùng path). Trả về ({lr_id: (folder_id, path)}, số Folder mới)."""
+    lr_folders = {}
+    for lr_id, path_from_root, root_path, root_name in catalog.execute(_FOLDERS_SQL):
+        path = os.path.normpath((root_path or "") + (path_from_root or ""))
+        name = os.path.basename(path) or root_name or path
+        lr_folders[lr_id] = (name, path)
+
+    paths = {path for _, path in lr_folders.values()}
+    by_path = {}
+    for folder in session.execute(select(Folder).where(Folder.path.in_(paths))).scalars():
+        by_path.setdefault(folder.path, folder)
+
+    created = [Folder(name=name, path=path) for name, path in set(lr_folders.values()) if path not in by_path]
+    if created:
+        session.add_all(created)
+        session.commit()
+        by_path.update((folder.path, folder) for folder in created)
+
+    return {lr_id: (by_path[path].id, path) for lr_id, (_, path) in lr_folders.items()}, len(created)
+
+
+def _load_keywords(catalog):
+    """{image id: [keyword, ...]} – 1 query cho cả catalog."""
+    keywords = {}
+    for image_id, name in catalog.execute(_KEYWORDS_SQL):
+        keywords.setdefault(image_id, []).append(name)
+    return keywords
+
+
+def _existing_paths(session, folder_ids):
+    if not folder_ids:
+        return set()
+    return set(session.execute(select(Photo.file_path).where(Photo.folder_id.in_(folder_ids))).scalars())
+
+
+def _add_hashes(records, pool):
+    """
+    partial_hash cho cả batch (đọc song song), content hash chỉ khi partial trùng DB / batch
+    (xem import_service._dedup_plan). Trả về (records giữ lại, số ảnh trùng nội dung).
+    """
+    paths = [record["file_path"] for record in records]
+    partials = {path: p for path, p in zip(paths, pool.map(_partial_or_none, paths)) if p}
+    plan, duplicates = _dedup_plan(partials, find_hashes_by_partial(partials.values()))
+    hashes = {f: (p, content_hash) for f, p, content_hash in plan}
+
+    kept = []
+    for record in records:
+        path = record["file_path"]
+        if path in partials and path not in hashes:
+            continue  # trùng nội dung với ảnh đã có
+        record["partial_hash"], record["content_hash"] = hashes.get(path, (None, None))
+        kept.append(record)
+    return kept, duplicates
+
+
+def _partial_or_none(path):
+    try:
+        return partial_hash(path)
+    except OSError:
+        return None  # file offline (ổ ngoài chưa cắm) → import không có hash
+
+
+def _photo_record(row, folder_map, keywords, now):
+    (image_id, capture_time, rating, orientation, pick,
+     base_name, extension, lr_folder, aperture, shutter, iso, focal,
+     camera, lens, latitude, longitude, has_gps) = row
+    if lr_folder not in folder_map:
+        return None
+    folder_id, folder_path = folder_map[lr_folder]
+    filename = f"{base_name}.{extension}" if extension else base_name
+
+    return {
+        "file_path": os.path.join(folder_path, filename),
+        "folder_id": folder_id,
+        "date_imported": now,
+        "date_created": _capture_time(capture_time) or now,
+        "rating": max(int(rating or 0), FAVORITE_RATING) if pick == 1 else int(rating or 0),
+        "is_favorite": pick == 1,
+        "tags": keywords.get(image_id, []),
+        "exif_iso": int(iso) if iso else None,
+        "exif_focal_length": _clean_number(focal),
+        "exif_aperture": round(2 ** (aperture / 2), 1) if aperture is not None else None,
+        "exif_shutter_speed": _apex_shutter(shutter),
+        "exif_lens": lens,
+        "exif_camera": camera,
+        "exif_orientation": LR_ORIENTATIONS.get(orientation),
+        "gps_latitude": latitude if has_gps else None,
+        "gps_longitude": longitude if has_gps else None,
+    }
+
+
+# ---------------------------------------------------------
+# CONVERT
+# ---------------------------------------------------------
+def _apex_shutter(tv):
+    """Shutter speed APEX (Tv) → thời gian phơi sáng (giây)."""
+    if tv is None:
+        return None
+    seconds = 2 ** (-tv)
+    return round(seconds, 6) if seconds < 1 else round(seconds, 1)
+
+
+def _clean_number(value):
+    if value is None:
+        return None
+    return int(value) if value == int(value) else round(value, 1)
+
+
+def _capture_time(value):
+    """captureTime của Lightroom: 'YYYY-MM-DDTHH:MM:SS[.fff][+hh:mm]' (có khi chỉ có ngày)."""
+    if not value:
+        return None
+    for length, fmt in ((19, "%Y-%m-%dT%H:%M:%S"), (16, "%Y-%m-%dT%H:%M"), (10, "%Y-%m-%d")):
+        try:
+            return datetime.strptime(value[:length], fmt)
+        except ValueError:
+            continue
+    return None
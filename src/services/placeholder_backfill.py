@@ -0,0 +1,57 @@
+import threading
+
+from sqlalchemy import select
+from .save_to_db import update_photos_bulk
+from ..backend.database_manager import get_session, Photo
+from ..utils.thumbnail import get_thumbnail
+from ..utils.placeholder import placeholder_from_jpeg, placeholder_columns
+
+# Ảnh import trước khi có placeholder (hoặc từ catalog Lightroom) chưa có micro-JPEG / màu chủ đạo
+# → tính bù từ thumbnail "grid" (kho thumbnail, render nếu chưa có), ghi DB theo batch.
+
+DEFAULT_BACKFILL_BATCH = 200
+
+
+def backfill_placeholders(batch_size=DEFAULT_BACKFILL_BATCH, cancel=None) -> int:
+    """Tính placeholder cho mọi ảnh còn thiếu (theo thứ tự id). Trả về số ảnh đã cập nhật."""
+    session = get_session()
+    updated = 0
+    last_id = 0
+    try:
+        while cancel is None or not cancel.is_set():
+            rows = session.execute(
+                select(Photo.id, Photo.file_path)
+                .where(Photo.placeholder.is_(None), Photo.is_deleted == False, Photo.id > last_id)
+                .order_by(Photo.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            records = []
+            for photo_id, file_path in rows:
+                data = get_thumbnail(photo_id, file_path, "grid")
+                columns = placeholder_columns(placeholder_from_jpeg(data) if data else None)
+                if columns:
+                    records.append({"id": photo_id, **columns})
+            update_photos_bulk(records, session=session)
+            updated += len(records)
+    finally:
+        session.close()
+    if updated:
+        print(f"[PLACEHOLDER] Backfilled {updated} photo(s)")
+    return updated
+
+
+def start_backfill(cancel=None) -> threading.Thread:
+    """backfill_placeholders trên thread nền."""
+    def run():
+        try:
+            backfill_placeholders(cancel=cancel)
+        except Exception as e:
+            print(f"[PLACEHOLDER ERROR] {e}")
+
+    thread = threading.Thread(target=run, name="placeholder-backfill", daemon=True)
+    thread.start()
+    return thread
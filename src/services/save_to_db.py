@@ -1,6 +1,21 @@
 from datetime import datetime
+from sqlalchemy import insert, select, update
 from ..backend.database_manager import get_session, Photo
 
+DEFAULT_BULK_BATCH_SIZE = 500
+
+# Cột được phép ghi khi bulk insert (id do DB cấp)
+_PHOTO_COLUMNS = [c.key for c in Photo.__table__.columns if c.key != "id"]
+
+# Giá trị mặc định cho cột không có trong record (Core insert cần đủ key cho executemany)
+_ROW_DEFAULTS = {
+    "rating": 0,
+    "tags": [],
+    "color_palette": [],
+    "is_deleted": False,
+    "is_favorite": False,
+}
+
 
 def save_photo(
     file_path,
@@ -13,22 +28,288 @@ def save_photo(
     folder_id=None,
 ):
     """
-    Lưu thông tin ảnh + EXIF vào MySQL ORM
+    Lưu thông tin ảnh + EXIF vào MySQL ORM (1 ảnh).
+    Import nhiều ảnh nên dùng save_photos_bulk / PhotoWriter.
+    """
+    ids = save_photos_bulk([{
+        "file_path": file_path,
+        "source": source,
+        "folder_id": folder_id,
+        "date_created": datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%S"),
+        "exif_iso": exif_iso,
+        "exif_focal_length": exif_focal_length,
+        "exif_aperture": exif_aperture,
+        "exif_shutter_speed": exif_shutter_speed,
+    }])
+    return ids[0] if ids else None
+
+
+def save_photos_bulk(records, batch_size=DEFAULT_BULK_BATCH_SIZE, session=None):
+    """
+    Insert nhiều ảnh theo batch (executemany, 1 commit mỗi batch).
+    records: list dict {tên cột Photo: giá trị}. Trả về list id theo đúng thứ tự records.
     """
-    session = get_session()
+    with PhotoWriter(batch_size=batch_size, session=session) as writer:
+        for record in records:
+            writer.add(record)
+    return writer.ids
+
+
+def update_photos_bulk(records, session=None):
+    """
+    Update nhiều ảnh theo primary key trong 1 lần executemany + 1 commit.
+    records: list dict có "id" + các cột cần đổi (key lạ bị bỏ qua).
+    """
+    if not records:
+        return 0
+
+    own_session = session is None
+    session = session if session is not None else get_session()
+    try:
+        # Executemany yêu cầu mọi row cùng tập key → nhóm theo tập cột
+        groups = {}
+        for record in records:
+            row = {k: v for k, v in record.items() if k == "id" or k in _PHOTO_COLUMNS}
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        for rows in groups.values():
+            session.execute(update(Photo), rows)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if own_session:
+            session.close()
+    return len(records)
+
+
+def find_hashes_by_partial(partial_hashes, session=None, chunk_size=1000):
+    """
+    1 lookup (theo index partial_hash) cho cả batch.
+    Trả về {partial_hash: [(content_hash | None, file_path), ...]} của các ảnh đã có trong DB.
+    """
+    partial_hashes = list(set(partial_hashes))
+    if not partial_hashes:
+        return {}
+
+    own_session = session is None
+    session = session if session is not None else get_session()
+    known = {}
+    try:
+        for i in range(0, len(partial_hashes), chunk_size):
+            rows = session.execute(
+                select(Photo.partial_hash, Photo.content_hash, Photo.file_path)
+                .where(Photo.partial_hash.in_(partial_hashes[i:i + chunk_size]))
+            )
+            for partial, content, file_path in rows:
+                known.setdefault(partial, []).append((content, file_path))
+    finally:
+        if own_session:
+            session.close()
+    return known
+
+
+def find_photos_by_paths(paths, folder_id=None, session=None, chunk_size=1000):
+    """
+    Ảnh (chưa xóa) theo file_path, lọc theo folder_id.
+    Trả về {file_path: (photo_id, content_hash)}.
+    """
+    paths = list(set(paths))
+    if not paths:
+        return {}
+
+    own_session = session is None
+    session = session if session is not None else get_session()
+    found = {}
+    try:
+        for i in range(0, len(paths), chunk_size):
+            rows = session.execute(
+                select(Photo.file_path, Photo.id, Photo.content_hash)
+                .where(Photo.file_path.in_(paths[i:i + chunk_size]))
+                .where(Photo.folder_id == folder_id if folder_id is not None else Photo.folder_id.is_(None))
+                .where(Photo.is_deleted.is_(False))
+            )
+            for file_path, photo_id, content_hash in rows:
+                found[file_path] = (photo_id, content_hash)
+    finally:
+        if own_session:
+            session.close()
+    return found
+
+
+def find_rows_by_paths(paths, folder_id=None, session=None, chunk_size=1000):
+    """
+    Ảnh theo file_path trong folder, kể cả ảnh đã vào Trash.
+    Trả về {file_path: (photo_id, is_deleted)}; nhiều row cùng path → ưu tiên row chưa xóa.
+    """
+    paths = list(set(paths))
+    if not paths:
+        return {}
+
+    own_session = session is None
+    session = session if session is not None else get_session()
+    found = {}
+    try:
+        for i in range(0, len(paths), chunk_size):
+            rows = session.execute(
+                select(Photo.file_path, Photo.id, Photo.is_deleted)
+                .where(Photo.file_path.in_(paths[i:i + chunk_size]))
+                .where(Photo.folder_id == folder_id if folder_id is not None else Photo.folder_id.is_(None))
+                .order_by(Photo.id)
+            )
+            for file_path, photo_id, is_deleted in rows:
+                if file_path not in found or found[file_path][1]:
+                    found[file_path] = (photo_id, bool(is_deleted))
+    finally:
+        if own_session:
+            session.close()
+    return found
 
-    photo = Photo(
-        file_path=file_path,
-        source=source,
-        folder_id=folder_id,
-        date_imported=datetime.now(),
-        date_created=datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%S"),
-        exif_iso=exif_iso,
-        exif_focal_length=exif_focal_length,
-        exif_aperture=exif_aperture,
-        exif_shutter_speed=exif_shutter_speed,
+
+def find_unhashed_by_paths(paths, session=None, chunk_size=1000):
+    """
+    Ảnh import trước khi có partial_hash (cột NULL) theo file_path, mọi folder.
+    Trả về {file_path: photo_id} → caller dedup theo path + tính bù partial_hash.
+    """
+    paths = list(set(paths))
+    if not paths:
+        return {}
+
+    own_session = session is None
+    session = session if session is not None else get_session()
+    found = {}
+    try:
+        for i in range(0, len(paths), chunk_size):
+            rows = session.execute(
+                select(Photo.file_path, Photo.id)
+                .where(Photo.file_path.in_(paths[i:i + chunk_size]))
+                .where(Photo.partial_hash.is_(None))
+            )
+            for file_path, photo_id in rows:
+                found[file_path] = photo_id
+    finally:
+        if own_session:
+            session.close()
+    return found
+
+
+class PhotoWriter:
+    """
+    Buffered writer cho bảng photos.
+    - add(record): gom record, tự flush khi đủ batch_size
+    - flush(): executemany INSERT + commit, trả về id mới
+    - before_flush(records): callback trước khi INSERT (vd ghi journal)
+    - on_flush(pairs): callback nhận [(photo_id, record), ...] sau mỗi batch
+      → các stage sau (thumbnail, palette...) dùng id này
+    - on_error(records, error): có callback → batch INSERT lỗi được rollback, báo qua callback
+      rồi import tiếp batch sau; không có → raise
+
+    Key không phải cột của Photo được bỏ qua khi insert,
+    nên record có thể mang thêm dữ liệu cho on_flush.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BULK_BATCH_SIZE, session=None, on_flush=None, before_flush=None,
+                 on_error=None):
+        self.batch_size = max(1, batch_size)
+        self.on_flush = on_flush
+        self.before_flush = before_flush
+        self.on_error = on_error
+        self.ids = []
+        self._buffer = []
+        self._own_session = session is None
+        self.session = session if session is not None else get_session()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+            else:
+                self.session.rollback()
+        finally:
+            if self._own_session:
+                self.session.close()
+        return False
+
+    def add(self, record: dict):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return []
+
+        records, self._buffer = self._buffer, []
+        if self.before_flush:
+            self.before_flush(records)
+        now = datetime.now()
+        rows = [_photo_row(r, now) for r in records]
+
+        try:
+            ids = _insert_rows(self.session, rows)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            if self.on_error is None:
+                raise
+            print(f"[DB ERROR] Batch insert failed ({len(records)} photos): {e}")
+            self.on_error(records, e)
+            return []
+
+        self.ids.extend(ids)
+        print(f"✅ Imported {len(ids)} photos (batch)")
+        if self.on_flush:
+            self.on_flush(list(zip(ids, records)))
+        return ids
+
+
+def _photo_row(record: dict, now: datetime) -> dict:
+    row = {}
+    for key in _PHOTO_COLUMNS:
+        if key in record:
+            row[key] = record[key]
+        elif key in ("date_created", "date_imported", "date_modified"):
+            row[key] = now
+        else:
+            row[key] = _ROW_DEFAULTS.get(key)
+    return row
+
+
+def _insert_rows(session, rows):
+    """
+    Executemany INSERT, trả về id theo thứ tự rows.
+    - DB hỗ trợ RETURNING cho executemany (SQLite, Postgres, MariaDB): lấy thẳng
+    - MySQL: không có RETURNING → 1 query SELECT theo file_path trong cùng transaction
+    """
+    dialect = session.get_bind().dialect
+    if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+        result = session.execute(
+            insert(Photo).returning(Photo.id, sort_by_parameter_order=True), rows
+        )
+        return list(result.scalars())
+
+    session.execute(insert(Photo), rows)
+
+    paths = [r["file_path"] for r in rows]
+    found = session.execute(
+        select(Photo.id, Photo.file_path)
+        .where(Photo.file_path.in_(set(paths)))
+        .order_by(Photo.id.desc())
     )
 
-    session.add(photo)
-    session.commit()
-    print(f"✅ Imported photo: {file_path}")
+    # Mỗi path lấy N id mới nhất (N = số lần xuất hiện trong batch), gán theo thứ tự tăng dần
+    wanted = {}
+    for path in paths:
+        wanted[path] = wanted.get(path, 0) + 1
+    newest = {}
+    for photo_id, path in found:
+        ids = newest.setdefault(path, [])
+        if len(ids) < wanted[path]:
+            ids.append(photo_id)
+    for ids in newest.values():
+        ids.reverse()
+
+    return [newest[path].pop(0) for path in paths]
@@ -0,0 +1,54 @@
+import threading
+
+from sqlalchemy import select
+from ..backend.database_manager import get_session, Photo
+from ..utils.config import get_setting
+from ..utils.thumbnail import get_store
+
+# Dọn kho thumbnail, chạy nền khi mở project:
+# - orphan: thumbnail của photo id không còn trong DB (xóa ngoài app, DB cũ...)
+# - quota:  tổng thumbnail vượt "thumbnail_quota_mb" → bỏ rendition lâu không xem (LRU)
+# - compact: trả dung lượng của phần đã bỏ về cho đĩa
+
+
+def collect_orphans(project_root: str = None) -> int:
+    """Xóa thumbnail của ảnh không còn trong DB (ảnh trong Trash vẫn giữ). Trả về số photo id đã dọn."""
+    store = get_store(project_root)
+    session = get_session()
+    try:
+        live = set(session.execute(select(Photo.id)).scalars())
+    finally:
+        session.close()
+    orphans = store.photo_ids() - live
+    store.delete(orphans)
+    return len(orphans)
+
+
+def enforce_quota(project_root: str = None, quota_mb: float = None) -> int:
+    """Giữ kho thumbnail trong quota (MB); vượt thì bỏ rendition ít xem nhất rồi compact."""
+    if quota_mb is None:
+        quota_mb = float(get_setting("thumbnail_quota_mb", project_root))
+    quota_bytes = int(quota_mb * 1024 * 1024)
+    store = get_store(project_root)
+    evicted = store.evict_lru(quota_bytes)
+    if store.stats()["total_bytes"] > quota_bytes:
+        store.compact()
+    return evicted
+
+
+def run_maintenance(project_root: str = None):
+    try:
+        orphans = collect_orphans(project_root)
+        evicted = enforce_quota(project_root)
+        get_store(project_root).maybe_compact()
+        if orphans or evicted:
+            print(f"[THUMB GC] Removed {orphans} orphaned photo(s), evicted {evicted} rendition(s) over quota")
+    except Exception as e:
+        print(f"[THUMB GC ERROR] {e}")
+
+
+def start_maintenance(project_root: str = None) -> threading.Thread:
+    """run_maintenance trên thread nền (không chặn GUI lúc mở project)."""
+    thread = threading.Thread(target=run_maintenance, args=(project_root,), name="thumb-gc", daemon=True)
+    thread.start()
+    return thread
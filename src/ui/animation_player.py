@@ -0,0 +1,132 @@
+import os
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QTimer, Signal, Qt
+from PySide6.QtGui import QMovie
+
+from .image_cache import ImageCache
+
+# Phát GIF động (hover card trong gallery, viewer) mà không bung hết frame lên RAM:
+# - QMovie ở CacheNone → decode tăng dần từng frame khi phát, không decode trước
+# - setScaledSize → frame được decode ở đúng cỡ hiển thị (ô 200x150 chỉ tốn vài trăm KB / frame)
+# - frame đã decode vào FrameCache dùng chung (LRU theo byte, giới hạn ANIMATION_CACHE_MB):
+#   vòng sau phát lại từ cache nếu đủ frame, thiếu (bị evict / GIF quá lớn) → stream lại bằng QMovie
+# - delay từng frame lưu theo GIF (dùng chung mọi player) → hover lại / mở lại phát thẳng từ cache
+
+ANIMATED_EXTENSIONS = {".gif"}
+ANIMATION_CACHE_MB = 64
+MAX_DELAY_ENTRIES = 1024  # số GIF (path, size, mtime, cỡ hiển thị) được nhớ delay từng frame
+
+_frame_cache = None
+_frame_delays = OrderedDict()  # key của GIF → {frame: delay ms}
+
+
+def get_frame_cache() -> ImageCache:
+    global _frame_cache
+    if _frame_cache is None:
+        _frame_cache = ImageCache(ANIMATION_CACHE_MB)
+    return _frame_cache
+
+
+def _delays_for(key) -> dict:
+    """Delay từng frame của 1 GIF (dict dùng chung giữa các player, LRU theo MAX_DELAY_ENTRIES)."""
+    delays = _frame_delays.get(key)
+    if delays is None:
+        delays = _frame_delays[key] = {}
+        while len(_frame_delays) > MAX_DELAY_ENTRIES:
+            _frame_delays.popitem(last=False)
+    else:
+        _frame_delays.move_to_end(key)
+    return delays
+
+
+def is_animated(path) -> bool:
+    return os.path.splitext(str(path))[1].lower() in ANIMATED_EXTENSIONS
+
+
+class AnimationPlayer(QObject):
+    """Phát 1 GIF; frame_ready(QImage) mỗi khi đến frame mới. File không stat được → is_valid() False."""
+    frame_ready = Signal(object)
+
+    def __init__(self, path, max_size=None, parent=None):
+        super().__init__(parent)
+        self.path = str(path)
+        self.movie = QMovie(self.path)
+        self.movie.setCacheMode(QMovie.CacheNone)
+        if max_size is not None:
+            self._fit(max_size)
+        self.movie.frameChanged.connect(self._on_frame)
+
+        scaled = self.movie.scaledSize()
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._key = None     # file bị di chuyển / ổ đã rút
+            self._delays = {}
+        else:
+            self._key = (self.path, st.st_size, st.st_mtime_ns, scaled.width(), scaled.height())
+            self._delays = _delays_for(self._key)  # frame → thời gian hiển thị (ms)
+        self._frame_count = self.movie.frameCount()
+        self._cached_frame = -1  # >= 0: đang phát từ cache
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._play_cached)
+
+    def _fit(self, max_size):
+        """Decode frame ở cỡ vừa khung max_size (giữ tỉ lệ), không phóng to."""
+        native = self.movie.currentImage().size()
+        if native.isEmpty():
+            self.movie.jumpToFrame(0)
+            native = self.movie.currentImage().size()
+        if native.isEmpty():
+            return
+        scaled = native.scaled(max_size, Qt.KeepAspectRatio)
+        if scaled.width() < native.width():
+            self.movie.setScaledSize(scaled)
+
+    def is_valid(self) -> bool:
+        return self._key is not None and self.movie.isValid()
+
+    def start(self):
+        if self._frame_count > 1 and self._all_cached():
+            self._cached_frame = 0
+            self._play_cached()
+        else:
+            self.movie.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._cached_frame = -1
+        self.movie.stop()
+
+    # ---------------------------------------------------------
+    def _on_frame(self, frame):
+        image = self.movie.currentImage()
+        self._delays[frame] = self.movie.nextFrameDelay()
+        get_frame_cache().put(self._key + (frame,), image)
+        self.frame_ready.emit(image)
+
+        # Hết 1 vòng và còn đủ frame trong cache → các vòng sau khỏi decode lại
+        if self._frame_count > 1 and frame == self._frame_count - 1 and self._all_cached():
+            self.movie.stop()
+            self._cached_frame = 0
+            self._timer.start(max(self._delays.get(frame, 100), 10))
+
+    def _play_cached(self):
+        frame = self._cached_frame
+        if frame < 0:
+            return
+        image = get_frame_cache().get(self._key + (frame,))
+        if image is None:
+            # Frame bị evict → quay lại stream bằng QMovie từ đầu
+            self._cached_frame = -1
+            self.movie.start()
+            return
+        self.frame_ready.emit(image)
+        self._cached_frame = (frame + 1) % self._frame_count
+        self._timer.start(max(self._delays.get(frame, 100), 10))
+
+    def _all_cached(self):
+        cache = get_frame_cache()
+        return len(self._delays) >= self._frame_count and all(
+            cache.peek(self._key + (i,)) is not None for i in range(self._frame_count)
+        )
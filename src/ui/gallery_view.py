@@ -1,58 +1,16 @@
 import os
 from PySide6.QtWidgets import (
-    QWidget, QLabel, QGridLayout, QScrollArea, QVBoxLayout,
+    QWidget, QLabel, QVBoxLayout, QStackedWidget,
     QFormLayout, QLineEdit, QPushButton, QMenu, QMessageBox, QHBoxLayout, QGraphicsView, QGraphicsScene, QPushButton, QFrame
 )
 from PySide6.QtGui import QPixmap, QAction, QPainter, QTransform
-from PySide6.QtCore import Signal, Qt
+from PySide6.QtCore import Qt
 from ..backend.database_manager import get_session, Photo, Folder
-from ..utils.thumbnail import get_thumbnail
-
-class PhotoCard(QWidget):
-    """Thẻ ảnh hiển thị thumbnail + tên file + click sự kiện."""
-    clicked = Signal(int)
-    double_clicked = Signal(int)
-
-    def __init__(self, photo_id, file_path, thumb_path, parent=None):
-        super().__init__(parent)
-        self.photo_id = photo_id
-        self.file_path = file_path
-        self.thumb_path = thumb_path
-        self.setFixedSize(220, 190)
-
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(2, 2, 2, 2)
-
-        # Thumbnail
-        self.label = QLabel()
-        self.label.setAlignment(Qt.AlignCenter)
-        self.label.setFixedSize(200, 150)
-
-        pix = QPixmap(self.thumb_path)
-        if not pix.isNull():
-            self.label.setPixmap(pix.scaled(200, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        layout.addWidget(self.label)
-
-        # File name
-        filename = os.path.basename(self.file_path)
-        self.info = QLabel(filename)
-        self.info.setAlignment(Qt.AlignCenter)
-        self.info.setStyleSheet("font-size: 11px; color: #555;")
-        layout.addWidget(self.info)
-
-        # Sự kiện click
-        self.label.mousePressEvent = self.mousePressEvent
-        self.label.mouseDoubleClickEvent = self.mouseDoubleClickEvent
-
-    def mousePressEvent(self, event):
-        """Click 1 lần: hiển thị thông tin ảnh."""
-        if event.button() == Qt.LeftButton:
-            self.clicked.emit(self.photo_id)
-
-    def mouseDoubleClickEvent(self, event):
-        """Click 2 lần: phóng to ảnh ngay trong gallery."""
-        if event.button() == Qt.LeftButton:
-            self.double_clicked.emit(self.photo_id)
+from ..utils.thumbnail import delete_thumbnails
+from .pixmap_loader import load_preview_pixmap, cached_thumbnail_image
+from .animation_player import AnimationPlayer, is_animated
+from .thumbnail_scheduler import ThumbnailScheduler, PRIORITY_VISIBLE, PRIORITY_NEXT, PRIORITY_IDLE
+from .photo_grid import PhotoListModel, PhotoGridView, CARD_THUMB_SIZE
 
 class ZoomGraphicsView(QGraphicsView):
     """GraphicsView hỗ trợ zoom và kéo ảnh."""
@@ -73,9 +31,17 @@ class GalleryView(QWidget):
         self.main_window = main_window
         self.session = session if session is not None else get_session()
 
-        self.photos = []
         self.current_folder_id = None
         self.full_image_label = None  # dùng để hiển thị ảnh full
+        self.full_frame = None
+        self.player = None            # AnimationPlayer của GIF đang xem full
+
+        # Thumbnail tải nền theo độ ưu tiên: đang thấy → màn kế tiếp → phần còn lại
+        self._prioritized = set() # photo id đang ở mức VISIBLE / NEXT
+        self._last_scroll = 0
+        self.thumbnails = ThumbnailScheduler(*CARD_THUMB_SIZE, parent=self)
+        self.thumbnails.thumbnail_ready.connect(self._on_thumbnail_ready)
+        self.thumbnails.placeholder_ready.connect(self._on_placeholder_ready)
 
         self._build_ui()
 
@@ -88,39 +54,112 @@ class GalleryView(QWidget):
         self.title_label.setStyleSheet("font-size: 20px; font-weight: 600; padding: 8px 0;")
         layout.addWidget(self.title_label)
 
-        self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        layout.addWidget(self.scroll, 1)
+        # Trang 0: lưới ảnh (model / view, chỉ vẽ ô đang thấy); trang 1: xem full ảnh
+        self.stack = QStackedWidget()
+        layout.addWidget(self.stack, 1)
 
-        self.inner = QWidget()
-        self.grid = QGridLayout(self.inner)
-        self.grid.setContentsMargins(10, 10, 10, 10)
-        self.grid.setSpacing(10)
-        self.scroll.setWidget(self.inner)
+        self.model = PhotoListModel(self)
+        self.grid_view = PhotoGridView()
+        self.grid_view.setModel(self.model)
+        self.grid_view.photo_clicked.connect(self._on_photo_clicked)
+        self.grid_view.photo_double_clicked.connect(self._on_photo_double_clicked)
+        self.grid_view.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        self.stack.addWidget(self.grid_view)
 
     def update_title(self, text: str):
         if hasattr(self, "title_label"):
             self.title_label.setText(text)
 
+    @property
+    def photos(self):
+        """[(photo_id, file_path)] theo thứ tự đang hiển thị."""
+        return self.model.photos()
+
     # ============================================================
     # LOAD / DISPLAY
     # ============================================================
     def load_photos(self, photos):
         """Load và hiển thị danh sách ảnh."""
-        for i in reversed(range(self.grid.count())):
-            item = self.grid.itemAt(i)
-            if item and item.widget():
-                item.widget().deleteLater()
+        self._stop_animation()
+        self.grid_view.stop_hover()
+        self.stack.setCurrentWidget(self.grid_view)
+        self.thumbnails.cancel_all()
+        self.thumbnails.set_dpr(self.devicePixelRatioF())
+        self._prioritized = set()
+        self.model.set_photos(photos)
+        self.grid_view.scrollToTop()
+
+        # Cả thư viện vào hàng đợi IDLE (ảnh đã có trong cache / kho trả về ngay ở bước nhanh),
+        # rồi nâng màn hình hiện tại + màn kế lên trước
+        self.thumbnails.schedule(self.model.photos(), PRIORITY_IDLE)
+        self._update_priorities()
+
+    def append_photos(self, photos):
+        """Thêm ảnh vào cuối lưới (dùng khi import chạy nền commit từng batch)."""
+        self.thumbnails.schedule(self.model.append_photos(photos), PRIORITY_IDLE)
+        self._update_priorities()
+
+    def shutdown(self):
+        """Đóng view (MainWindow.closeEvent): dừng animation + thread tải thumbnail."""
+        self._stop_animation()
+        self.grid_view.stop_hover()
+        self.thumbnails.stop()
+
+    def closeEvent(self, event):
+        self.shutdown()
+        super().closeEvent(event)
+
+    # ============================================================
+    # THUMBNAIL PRIORITY
+    # ============================================================
+    def _on_thumbnail_ready(self, photo_id, image):
+        # Chỉ giữ pixmap cho ô đang / sắp thấy; ảnh tải lúc rảnh đã nằm trong image_cache
+        if photo_id in self._prioritized:
+            self.model.set_thumbnail(photo_id, image)
+            self._prioritized.discard(photo_id)
+
+    def _on_placeholder_ready(self, photo_id, image):
+        if photo_id in self._prioritized:
+            self.model.set_placeholder(photo_id, image)
+
+    def _on_scrolled(self, value):
+        direction = 1 if value >= self._last_scroll else -1
+        self._last_scroll = value
+        self._update_priorities(direction)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_priorities()
+
+    def _update_priorities(self, direction=1):
+        """Ô đang thấy → VISIBLE, màn kế tiếp theo hướng cuộn → NEXT, ô vừa rời màn hình → IDLE."""
+        if not self.model.rowCount():
+            return
+        first, end = self.grid_view.visible_range()
+        count = end - first
+        if direction > 0:
+            next_first, next_end = end, end + count
+        else:
+            next_first, next_end = max(0, first - count), first
 
-        self.photos = [(p.id, p.file_path) for p in photos]
+        def missing(start, stop):
+            items = self.model.photos(start, stop) if stop > start else []
+            return [(pid, path) for pid, path in items if not self.model.has_thumbnail(pid)]
 
-        for idx, (photo_id, file_path) in enumerate(self.photos):
-            thumb_path = get_thumbnail(photo_id, file_path)
-            card = PhotoCard(photo_id, file_path, thumb_path, parent=self.inner)
-            card.clicked.connect(self._on_photo_clicked)
-            card.double_clicked.connect(self._on_photo_double_clicked)
-            row, col = divmod(idx, 4)
-            self.grid.addWidget(card, row, col)
+        # Đã decode trước đó (đổi view, cuộn lại) → gán ngay từ cache, khỏi xếp hàng
+        for pid, path in missing(first, end):
+            image = cached_thumbnail_image(pid, path, *CARD_THUMB_SIZE, self.thumbnails.dpr)
+            if image is not None:
+                self.model.set_thumbnail(pid, image)
+
+        visible = missing(first, end)
+        upcoming = missing(next_first, next_end)
+        wanted = {pid for pid, _ in visible} | {pid for pid, _ in upcoming}
+
+        self.thumbnails.demote(self._prioritized - wanted)
+        self.thumbnails.schedule(upcoming, PRIORITY_NEXT)
+        self.thumbnails.schedule(visible, PRIORITY_VISIBLE)
+        self._prioritized = wanted
 
     def _on_photo_clicked(self, photo_id):
         """Click 1 lần hiển thị info panel."""
@@ -135,25 +174,24 @@ class GalleryView(QWidget):
             QMessageBox.warning(self, "Error", "Photo file not found.")
             return
 
-        # Ẩn lưới ảnh hiện tại
-        for i in reversed(range(self.grid.count())):
-            item = self.grid.itemAt(i)
-            if item and item.widget():
-                item.widget().hide()
+        self._stop_animation()
+        self.grid_view.stop_hover()
 
         # Tạo frame để hiển thị full ảnh + toolbar
-        self.full_frame = QFrame()
-        vbox = QVBoxLayout(self.full_frame)
+        frame = QFrame()
+        vbox = QVBoxLayout(frame)
         vbox.setContentsMargins(0, 0, 0, 0)
 
         # GraphicsView hiển thị ảnh
         self.scene = QGraphicsScene(self)
         self.view = ZoomGraphicsView()
         self.view.setScene(self.scene)
-        pix = QPixmap(photo.file_path)
+        pix = load_preview_pixmap(photo.id, photo.file_path)
         self.image_item = self.scene.addPixmap(pix)
         self.scene.setSceneRect(pix.rect())
         self.view.fitInView(self.image_item, Qt.KeepAspectRatio)
+        if is_animated(photo.file_path):
+            self._start_animation(photo.file_path, pix.size())
         vbox.addWidget(self.view, 1)
 
         # Toolbar điều khiển
@@ -180,16 +218,43 @@ class GalleryView(QWidget):
         btn_fit.clicked.connect(self._fit_image)
         btn_back.clicked.connect(self._restore_grid_view)
 
-        # Gắn vào layout
-        self.grid.addWidget(self.full_frame, 0, 0)
+        # Thay trang xem full cũ (Prev / Next), lưới ảnh vẫn giữ nguyên ở trang 0
+        if self.full_frame is not None:
+            self.stack.removeWidget(self.full_frame)
+            self.full_frame.deleteLater()
+        self.full_frame = frame
+        self.stack.addWidget(frame)
+        self.stack.setCurrentWidget(frame)
+
+    def _start_animation(self, path, size):
+        """GIF ở chế độ xem full: frame đầu (preview) hiện ngay, sau đó phát ở cỡ preview."""
+        player = AnimationPlayer(path, size, self)
+        if not player.is_valid():
+            player.deleteLater()
+            return
+        item = self.image_item
+        player.frame_ready.connect(lambda image: item.setPixmap(QPixmap.fromImage(image)))
+        self.player = player
+        player.start()
 
+    def _stop_animation(self):
+        if self.player is not None:
+            self.player.stop()
+            self.player.deleteLater()
+            self.player = None
 
     def _restore_grid_view(self):
         """Quay lại chế độ hiển thị lưới."""
+        self._stop_animation()
         if self.full_image_label:
             self.full_image_label.deleteLater()
             self.full_image_label = None
-        self.load_photos([self.session.get(Photo, pid) for pid, _ in self.photos if self.session.get(Photo, pid)])
+        if self.full_frame is not None:
+            self.stack.removeWidget(self.full_frame)
+            self.full_frame.deleteLater()
+            self.full_frame = None
+        self.stack.setCurrentWidget(self.grid_view)
+        self._update_priorities()
 
     # ============================================================
     # CONTEXT MENU / DATABASE
@@ -218,15 +283,13 @@ class GalleryView(QWidget):
         menu.exec(event.globalPos())
 
     def _hit_test(self, pos):
-        inner_pos = self.inner.mapFrom(self, pos)
-        widget = self.inner.childAt(inner_pos)
-        if not widget:
+        if self.stack.currentWidget() is not self.grid_view:
+            return None
+        viewport = self.grid_view.viewport()
+        viewport_pos = viewport.mapFrom(self, pos)
+        if not viewport.rect().contains(viewport_pos):
             return None
-        if isinstance(widget, QLabel) and hasattr(widget.parent(), "photo_id"):
-            widget = widget.parent()
-        if isinstance(widget, PhotoCard):
-            return widget.photo_id
-        return None
+        return self.grid_view.photo_id_at(viewport_pos)
 
     # ============================================================
     # DB ACTIONS (giữ nguyên từ bạn)
@@ -278,6 +341,7 @@ class GalleryView(QWidget):
                 return
             self.session.delete(photo)
             self.session.commit()
+            delete_thumbnails([photo_id])
             QMessageBox.information(self, "Deleted", "Photo deleted permanently.")
             self.reload_current_view()
         except Exception as e:
@@ -290,8 +354,8 @@ class GalleryView(QWidget):
             mw.show_trash()
         elif mw.current_view == "favorites":
             mw.show_favorites()
-        elif mw.current_view == "folder" and hasattr(mw, "show_folder_id"):
-            mw.show_folder(mw.show_folder_id)
+        elif mw.current_view == "folder" and mw.current_folder_id is not None:
+            mw.show_folder(mw.current_folder_id)
         else:
             mw.show_all()
 
@@ -0,0 +1,21 @@
+from PySide6.QtGui import QImage
+
+# Pillow → Qt không qua file / JPEG trung gian:
+# ảnh Pillow được xuất ra 1 buffer RGBX / RGBA (1 lần chép, 4 byte / pixel → scanline luôn align),
+# QImage chỉ là view trỏ vào buffer đó (không chép thêm). Buffer được giữ trên chính QImage
+# → sống cùng QImage; QPixmap.fromImage / scaled() tạo bản riêng của Qt.
+
+_FORMATS = {
+    "RGB": ("RGBX", QImage.Format_RGBX8888),
+    "RGBA": ("RGBA", QImage.Format_RGBA8888),
+}
+
+
+def qimage_from_pil(img) -> QImage:
+    if img.mode not in _FORMATS:
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    raw_mode, fmt = _FORMATS[img.mode]
+    buffer = img.tobytes("raw", raw_mode)
+    image = QImage(buffer, img.width, img.height, img.width * 4, fmt)
+    image._buffer = buffer  # QImage không sở hữu dữ liệu → giữ buffer sống cùng QImage
+    return image
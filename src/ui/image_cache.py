@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+
+from ..utils.config import get_setting, DEFAULTS
+
+# Cache ảnh đã decode (QImage) dùng chung cả process: lưới gallery, full view, viewer.
+# - key: (photo_id, rendition, version, dpr) → version đổi (ảnh gốc đổi) thì tự miss
+# - giới hạn theo tổng byte (QImage.sizeInBytes), vượt budget → bỏ entry lâu chưa dùng nhất (LRU)
+# - QImage dùng được ở thread nền → worker của ThumbnailScheduler ghi thẳng vào cache
+
+
+class ImageCache:
+    def __init__(self, budget_mb: float):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._items = OrderedDict()  # key → (QImage, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def peek(self, key):
+        """Như get() nhưng không tính hit / miss (kiểm tra trước khi xếp hàng tải nền)."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key, image):
+        size = image.sizeInBytes()
+        if size > self.budget_bytes:
+            return  # ảnh lớn hơn cả budget → không cache
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (image, size)
+            self._bytes += size
+            self._evict()
+
+    def set_budget(self, budget_mb: float):
+        with self._lock:
+            self.budget_bytes = int(budget_mb * 1024 * 1024)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "count": len(self._items),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def _evict(self):
+        while self._bytes > self.budget_bytes and self._items:
+            _, (_, size) = self._items.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Cache dùng chung; budget lấy từ setting "image_cache_mb" của project lúc tạo."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                budget = float(get_setting("image_cache_mb"))
+            except Exception:
+                budget = DEFAULTS["image_cache_mb"]  # chưa mở project
+            _cache = ImageCache(budget)
+        return _cache
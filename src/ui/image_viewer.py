@@ -8,6 +8,8 @@ from PySide6.QtGui import QPixmap, QPainter, QTransform
 from PySide6.QtCore import Qt, QRectF
 from ..backend.database_manager import get_session, Photo
 from .inspector_panel import InspectorPanel
+from .pixmap_loader import load_preview_pixmap
+from .animation_player import AnimationPlayer, is_animated
 
 
 class ZoomGraphicsView(QGraphicsView):
@@ -35,6 +37,7 @@ class ImageViewer(QDialog):
         self.setWindowTitle("Ref Viewer")
 
         self.session = get_session()
+        self.player = None  # AnimationPlayer của GIF đang xem
         self.view = ZoomGraphicsView()
         self.scene = QGraphicsScene(self)
         self.view.setScene(self.scene)
@@ -100,6 +103,7 @@ class ImageViewer(QDialog):
     # --------------------------------------------------------
     def load_current(self):
         photo_id, path = self.photos[self.index]
+        self._stop_animation()
         self.scene.clear()
 
         # ✅ Kiểm tra file tồn tại trước khi mở
@@ -107,7 +111,7 @@ class ImageViewer(QDialog):
             QMessageBox.warning(self, "Missing File", f"File not found:\n{path}")
             return
 
-        pix = QPixmap(path)
+        pix = load_preview_pixmap(photo_id, path)
         if pix.isNull():
             QMessageBox.warning(self, "Invalid Image", f"Cannot open image:\n{path}")
             return
@@ -115,6 +119,8 @@ class ImageViewer(QDialog):
         item = self.scene.addPixmap(pix)
         self.scene.setSceneRect(QRectF(pix.rect()))
         self.view.fitInView(item, Qt.KeepAspectRatio)
+        if is_animated(path):
+            self._start_animation(item, path, pix.size())
         self.setWindowTitle(f"Ref Viewer ({self.index + 1}/{len(self.photos)})")
 
         # Reload metadata
@@ -122,6 +128,25 @@ class ImageViewer(QDialog):
         self.inspector.meta = self.meta
         self.inspector.load_data()
 
+    def _start_animation(self, item, path, size):
+        """GIF: frame đầu (preview) hiện ngay, sau đó phát ở đúng cỡ đang hiển thị."""
+        player = AnimationPlayer(path, size, self)
+        if not player.is_valid():
+            player.deleteLater()
+            return
+        player.frame_ready.connect(lambda image: item.setPixmap(QPixmap.fromImage(image)))
+        self.player = player
+        player.start()
+
+    def _stop_animation(self):
+        if self.player is not None:
+            self.player.stop()
+            self.player.deleteLater()
+            self.player = None
+
+    def closeEvent(self, event):
+        self._stop_animation()
+        super().closeEvent(event)
 
     # --------------------------------------------------------
     # ORM METADATA HANDLING
@@ -0,0 +1,101 @@
+import time
+import threading
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from ..services.import_service import import_originals
+from ..services.archive_import import import_archive, is_archive
+from ..services.lightroom_import import import_lightroom_catalog, is_lightroom_catalog
+
+
+class ImportSignals(QObject):
+    """Signal của ImportWorker (QRunnable không tự có signal)."""
+    # stage, done, total, files/s, eta (giây, -1 = chưa biết)
+    progress = Signal(str, int, int, float, float)
+    batch_committed = Signal(list)   # photo ids vừa commit
+    finished = Signal(object)        # stats dict
+    failed = Signal(str)
+
+
+class ImportWorker(QRunnable):
+    """
+    Chạy import_originals trên QThreadPool để GUI không bị đơ.
+    File ZIP / TAR trong danh sách được import trực tiếp từ archive (import_archive),
+    catalog Lightroom (.lrcat) qua import_lightroom_catalog.
+    Progress / batch / kết quả được gửi về GUI thread qua signals.
+    """
+
+    PROGRESS_INTERVAL = 0.1  # giây, tránh spam signal mỗi file
+
+    def __init__(self, files, folder_id=None, storage_mode=None, batch_size=50):
+        super().__init__()
+        self.files = list(files)
+        self.folder_id = folder_id
+        self.storage_mode = storage_mode
+        self.batch_size = batch_size
+        self.signals = ImportSignals()
+        self._cancel = threading.Event()
+        self._stage = None
+        self._stage_started = 0.0
+        self._last_emit = 0.0
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        archives = [f for f in self.files if is_archive(f)]
+        catalogs = [f for f in self.files if is_lightroom_catalog(f)]
+        files = [f for f in self.files if f not in archives and f not in catalogs]
+        options = {
+            "folder_id": self.folder_id,
+            "batch_size": self.batch_size,
+            "progress": self._on_progress,
+            "on_batch": self.signals.batch_committed.emit,
+            "cancel": self._cancel,
+        }
+        try:
+            stats = import_originals(files, storage_mode=self.storage_mode, **options) if files else None
+            for archive in archives:
+                if self.cancelled:
+                    break
+                stats = _merge_stats(stats, import_archive(archive, **options))
+            for catalog in catalogs:
+                if self.cancelled:
+                    break
+                stats = _merge_stats(stats, import_lightroom_catalog(
+                    catalog, progress=self._on_progress,
+                    on_batch=self.signals.batch_committed.emit, cancel=self._cancel,
+                ))
+        except Exception as e:
+            print(f"[IMPORT ERROR] {e}")
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(stats or {"imported": 0, "cancelled": self.cancelled})
+
+    def _on_progress(self, stage, done, total):
+        now = time.perf_counter()
+        if stage != self._stage:
+            self._stage = stage
+            self._stage_started = now
+        elif done < total and now - self._last_emit < self.PROGRESS_INTERVAL:
+            return
+        self._last_emit = now
+
+        elapsed = now - self._stage_started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else -1.0
+        self.signals.progress.emit(stage, done, total, rate, eta)
+
+
+def _merge_stats(total, stats):
+    """Gộp stats của nhiều lần import (file lẻ + từng archive) để báo cáo 1 lần."""
+    if total is None:
+        return stats
+    for key in ("imported", "updated", "duplicates", "skipped", "failed", "folders_created", "elapsed"):
+        total[key] = total.get(key, 0) + stats.get(key, 0)
+    total["photo_ids"] = total.get("photo_ids", []) + stats.get("photo_ids", [])
+    total["cancelled"] = total.get("cancelled") or stats.get("cancelled")
+    return total
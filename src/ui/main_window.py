@@ -1,16 +1,35 @@
 from datetime import datetime
 from pathlib import Path
-import shutil
 from PySide6.QtWidgets import (
     QWidget, QMainWindow, QVBoxLayout, QHBoxLayout,
-    QPushButton, QFileDialog, QMessageBox, QLabel
+    QPushButton, QFileDialog, QMessageBox, QLabel, QProgressBar, QComboBox
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QObject, Signal, QThreadPool
 from ..backend.database_manager import get_session, Folder, Photo
 from .sidebar import Sidebar
 from .gallery_view import GalleryView
 from .photo_info_panel import PhotoInfoPanel
 from ..backend.project_manager import get_current_project_path
+from ..services.import_service import watch_folder
+from .import_worker import ImportWorker
+from ..backend.content_store import STORAGE_MODES
+from ..utils.config import get_setting, set_setting
+from ..utils.raw_preview import RAW_EXTENSIONS
+from ..services.archive_import import ARCHIVE_EXTENSIONS
+from ..services.lightroom_import import LRCAT_EXTENSION
+from ..services.thumbnail_maintenance import start_maintenance
+from ..services.placeholder_backfill import start_backfill
+
+IMAGE_FILE_FILTER = "Images (*.png *.jpg *.jpeg *.bmp *.webp {});;Archives ({});;Lightroom catalogs (*{})".format(
+    " ".join(f"*{ext}" for ext in sorted(RAW_EXTENSIONS)),
+    " ".join(f"*{ext}" for ext in ARCHIVE_EXTENSIONS),
+    LRCAT_EXTENSION,
+)
+
+
+class _WatchBridge(QObject):
+    """Chuyển kết quả từ thread watch-folder về GUI thread."""
+    batch_imported = Signal(object)
 
 
 class MainWindow(QMainWindow):
@@ -26,8 +45,24 @@ class MainWindow(QMainWindow):
         self.current_folder_id = None
         self.current_view = "all"  # 🟢 Trạng thái mặc định
 
+        # 👀 Watch-folder: {folder_id: FolderWatcher}
+        self.watchers = {}
+        self._watch_bridge = _WatchBridge()
+        self._watch_bridge.batch_imported.connect(self._on_watch_batch)
+
+        # 📥 Import chạy nền (QThreadPool riêng → đóng app chờ đúng job import), mỗi lần chỉ 1 job
+        self.import_worker = None
+        self.import_pool = QThreadPool(self)
+        self.import_pool.setMaxThreadCount(1)
+
         # Build layout
         self._build_gallery_ui()
+        self._start_folder_watchers()
+
+        # 🧹 Dọn thumbnail mồ côi + giữ kho thumbnail trong quota (chạy nền)
+        start_maintenance()
+        # 🟦 Placeholder (micro-JPEG + màu chủ đạo) cho ảnh import từ trước
+        start_backfill()
 
     # ------------------------------------------------------------
     # BUILD UI
@@ -56,6 +91,31 @@ class MainWindow(QMainWindow):
 
         toolbar_layout.addStretch()
 
+        # 📥 Tiến trình import (ẩn khi không import)
+        self.import_status = QLabel()
+        self.import_status.setStyleSheet("font-size: 12px; color: #555;")
+        self.import_progress = QProgressBar()
+        self.import_progress.setFixedWidth(180)
+        self.import_progress.setTextVisible(False)
+        self.btn_cancel_import = QPushButton("✖ Cancel")
+        self.btn_cancel_import.setFixedHeight(28)
+        self.btn_cancel_import.clicked.connect(self.cancel_import)
+        for w in (self.import_status, self.import_progress, self.btn_cancel_import):
+            w.hide()
+            toolbar_layout.addWidget(w, alignment=Qt.AlignRight)
+
+        # 💾 Storage mode khi thêm ảnh (copy / reflink / hardlink / reference)
+        self.cmb_storage = QComboBox()
+        self.cmb_storage.setToolTip("How imported originals are stored in the project")
+        for mode in STORAGE_MODES:
+            self.cmb_storage.addItem(mode.capitalize(), mode)
+        current_mode = get_setting("storage_mode")
+        self.cmb_storage.setCurrentIndex(max(0, self.cmb_storage.findData(current_mode)))
+        self.cmb_storage.currentIndexChanged.connect(
+            lambda i: set_setting("storage_mode", self.cmb_storage.itemData(i))
+        )
+        toolbar_layout.addWidget(self.cmb_storage, alignment=Qt.AlignRight)
+
         # Nút thêm ảnh
         btn_add_photo = QPushButton("+ Add Photo")
         btn_add_photo.setFixedHeight(32)
@@ -97,32 +157,13 @@ class MainWindow(QMainWindow):
     def add_photo_to_folder(self):
         """Chọn ảnh từ file dialog và thêm vào thư mục hiện tại hoặc All."""
         files, _ = QFileDialog.getOpenFileNames(
-            self, "Select photos to import", "", "Images (*.png *.jpg *.jpeg *.bmp *.webp)"
+            self, "Select photos to import", "", IMAGE_FILE_FILTER
         )
         if not files:
             return
 
-        project_dir = Path(get_current_project_path())
-        import_count = 0
-
-        for file_path in files:
-            dest_folder = project_dir / "photos"
-            dest_folder.mkdir(parents=True, exist_ok=True)
-            dest_path = dest_folder / Path(file_path).name
-
-            # Sao chép ảnh nếu chưa tồn tại
-            if not dest_path.exists():
-                shutil.copy(file_path, dest_path)
-
-            photo = Photo(file_path=str(dest_path))
-            if self.current_folder_id:
-                photo.folder_id = self.current_folder_id
-            self.session.add(photo)
-            import_count += 1
-
-        self.session.commit()
-        QMessageBox.information(self, "Import completed", f"✅ Imported {import_count} photos successfully.")
-        self.refresh_gallery()
+        # Bản gốc được đưa vào project theo storage mode đang chọn, ảnh trùng bị bỏ qua
+        self._start_import(files, folder_id=self.current_folder_id)
 
     def import_photos(self, folder_id: int):
         """Import ảnh vào folder được chọn."""
@@ -136,23 +177,98 @@ class MainWindow(QMainWindow):
             self,
             "Select photos to import",
             "",
-            "Images (*.png *.jpg *.jpeg *.bmp *.webp)"
+            IMAGE_FILE_FILTER
         )
         if not files:
             return
 
-        imported = 0
-        for f in files:
-            if not session.query(Photo).filter_by(file_path=f).first():
-                photo = Photo(file_path=f, folder_id=folder_id)
-                session.add(photo)
-                imported += 1
+        # Mở folder trước, ảnh mới được thêm dần vào gallery khi từng batch commit
+        self.show_folder(folder_id)
 
-        session.commit()
-        QMessageBox.information(self, "Import Completed", f"✅ Imported {imported} photo(s).")
+        # Giữ file tại chỗ, dedup theo content hash (1 lookup cho cả batch)
+        self._start_import(files, folder_id=folder_id, storage_mode="reference")
 
-        # Sau khi import, load lại gallery
-        self.show_folder(folder_id)
+    # ------------------------------------------------------------
+    # BACKGROUND IMPORT
+    # ------------------------------------------------------------
+    def _start_import(self, files, folder_id=None, storage_mode=None):
+        """Chạy import trên QThreadPool, GUI vẫn dùng được trong lúc import."""
+        if self.import_worker is not None:
+            QMessageBox.warning(self, "Import", "An import is already running.")
+            return
+
+        worker = ImportWorker(files, folder_id=folder_id, storage_mode=storage_mode)
+        worker.signals.progress.connect(self._on_import_progress)
+        worker.signals.batch_committed.connect(self._on_import_batch)
+        worker.signals.finished.connect(self._on_import_finished)
+        worker.signals.failed.connect(self._on_import_failed)
+        self.import_worker = worker
+
+        self.import_progress.setRange(0, len(files))
+        self.import_progress.setValue(0)
+        self.import_status.setText(f"Preparing {len(files)} file(s)…")
+        self.btn_cancel_import.setEnabled(True)
+        for w in (self.import_status, self.import_progress, self.btn_cancel_import):
+            w.show()
+
+        self.import_pool.start(worker)
+
+    def cancel_import(self):
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+            self.btn_cancel_import.setEnabled(False)
+            self.import_status.setText("Cancelling…")
+
+    def _on_import_progress(self, stage, done, total, rate, eta):
+        labels = {
+            "copy": "Copying", "reflink": "Cloning", "hardlink": "Linking",
+            "reference": "Indexing", "import": "Importing", "archive": "Unpacking",
+            "lightroom": "Reading catalog",
+        }
+        if total <= 0:
+            # TAR stream: không biết trước số file → progress bar dạng "busy"
+            self.import_progress.setRange(0, 0)
+            self.import_status.setText(f"{labels.get(stage, stage)} {done} · {rate:.1f} files/s")
+            return
+        self.import_progress.setRange(0, total)
+        self.import_progress.setValue(done)
+        eta_txt = f"{int(eta // 60)}:{int(eta % 60):02d}" if eta >= 0 else "--:--"
+        self.import_status.setText(
+            f"{labels.get(stage, stage)} {done}/{total} · {rate:.1f} files/s · ETA {eta_txt}"
+        )
+
+    def _on_import_batch(self, photo_ids):
+        """1 batch vừa commit → thêm ảnh vào gallery (không reload toàn bộ)."""
+        query = self.session.query(Photo).filter(Photo.id.in_(photo_ids), Photo.is_deleted == False)
+        if self.current_view == "folder":
+            query = query.filter(Photo.folder_id == self.current_folder_id)
+        elif self.current_view != "all":
+            return  # Favorites / Trash: ảnh mới không thuộc các view này
+        self.gallery.append_photos(query.order_by(Photo.id).all())
+
+    def _on_import_finished(self, stats):
+        self._end_import()
+        if stats.get("folders_created"):
+            self.sidebar.refresh_folders()  # catalog Lightroom tạo Folder mới
+        title = "Import cancelled" if stats.get("cancelled") else "Import completed"
+        QMessageBox.information(self, title, self._import_summary(stats))
+
+    def _on_import_failed(self, message):
+        self._end_import()
+        QMessageBox.critical(self, "Import failed", f"❌ {message}")
+
+    def _end_import(self):
+        self.import_worker = None
+        for w in (self.import_status, self.import_progress, self.btn_cancel_import):
+            w.hide()
+
+    def _import_summary(self, stats):
+        text = f"✅ Imported {stats['imported']} photo(s)."
+        if stats.get("duplicates"):
+            text += f"\n⏭ Skipped {stats['duplicates']} duplicate(s)."
+        if stats.get("skipped"):
+            text += f"\n⏭ Skipped {stats['skipped']} photo(s) already in the library."
+        return text
 
     # ------------------------------------------------------------
     # GALLERY VIEW
@@ -240,6 +356,51 @@ class MainWindow(QMainWindow):
         self.session.commit()
         self.sidebar.refresh_folders()
 
+    # ------------------------------------------------------------
+    # WATCH FOLDER
+    # ------------------------------------------------------------
+    def _start_folder_watchers(self):
+        """Bật lại watcher cho các folder đã bật watch."""
+        for folder in self.session.query(Folder).filter(Folder.watch_enabled == True).all():
+            self._start_watcher(folder)
+
+    def _start_watcher(self, folder):
+        if folder.id in self.watchers or not Path(folder.path).is_dir():
+            return
+        watcher = watch_folder(folder.id, folder.path, on_batch=self._watch_bridge.batch_imported.emit)
+        watcher.start()
+        self.watchers[folder.id] = watcher
+
+    def set_folder_watch(self, folder_id: int, enabled: bool):
+        """Bật / tắt watch-folder cho 1 folder."""
+        folder = self.session.get(Folder, folder_id)
+        if folder:
+            folder.watch_enabled = enabled
+            self.session.commit()
+
+        if enabled and folder:
+            self._start_watcher(folder)
+        elif folder_id in self.watchers:
+            self.watchers.pop(folder_id).stop()
+
+    def _on_watch_batch(self, stats):
+        """1 batch watch-folder đã commit → reload gallery 1 lần."""
+        if stats.get("imported") or stats.get("updated"):
+            self.refresh_gallery()
+
+    def closeEvent(self, event):
+        if self.import_worker is not None:
+            # Import dừng sau batch đang ghi (batch đã commit được giữ) → chờ xong rồi mới đóng
+            self.import_worker.cancel()
+            self.import_worker.signals.blockSignals(True)  # không gửi kết quả về cửa sổ đang đóng
+            self.import_pool.waitForDone()
+            self.import_worker = None
+        for watcher in self.watchers.values():
+            watcher.stop()
+        self.watchers.clear()
+        self.gallery.shutdown()
+        super().closeEvent(event)
+
     # ------------------------------------------------------------
     # UTILS
     # ------------------------------------------------------------
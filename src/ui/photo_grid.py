@@ -0,0 +1,291 @@
+import os
+from collections import OrderedDict
+from PySide6.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView
+from PySide6.QtGui import QPixmap, QImage, QColor, QPainter, QFont
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize, Signal
+
+from .animation_player import AnimationPlayer, is_animated
+
+# Lưới ảnh ảo hóa (model / view) thay cho 1 PhotoCard QWidget / ảnh:
+# - PhotoListModel: mỗi ảnh chỉ là 1 tuple (id, path, placeholder, màu) → 20k ảnh vẫn nhẹ
+# - PhotoDelegate:  vẽ ô (thumbnail / placeholder + tên file), chỉ ô đang thấy được vẽ
+# - pixmap giữ trong model có giới hạn (LRU), phần còn lại nằm ở image_cache (QImage)
+#   → bộ nhớ không tăng theo số ảnh; ô bị bỏ pixmap sẽ được scheduler nạp lại khi cuộn tới
+
+CARD_SIZE = (220, 190)
+CARD_THUMB_SIZE = (200, 150)  # ô ảnh (logical px) = rendition "grid"
+CARD_MARGIN = 2
+GRID_SPACING = 10
+
+THUMB_PIXMAPS = 256        # số thumbnail (QPixmap) tối đa giữ trong model
+PLACEHOLDER_PIXMAPS = 1024  # placeholder nhỏ (24px / EXIF) đã decode
+
+PHOTO_ID_ROLE = Qt.UserRole
+PATH_ROLE = Qt.UserRole + 1
+HAS_THUMBNAIL_ROLE = Qt.UserRole + 2
+
+
+class PhotoListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []          # (photo_id, file_path, placeholder bytes, dominant color)
+        self._row_of = {}        # photo_id → row
+        self._thumbs = OrderedDict()        # photo_id → QPixmap thumbnail thật
+        self._placeholders = OrderedDict()  # photo_id → QPixmap ảnh tạm
+        self._frame = None       # (photo_id, QPixmap): frame GIF đang phát khi hover
+
+    # ---------------------------------------------------------
+    # DỮ LIỆU
+    # ---------------------------------------------------------
+    def set_photos(self, photos):
+        self.beginResetModel()
+        self._rows = [(p.id, p.file_path, p.placeholder, p.dominant_color) for p in photos]
+        self._row_of = {row[0]: i for i, row in enumerate(self._rows)}
+        self._thumbs.clear()
+        self._placeholders.clear()
+        self._frame = None
+        self.endResetModel()
+
+    def append_photos(self, photos):
+        """Thêm ảnh chưa có vào cuối → [(photo_id, file_path)] vừa thêm."""
+        new = [(p.id, p.file_path, p.placeholder, p.dominant_color) for p in photos if p.id not in self._row_of]
+        if not new:
+            return []
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(new) - 1)
+        for i, row in enumerate(new, start):
+            self._rows.append(row)
+            self._row_of[row[0]] = i
+        self.endInsertRows()
+        return [(row[0], row[1]) for row in new]
+
+    def photos(self, start=0, stop=None):
+        """[(photo_id, file_path)] của các hàng start..stop (mặc định: tất cả)."""
+        return [(row[0], row[1]) for row in self._rows[start:stop]]
+
+    def has_thumbnail(self, photo_id) -> bool:
+        return photo_id in self._thumbs
+
+    # ---------------------------------------------------------
+    # ẢNH (GUI thread)
+    # ---------------------------------------------------------
+    def set_thumbnail(self, photo_id, image):
+        if photo_id not in self._row_of:
+            return
+        self._thumbs[photo_id] = _pixmap(image)
+        self._thumbs.move_to_end(photo_id)
+        self._placeholders.pop(photo_id, None)
+        while len(self._thumbs) > THUMB_PIXMAPS:
+            self._thumbs.popitem(last=False)
+        self._changed(photo_id)
+
+    def set_placeholder(self, photo_id, image):
+        if photo_id not in self._row_of or photo_id in self._thumbs:
+            return
+        self._remember_placeholder(photo_id, _pixmap(image))
+        self._changed(photo_id)
+
+    def set_frame(self, photo_id, pixmap):
+        """Frame GIF khi hover (pixmap=None → về lại thumbnail)."""
+        self._frame = (photo_id, pixmap) if pixmap is not None else None
+        self._changed(photo_id)
+
+    def _remember_placeholder(self, photo_id, pixmap):
+        self._placeholders[photo_id] = pixmap
+        while len(self._placeholders) > PLACEHOLDER_PIXMAPS:
+            self._placeholders.popitem(last=False)
+
+    def _placeholder(self, photo_id, data):
+        pixmap = self._placeholders.get(photo_id)
+        if pixmap is None and data:
+            image = QImage.fromData(data, "JPEG")
+            if not image.isNull():
+                pixmap = QPixmap.fromImage(image)
+                self._remember_placeholder(photo_id, pixmap)
+        return pixmap
+
+    def _changed(self, photo_id):
+        row = self._row_of.get(photo_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    # ---------------------------------------------------------
+    # QAbstractListModel
+    # ---------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        photo_id, file_path, placeholder, color = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(file_path)
+        if role == Qt.DecorationRole:
+            if self._frame is not None and self._frame[0] == photo_id:
+                return self._frame[1]
+            pixmap = self._thumbs.get(photo_id)
+            if pixmap is not None:
+                self._thumbs.move_to_end(photo_id)
+                return pixmap
+            return self._placeholder(photo_id, placeholder)
+        if role == Qt.BackgroundRole:
+            return QColor(color) if color and photo_id not in self._thumbs else None
+        if role == PHOTO_ID_ROLE:
+            return photo_id
+        if role == PATH_ROLE:
+            return file_path
+        if role == HAS_THUMBNAIL_ROLE:
+            return photo_id in self._thumbs
+        return None
+
+
+def _pixmap(image):
+    """QImage (đã scale theo cỡ ô × DPR) → QPixmap cùng devicePixelRatio → delegate vẽ 1:1."""
+    pixmap = QPixmap.fromImage(image)
+    pixmap.setDevicePixelRatio(image.devicePixelRatio())
+    return pixmap
+
+
+class PhotoDelegate(QStyledItemDelegate):
+    """Vẽ 1 ô giống PhotoCard cũ: ảnh 200x150 ở trên, tên file bên dưới."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.font = QFont()
+        self.font.setPixelSize(11)
+
+    def sizeHint(self, option, index):
+        return QSize(*CARD_SIZE)
+
+    def paint(self, painter, option, index):
+        rect = option.rect
+        tw, th = CARD_THUMB_SIZE
+        thumb_rect = QRect(rect.x() + (rect.width() - tw) // 2, rect.y() + CARD_MARGIN, tw, th)
+
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        background = index.data(Qt.BackgroundRole)
+        if background is not None:
+            painter.fillRect(thumb_rect, background)
+
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is not None and not pixmap.isNull():
+            # Thumbnail đã đúng cỡ ô × DPR → vẽ 1:1; placeholder nhỏ → phóng vừa ô
+            size = pixmap.deviceIndependentSize().toSize()
+            if not index.data(HAS_THUMBNAIL_ROLE) or size.width() > tw or size.height() > th:
+                size = size.scaled(tw, th, Qt.KeepAspectRatio)
+            target = QRectF(
+                thumb_rect.x() + (tw - size.width()) / 2,
+                thumb_rect.y() + (th - size.height()) / 2,
+                size.width(), size.height(),
+            )
+            painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+        text_rect = QRect(rect.x() + CARD_MARGIN, thumb_rect.bottom() + 1,
+                          rect.width() - 2 * CARD_MARGIN, rect.bottom() - thumb_rect.bottom() - CARD_MARGIN)
+        painter.setFont(self.font)
+        painter.setPen(QColor("#555"))
+        name = painter.fontMetrics().elidedText(index.data(Qt.DisplayRole), Qt.ElideMiddle, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignCenter, name)
+        painter.restore()
+
+
+class PhotoGridView(QListView):
+    """
+    QListView dạng lưới ô cố định. Click / double-click chuột trái → photo_clicked / photo_double_clicked;
+    context menu để GalleryView xử lý. Hover ô GIF → phát animation ngay trong ô.
+    """
+    photo_clicked = Signal(int)
+    photo_double_clicked = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setGridSize(QSize(CARD_SIZE[0] + GRID_SPACING, CARD_SIZE[1] + GRID_SPACING))
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setMouseTracking(True)
+        self.setItemDelegate(PhotoDelegate(self))
+
+        self._player = None
+        self._hover_id = None
+        self.entered.connect(self._on_entered)
+        self.viewportEntered.connect(self.stop_hover)
+
+    # ---------------------------------------------------------
+    def visible_range(self):
+        """(hàng model đầu, hàng sau hàng cuối) đang nằm trong viewport – tính từ lưới ô, không duyệt item."""
+        grid = self.gridSize()
+        columns = max(1, self.viewport().width() // grid.width())
+        top = self.verticalScrollBar().value()
+        first_line = top // grid.height()
+        last_line = (top + self.viewport().height()) // grid.height()
+        return first_line * columns, (last_line + 1) * columns
+
+    def photo_id_at(self, pos):
+        """pos: toạ độ trong viewport → photo_id, ngoài ô → None."""
+        index = self.indexAt(pos)
+        return index.data(PHOTO_ID_ROLE) if index.isValid() else None
+
+    def contextMenuEvent(self, event):
+        event.ignore()  # → GalleryView.contextMenuEvent
+
+    def mousePressEvent(self, event):
+        super().mousePressEvent(event)
+        if event.button() == Qt.LeftButton:
+            photo_id = self.photo_id_at(event.position().toPoint())
+            if photo_id is not None:
+                self.photo_clicked.emit(photo_id)
+
+    def mouseDoubleClickEvent(self, event):
+        super().mouseDoubleClickEvent(event)
+        if event.button() == Qt.LeftButton:
+            photo_id = self.photo_id_at(event.position().toPoint())
+            if photo_id is not None:
+                self.photo_double_clicked.emit(photo_id)
+
+    # ---------------------------------------------------------
+    # HOVER GIF
+    # ---------------------------------------------------------
+    def _on_entered(self, index):
+        photo_id = index.data(PHOTO_ID_ROLE)
+        if photo_id == self._hover_id:
+            return
+        self.stop_hover()
+        path = index.data(PATH_ROLE)
+        if not is_animated(path) or not index.data(HAS_THUMBNAIL_ROLE):
+            return
+        dpr = self.devicePixelRatioF()
+        player = AnimationPlayer(path, QSize(*CARD_THUMB_SIZE) * dpr, self)
+        if not player.is_valid():
+            player.deleteLater()
+            return
+        player.frame_ready.connect(lambda image: self._show_frame(photo_id, image, dpr))
+        self._player, self._hover_id = player, photo_id
+        player.start()
+
+    def _show_frame(self, photo_id, image, dpr):
+        if photo_id != self._hover_id:
+            return
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(dpr)
+        self.model().set_frame(photo_id, pixmap)
+
+    def stop_hover(self):
+        if self._player is not None:
+            self._player.stop()
+            self._player.deleteLater()
+            self._player = None
+        if self._hover_id is not None:
+            self.model().set_frame(self._hover_id, None)
+            self._hover_id = None
+
+    def leaveEvent(self, event):
+        super().leaveEvent(event)
+        self.stop_hover()
@@ -5,10 +5,13 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor, QPixmap, QPainter
 from ..backend.database_manager import get_session, Photo
-from colorthief import ColorThief
-from PIL import Image
+from ..utils.raw_preview import open_image
+from ..utils.decode_cache import decode_image
+from ..utils.placeholder import extract_palette
 import os
 
+PALETTE_BOX = (256, 256)  # khung decode cho palette (JPEG scale lúc decode, dùng chung với viewer)
+
 
 class PhotoInfoPanel(QWidget):
     """
@@ -50,6 +53,8 @@ class PhotoInfoPanel(QWidget):
         self.lbl_iso = QLabel()
         self.lbl_focal = QLabel()
         self.lbl_shutter = QLabel()
+        self.lbl_camera = QLabel()
+        self.lbl_lens = QLabel()
         self.lbl_created = QLabel()
         self.lbl_imported = QLabel()
         self.lbl_modified = QLabel()
@@ -73,6 +78,8 @@ class PhotoInfoPanel(QWidget):
         self.form.addRow("ISO:", self.lbl_iso)
         self.form.addRow("Shutter:", self.lbl_shutter)
         self.form.addRow("Focal:", self.lbl_focal)
+        self.form.addRow("Camera:", self.lbl_camera)
+        self.form.addRow("Lens:", self.lbl_lens)
         self.form.addRow("Date Imported:", self.lbl_imported)
         self.form.addRow("Date Created:", self.lbl_created)
         self.form.addRow("Date Modified:", self.lbl_modified)
@@ -136,6 +143,8 @@ class PhotoInfoPanel(QWidget):
         self.lbl_iso.setText(str(getattr(self.photo, "exif_iso", "")))
         self.lbl_focal.setText(str(getattr(self.photo, "exif_focal_length", "")))
         self.lbl_shutter.setText(str(getattr(self.photo, "exif_shutter_speed", "")))
+        self.lbl_camera.setText(str(self.photo.exif_camera or ""))
+        self.lbl_lens.setText(str(self.photo.exif_lens or ""))
 
         # Date
         self.lbl_created.setText(str(getattr(self.photo, "date_created", "")))
@@ -162,8 +171,8 @@ class PhotoInfoPanel(QWidget):
         if not os.path.exists(path):
             return
         try:
-            color_thief = ColorThief(path)
-            palette = color_thief.get_palette(color_count=5)
+            # Dùng chung lần decode với viewer / thumbnail nếu vừa mở cùng ảnh
+            palette = extract_palette(decode_image(path, PALETTE_BOX), color_count=5, box=PALETTE_BOX)
             for rgb in palette:
                 dot = QLabel()
                 dot.setFixedSize(24, 24)
@@ -202,7 +211,7 @@ class PhotoInfoPanel(QWidget):
 
     def _get_dimensions(self, path):
         try:
-            with Image.open(path) as img:
+            with open_image(path) as img:
                 return f"{img.width}×{img.height}"
         except Exception:
             return "N/A"
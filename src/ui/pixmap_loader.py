@@ -0,0 +1,134 @@
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QPixmap, QTransform
+
+from ..utils.raw_preview import is_raw, extract_preview, raw_orientation, ORIENTATION_OPS
+from ..utils.exif_reader import read_embedded_thumbnail
+from ..utils.thumbnail import (
+    get_thumbnail, render_thumbnail_image, has_thumbnail, rendition_for, thumbnail_version,
+)
+from .image_cache import get_image_cache
+from .image_bridge import qimage_from_pil
+
+# QImage: decode được ở thread nền (thumbnail scheduler); QPixmap chỉ tạo trên GUI thread.
+# Thumbnail / preview đã decode được giữ trong image_cache (LRU theo byte) → đổi view không decode lại.
+# Rendition chưa có trong kho: render từ decode dùng chung (utils/decode_cache) rồi đưa thẳng
+# ảnh Pillow cho Qt (image_bridge), không decode lại JPEG vừa ghi vào kho.
+
+
+def load_image(path) -> QImage:
+    """
+    QImage cho ảnh gốc. RAW → JPEG preview nhúng (không demosaic), xoay theo orientation.
+    Lỗi → QImage rỗng (caller kiểm tra isNull()).
+    """
+    path = str(path)
+    if not is_raw(path):
+        return QImage(path)
+
+    data = extract_preview(path)
+    if not data:
+        return QImage()
+    return _oriented(QImage.fromData(data, "JPEG"), raw_orientation(path))
+
+
+def _oriented(image, orientation):
+    angle, mirror = ORIENTATION_OPS.get(orientation, (0, False))
+    if angle:
+        image = image.transformed(QTransform().rotate(angle))
+    if mirror:
+        image = image.mirrored(True, False)
+    return image
+
+
+def load_pixmap(path) -> QPixmap:
+    """QPixmap cho ảnh gốc (xem load_image)."""
+    return QPixmap.fromImage(load_image(path))
+
+
+def load_thumbnail_image(photo_id, file_path, width, height, dpr=1.0) -> QImage:
+    """
+    Thumbnail cho khung width x height (logical) ở devicePixelRatio dpr.
+    Lấy rendition nhỏ nhất đủ nét → thường không phải scale; DPR lẻ (1.25, 1.5)
+    thì scale 1 lần lúc load, không scale lại mỗi lần paint.
+    """
+    cache = get_image_cache()
+    rendition = rendition_for(width, height, dpr)
+    key = (photo_id, rendition, thumbnail_version(str(file_path)), dpr)
+    image = cache.get(key)
+    if image is not None:
+        return image
+
+    image = _load_rendition(photo_id, file_path, rendition)
+    if image.isNull():
+        return image
+
+    target_w, target_h = round(width * dpr), round(height * dpr)
+    if image.width() > target_w or image.height() > target_h:
+        image = image.scaled(target_w, target_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    image.setDevicePixelRatio(dpr)
+    cache.put(key, image)
+    return image
+
+
+def cached_thumbnail_image(photo_id, file_path, width, height, dpr=1.0):
+    """Thumbnail đã decode nếu có sẵn trong cache (không decode, không tính miss), ngược lại None."""
+    key = (photo_id, rendition_for(width, height, dpr), thumbnail_version(str(file_path)), dpr)
+    return get_image_cache().peek(key)
+
+
+def thumbnail_available(photo_id, file_path, width, height, dpr=1.0) -> bool:
+    """Thumbnail có sẵn (cache RAM hoặc kho) → load_thumbnail_image không phải decode ảnh gốc."""
+    return (cached_thumbnail_image(photo_id, file_path, width, height, dpr) is not None
+            or has_thumbnail(photo_id, str(file_path), rendition_for(width, height, dpr)))
+
+
+def load_placeholder_image(file_path, width, height, dpr=1.0):
+    """
+    Ảnh tạm từ thumbnail EXIF nhúng (~160px, chỉ đọc header) trong lúc chờ render thumbnail thật.
+    Không có → None.
+    """
+    embedded = read_embedded_thumbnail(str(file_path))
+    if embedded is None:
+        return None
+    image = _image_from_bytes(embedded[0])
+    if image is None:
+        return None
+    image = _oriented(image, embedded[1])
+    image = image.scaled(round(width * dpr), round(height * dpr), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    image.setDevicePixelRatio(dpr)
+    return image
+
+
+def load_thumbnail_pixmap(photo_id, file_path, width, height, dpr=1.0) -> QPixmap:
+    return QPixmap.fromImage(load_thumbnail_image(photo_id, file_path, width, height, dpr))
+
+
+def load_preview_pixmap(photo_id, file_path) -> QPixmap:
+    """Xem full màn hình: rendition preview (~2048px) thay vì decode bản gốc."""
+    cache = get_image_cache()
+    key = (photo_id, "preview", thumbnail_version(str(file_path)), 1.0)
+    image = cache.get(key)
+    if image is None:
+        image = _load_rendition(photo_id, file_path, "preview")
+        if not image.isNull():
+            cache.put(key, image)
+    return QPixmap.fromImage(image)
+
+
+def _load_rendition(photo_id, file_path, rendition) -> QImage:
+    """Rendition từ kho (JPEG) → render mới (Pillow → QImage trực tiếp) → ảnh gốc qua Qt."""
+    file_path = str(file_path)
+    image = _image_from_bytes(get_thumbnail(photo_id, file_path, rendition, render=False))
+    if image is not None:
+        return image
+    rendered = render_thumbnail_image(photo_id, file_path, rendition)
+    if rendered is not None:
+        return qimage_from_pil(rendered)
+    return load_image(file_path)
+
+
+def _image_from_bytes(data):
+    """JPEG bytes từ kho thumbnail → QImage; không có / lỗi → None."""
+    if not data:
+        return None
+    image = QImage.fromData(data, "JPEG")
+    return None if image.isNull() else image
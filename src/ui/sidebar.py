@@ -1,7 +1,7 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QPushButton, QFrame, QInputDialog, QMessageBox, QMenu
 )
-from PySide6.QtGui import QIcon, QAction
+from PySide6.QtGui import QIcon, QAction, QCursor
 from PySide6.QtCore import Qt
 
 from src.backend.database_manager import get_session, Folder, delete_folder_permanently
@@ -198,13 +198,20 @@ class Sidebar(QWidget):
         menu = QMenu()
         act_rename = QAction("Rename")
         act_delete = QAction("Delete")
+        act_watch = QAction("Watch Folder (auto import)")
+
+        folder = self.session.query(Folder).filter(Folder.id == folder_id).first()
+        act_watch.setCheckable(True)
+        act_watch.setChecked(bool(folder and folder.watch_enabled))
 
         act_rename.triggered.connect(lambda: self.rename_folder(folder_id))
         act_delete.triggered.connect(lambda: self.delete_folder(folder_id))
+        act_watch.toggled.connect(lambda checked: self.main_window.set_folder_watch(folder_id, checked))
 
         menu.addAction(act_rename)
+        menu.addAction(act_watch)
         menu.addAction(act_delete)
-        menu.exec_(QtGui.QCursor.pos())
+        menu.exec_(QCursor.pos())
 
     # -------------------------------------------------------
     def rename_folder(self, folder_id):
@@ -224,6 +231,7 @@ class Sidebar(QWidget):
         """Xóa thư mục."""
         reply = QMessageBox.question(self, "Confirm Delete", "Delete this folder?", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
+            self.main_window.set_folder_watch(folder_id, False)
             delete_folder_permanently(folder_id)
             self.refresh_folders()
 
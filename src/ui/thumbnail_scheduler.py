@@ -0,0 +1,168 @@
+import heapq
+import itertools
+import threading
+from PySide6.QtCore import QObject, Signal
+
+from .pixmap_loader import load_thumbnail_image, load_placeholder_image, thumbnail_available
+
+# Hàng đợi thumbnail có độ ưu tiên cho gallery:
+# - VISIBLE: card đang nằm trong viewport
+# - NEXT:    màn hình kế tiếp theo hướng cuộn
+# - IDLE:    phần còn lại của thư viện, chạy khi không còn việc ưu tiên hơn
+# Card cuộn ra khỏi màn hình bị hạ xuống IDLE; đổi view → cancel_all(); đóng view → stop().
+# Worker là thread nền, chỉ decode ra QImage; QPixmap được tạo trên GUI thread.
+#
+# Mỗi job đi qua 2 bước, cùng mức ưu tiên thì bước nhanh chạy trước:
+# - STAGE_FAST:   thumbnail đã có (cache / kho) → trả luôn; chưa có → gửi placeholder
+#                 từ thumbnail EXIF nhúng rồi xếp lại job ở STAGE_RENDER
+# - STAGE_RENDER: decode ảnh gốc, render rendition (chậm)
+# → cả màn hình có ảnh (placeholder) trước khi bắt đầu render từng ảnh gốc.
+# Job IDLE chỉ để render sẵn: thumbnail đã có trong kho thì bỏ qua, không decode vào RAM.
+
+PRIORITY_VISIBLE = 0
+PRIORITY_NEXT = 1
+PRIORITY_IDLE = 2
+
+STAGE_FAST = 0
+STAGE_RENDER = 1
+
+DEFAULT_WORKERS = 3
+
+
+class ThumbnailScheduler(QObject):
+    # photo_id, QImage (đã scale đúng cỡ ô × DPR); phát từ thread worker → queued về GUI thread
+    thumbnail_ready = Signal(int, object)
+    placeholder_ready = Signal(int, object)  # ảnh tạm (thumbnail EXIF nhúng), thumbnail thật đến sau
+
+    def __init__(self, width, height, workers=DEFAULT_WORKERS, parent=None):
+        super().__init__(parent)
+        self.width = width
+        self.height = height
+        self._dpr = 1.0
+        self._heap = []          # (priority, stage, seq, photo_id)
+        self._jobs = {}          # photo_id → [priority, file_path, stage]
+        self._seq = itertools.count()
+        self._generation = 0     # tăng khi cancel_all → bỏ kết quả của job cũ đang chạy
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"thumb-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # ---------------------------------------------------------
+    # API (GUI thread)
+    # ---------------------------------------------------------
+    def schedule(self, items, priority):
+        """
+        items: [(photo_id, file_path)] → đưa vào hàng đợi (hoặc đổi độ ưu tiên nếu đã có).
+        Entry cũ trong heap không bị xóa mà bị bỏ qua khi lấy ra (priority không khớp).
+        """
+        with self._cond:
+            for photo_id, file_path in items:
+                job = self._jobs.get(photo_id)
+                if job is not None and job[0] == priority:
+                    continue
+                stage = job[2] if job is not None else STAGE_FAST
+                self._jobs[photo_id] = [priority, file_path, stage]
+                heapq.heappush(self._heap, (priority, stage, next(self._seq), photo_id))
+            self._cond.notify_all()
+
+    def demote(self, photo_ids):
+        """Card đã cuộn khỏi màn hình: hạ xuống IDLE (vẫn tải khi rảnh)."""
+        with self._cond:
+            items = [(pid, self._jobs[pid][1]) for pid in photo_ids
+                     if pid in self._jobs and self._jobs[pid][0] < PRIORITY_IDLE]
+        self.schedule(items, PRIORITY_IDLE)
+
+    def cancel(self, photo_ids):
+        with self._cond:
+            for photo_id in photo_ids:
+                self._jobs.pop(photo_id, None)
+
+    def cancel_all(self):
+        """Đổi view / load lại lưới: bỏ hết job đang chờ."""
+        with self._cond:
+            self._jobs.clear()
+            self._heap.clear()
+            self._generation += 1
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._jobs)
+
+    @property
+    def dpr(self) -> float:
+        with self._cond:
+            return self._dpr
+
+    def set_dpr(self, dpr):
+        """devicePixelRatio của màn hình hiện tại (job lấy ra sau đó render theo dpr mới)."""
+        with self._cond:
+            self._dpr = dpr
+
+    def stop(self, timeout=2.0):
+        """Đóng view: bỏ hàng đợi, dừng worker (job đang decode chạy xong thì thoát, không emit)."""
+        with self._cond:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._jobs.clear()
+            self._heap.clear()
+            self._generation += 1
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    # ---------------------------------------------------------
+    # WORKER
+    # ---------------------------------------------------------
+    def _next_job(self):
+        """Job tiếp theo (kèm dpr + generation đọc trong lock), stop() → None."""
+        with self._cond:
+            while not self._stopped:
+                while self._heap:
+                    priority, stage, _, photo_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(photo_id)
+                    if job is not None and job[0] == priority and job[2] == stage:
+                        del self._jobs[photo_id]
+                        return photo_id, priority, job[1], stage, self._dpr, self._generation
+                self._cond.wait()
+            return None
+
+    def _is_current(self, generation):
+        with self._cond:
+            return generation == self._generation
+
+    def _requeue_render(self, photo_id, priority, file_path, generation):
+        with self._cond:
+            if generation != self._generation or self._stopped or photo_id in self._jobs:
+                return  # view đã đổi / job đã được xếp lại
+            self._jobs[photo_id] = [priority, file_path, STAGE_RENDER]
+            heapq.heappush(self._heap, (priority, STAGE_RENDER, next(self._seq), photo_id))
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            photo_id, priority, file_path, stage, dpr, generation = job
+            try:
+                if stage == STAGE_FAST and thumbnail_available(photo_id, file_path, self.width, self.height, dpr):
+                    if priority == PRIORITY_IDLE:
+                        continue  # đã có trong kho, chưa cần hiển thị → khỏi decode
+                elif stage == STAGE_FAST:
+                    if priority < PRIORITY_IDLE:
+                        placeholder = load_placeholder_image(file_path, self.width, self.height, dpr)
+                        if placeholder is not None and self._is_current(generation):
+                            self.placeholder_ready.emit(photo_id, placeholder)
+                    self._requeue_render(photo_id, priority, file_path, generation)
+                    continue
+                image = load_thumbnail_image(photo_id, file_path, self.width, self.height, dpr)
+            except Exception as e:
+                print(f"[THUMB ERROR] {file_path}: {e}")
+                continue
+            if self._is_current(generation) and not image.isNull():
+                self.thumbnail_ready.emit(photo_id, image)
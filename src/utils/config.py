@@ -0,0 +1,46 @@
+import os
+import json
+from ..backend.project_manager import get_current_project_path
+
+# Cài đặt theo project, lưu ở <project>/.metadata/settings.json
+
+DEFAULTS = {
+    # copy | reflink | hardlink | reference (xem backend/content_store.place_original)
+    "storage_mode": "copy",
+    "copy_workers": 4,
+    # RAM tối đa (MB) cho cache ảnh đã decode (thumbnail lưới + preview), xem ui/image_cache
+    "image_cache_mb": 256,
+    # Dung lượng đĩa tối đa (MB) cho kho thumbnail, vượt → bỏ rendition ít xem nhất
+    "thumbnail_quota_mb": 2048,
+}
+
+
+def _settings_file(project_root: str = None) -> str:
+    if project_root is None:
+        project_root = get_current_project_path()
+    return os.path.join(project_root, ".metadata", "settings.json")
+
+
+def load_settings(project_root: str = None) -> dict:
+    settings = dict(DEFAULTS)
+    path = _settings_file(project_root)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                settings.update(json.load(f))
+        except Exception as e:
+            print(f"[CONFIG WARN] Cannot read {path}: {e}")
+    return settings
+
+
+def get_setting(key: str, project_root: str = None):
+    return load_settings(project_root).get(key, DEFAULTS.get(key))
+
+
+def set_setting(key: str, value, project_root: str = None):
+    settings = load_settings(project_root)
+    settings[key] = value
+    path = _settings_file(project_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2, ensure_ascii=False)
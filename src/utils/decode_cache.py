@@ -0,0 +1,72 @@
+import os
+import threading
+from collections import OrderedDict
+
+from .raw_preview import open_image
+
+# Ảnh gốc vừa decode (Pillow) được giữ lại vài giây / vài ảnh để các bước chạy gần nhau
+# dùng chung 1 lần decode: render thumbnail / preview khi mở xem + palette của info panel.
+# - key: (path, size, mtime_ns) → ảnh gốc bị sửa thì không dùng lại bản cũ
+# - JPEG decode bằng draft() theo khung cần dùng; cần khung lớn hơn bản đang giữ → decode lại
+# - ảnh trả về dùng CHUNG: caller không được sửa tại chỗ (copy() / convert() trước)
+
+DECODE_CACHE_ENTRIES = 4
+DECODE_CACHE_BYTES = 192 * 1024 * 1024
+
+_entries = OrderedDict()  # key → (image, full_size, bytes)
+_bytes = 0
+_lock = threading.Lock()
+
+
+def decode_image(path: str, box=None):
+    """
+    Ảnh Pillow đã load, chưa xoay theo orientation (RAW → JPEG preview nhúng).
+    box=(w, h): chỉ cần ảnh ≥ box (JPEG được scale lúc decode); None → full size.
+    """
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and _covers(entry, box):
+            _entries.move_to_end(key)
+            return entry[0]
+
+    img = open_image(path)
+    original_size = img.size
+    if box is not None and img.format == "JPEG":
+        img.draft("RGB", tuple(box))
+    full_size = img.size == original_size
+    img.load()
+
+    _store(key, img, full_size)
+    return img
+
+
+def clear():
+    global _bytes
+    with _lock:
+        _entries.clear()
+        _bytes = 0
+
+
+def _covers(entry, box):
+    image, full_size, _ = entry
+    if full_size:
+        return True
+    return box is not None and image.width >= box[0] and image.height >= box[1]
+
+
+def _store(key, img, full_size):
+    global _bytes
+    size = img.width * img.height * len(img.getbands())
+    if size > DECODE_CACHE_BYTES:
+        return
+    with _lock:
+        old = _entries.pop(key, None)
+        if old is not None:
+            _bytes -= old[2]
+        _entries[key] = (img, full_size, size)
+        _bytes += size
+        while _entries and (len(_entries) > DECODE_CACHE_ENTRIES or _bytes > DECODE_CACHE_BYTES):
+            _, (_, _, dropped) = _entries.popitem(last=False)
+            _bytes -= dropped
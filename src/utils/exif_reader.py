@@ -0,0 +1,339 @@
+import io
+import os
+import mmap
+import struct
+from datetime import datetime
+
+# Đọc EXIF chỉ từ header (APP1 của JPEG hoặc IFD của TIFF), không dùng exifread.
+# JPEG: đi qua các marker, bỏ qua segment khác, chỉ đọc đúng segment APP1 (tối đa 64KB).
+# TIFF (và RAW dạng TIFF: CR2 / NEF / ARW / DNG): mmap file → chỉ các page chứa IFD được đọc từ đĩa.
+# CR3 (ISO-BMFF): EXIF nằm trong các box CMT1 / CMT2 / CMT4 (mỗi box là 1 cấu trúc TIFF).
+
+JPEG_SOI = b"\xff\xd8"
+TIFF_HEADERS = (b"II*\x00", b"MM\x00*")
+EXIF_HEADER = b"Exif\x00\x00"
+BMFF_FTYP = b"ftyp"
+CANON_UUID = bytes.fromhex("85c0b687820f11e08111f4ce462b6a48")  # moov/uuid chứa CMT1..CMT4 của CR3
+
+# Tag IFD0
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_ORIENTATION = 0x0112
+TAG_EXIF_IFD = 0x8769
+TAG_JPEG_IF_OFFSET = 0x0201  # IFD1: thumbnail JPEG nhúng (~160px)
+TAG_JPEG_IF_LENGTH = 0x0202
+TAG_GPS_IFD = 0x8825
+# Tag Exif IFD
+TAG_EXPOSURE_TIME = 0x829A
+TAG_FNUMBER = 0x829D
+TAG_ISO = 0x8827
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_FOCAL_LENGTH = 0x920A
+TAG_PIXEL_X = 0xA002
+TAG_PIXEL_Y = 0xA003
+TAG_LENS_MODEL = 0xA434
+# Tag GPS IFD
+TAG_GPS_LAT_REF = 0x0001
+TAG_GPS_LAT = 0x0002
+TAG_GPS_LON_REF = 0x0003
+TAG_GPS_LON = 0x0004
+TAG_GPS_ALT_REF = 0x0005
+TAG_GPS_ALT = 0x0006
+
+# type id → (kích thước 1 phần tử, struct format)
+_TYPES = {
+    1: (1, "B"), 2: (1, "s"), 3: (2, "H"), 4: (4, "L"), 5: (8, "LL"),
+    6: (1, "b"), 7: (1, "B"), 8: (2, "h"), 9: (4, "l"), 10: (8, "ll"),
+    13: (4, "L"),  # IFD offset (SubIFDs trong RAW)
+}
+
+EMPTY_EXIF = {
+    "iso": None,
+    "focal_length": None,
+    "aperture": None,
+    "exposure_time": None,
+    "camera_make": None,
+    "camera_model": None,
+    "lens_model": None,
+    "datetime_original": None,
+    "orientation": None,
+    "gps_latitude": None,
+    "gps_longitude": None,
+    "gps_altitude": None,
+    "width": None,
+    "height": None,
+}
+
+
+def read_exif_header(path: str) -> dict:
+    """
+    Đọc EXIF từ header của JPEG / TIFF / RAW, trả về dict giá trị đã có kiểu
+    (int / float / str / datetime). Thiếu tag → None.
+    Định dạng không hỗ trợ → ValueError (caller tự fallback).
+    """
+    with open(path, "rb") as f:
+        head = f.read(8)
+        if head[:2] == JPEG_SOI:
+            tiff = _read_jpeg_app1(f)
+            return parse_tiff(tiff) if tiff else dict(EMPTY_EXIF)
+        if head[:4] in TIFF_HEADERS or head[4:8] == BMFF_FTYP:
+            if os.fstat(f.fileno()).st_size == 0:
+                return dict(EMPTY_EXIF)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return parse_tiff(mm) if head[:4] in TIFF_HEADERS else parse_cr3(mm)
+    raise ValueError(f"Unsupported format for header EXIF: {path}")
+
+
+def read_exif_bytes(data: bytes) -> dict:
+    """Như read_exif_header nhưng đọc từ nội dung trong RAM (member của archive)."""
+    if data[:2] == JPEG_SOI:
+        tiff = _read_jpeg_app1(io.BytesIO(data))
+        return parse_tiff(tiff) if tiff else dict(EMPTY_EXIF)
+    if data[:4] in TIFF_HEADERS:
+        return parse_tiff(data)
+    if data[4:8] == BMFF_FTYP:
+        return parse_cr3(data)
+    raise ValueError("Unsupported format for header EXIF")
+
+
+def read_embedded_thumbnail(path: str):
+    """
+    Thumbnail JPEG nhúng trong IFD1 của EXIF (máy ảnh thường ghi ~160x120), chỉ đọc header.
+    Trả về (jpeg bytes, orientation của ảnh gốc) – thumbnail nhúng chưa được xoay.
+    Không có / định dạng không hỗ trợ → None.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(8)
+            if head[:2] == JPEG_SOI:
+                tiff = _read_jpeg_app1(f)
+                return embedded_thumbnail(tiff) if tiff else None
+            if head[:4] in TIFF_HEADERS and os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return embedded_thumbnail(mm)
+    except (OSError, ValueError, struct.error):
+        pass
+    return None
+
+
+def embedded_thumbnail(buf):
+    """(jpeg bytes, orientation) từ IFD1 của 1 cấu trúc TIFF (bytes / mmap), không có → None."""
+    if len(buf) < 8:
+        return None
+    endian = tiff_endian(buf)
+    ifd0, ifd1_offset = read_ifd(buf, struct.unpack_from(endian + "L", buf, 4)[0], endian, with_next=True)
+    ifd1 = read_ifd(buf, ifd1_offset, endian)
+    offset, length = _first(ifd1.get(TAG_JPEG_IF_OFFSET)), _first(ifd1.get(TAG_JPEG_IF_LENGTH))
+    if not offset or not length or offset + length > len(buf):
+        return None
+    data = bytes(buf[offset:offset + length])
+    if data[:2] != JPEG_SOI:
+        return None
+    return data, _first(ifd0.get(TAG_ORIENTATION)) or 1
+
+
+def _read_jpeg_app1(f):
+    """Đi qua các marker JPEG (f đang ở sau SOI), trả về payload TIFF của APP1 Exif."""
+    f.seek(2)
+    while True:
+        marker = f.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:  # byte đệm
+            f.seek(-3, os.SEEK_CUR)
+            continue
+        if code in (0xD9, 0xDA):  # EOI / SOS → hết header
+            return None
+        length = struct.unpack(">H", marker[2:])[0]
+        if code == 0xE1:
+            segment = f.read(length - 2)
+            if segment.startswith(EXIF_HEADER):
+                return segment[len(EXIF_HEADER):]
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+# ---------------------------------------------------------
+# TIFF / IFD
+# ---------------------------------------------------------
+def parse_tiff(buf) -> dict:
+    """Parse cấu trúc TIFF (bytes / mmap) → dict EXIF đã có kiểu."""
+    result = dict(EMPTY_EXIF)
+    if len(buf) < 8:
+        return result
+
+    endian = tiff_endian(buf)
+    ifd0_offset = struct.unpack_from(endian + "L", buf, 4)[0]
+
+    ifd0 = read_ifd(buf, ifd0_offset, endian)
+    exif = read_ifd(buf, _first(ifd0.get(TAG_EXIF_IFD)), endian)
+    gps = read_ifd(buf, _first(ifd0.get(TAG_GPS_IFD)), endian)
+    _fill(result, ifd0, exif, gps)
+    return result
+
+
+def parse_cr3(buf) -> dict:
+    """Parse EXIF của CR3: CMT1 = IFD0, CMT2 = Exif IFD, CMT4 = GPS IFD (mỗi box là 1 TIFF)."""
+    result = dict(EMPTY_EXIF)
+    boxes = canon_boxes(buf)
+    ifds = {}
+    for name in (b"CMT1", b"CMT2", b"CMT4"):
+        ifds[name] = {}
+        if name not in boxes:
+            continue
+        start, end = boxes[name]
+        tiff = buf[start:end]
+        if len(tiff) < 8:
+            continue
+        endian = tiff_endian(tiff)
+        ifds[name] = read_ifd(tiff, struct.unpack_from(endian + "L", tiff, 4)[0], endian)
+    _fill(result, ifds[b"CMT1"], ifds[b"CMT2"], ifds[b"CMT4"])
+    return result
+
+
+def tiff_endian(buf) -> str:
+    return "<" if buf[:2] == b"II" else ">"
+
+
+def _fill(result, ifd0, exif, gps):
+    result["camera_make"] = _text(ifd0.get(TAG_MAKE))
+    result["camera_model"] = _text(ifd0.get(TAG_MODEL))
+    result["orientation"] = _first(ifd0.get(TAG_ORIENTATION))
+
+    result["iso"] = _first(exif.get(TAG_ISO))
+    result["exposure_time"] = _rational(exif.get(TAG_EXPOSURE_TIME))
+    result["aperture"] = _rational(exif.get(TAG_FNUMBER))
+    result["focal_length"] = _rational(exif.get(TAG_FOCAL_LENGTH))
+    result["lens_model"] = _text(exif.get(TAG_LENS_MODEL))
+    result["datetime_original"] = _datetime(exif.get(TAG_DATETIME_ORIGINAL))
+    result["width"] = _first(exif.get(TAG_PIXEL_X))
+    result["height"] = _first(exif.get(TAG_PIXEL_Y))
+
+    result["gps_latitude"] = _gps_coord(gps.get(TAG_GPS_LAT), gps.get(TAG_GPS_LAT_REF), b"S")
+    result["gps_longitude"] = _gps_coord(gps.get(TAG_GPS_LON), gps.get(TAG_GPS_LON_REF), b"W")
+    altitude = _rational(gps.get(TAG_GPS_ALT))
+    if altitude is not None and gps.get(TAG_GPS_ALT_REF) == [1]:
+        altitude = -altitude
+    result["gps_altitude"] = altitude
+
+
+# ---------------------------------------------------------
+# ISO-BMFF (CR3)
+# ---------------------------------------------------------
+def iter_boxes(buf, start=0, end=None):
+    """Duyệt các box ISO-BMFF trong [start, end) → (type, payload_start, box_end)."""
+    end = len(buf) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from(">L4s", buf, pos)
+        header = 8
+        if size == 1 and pos + 16 <= end:
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def canon_boxes(buf) -> dict:
+    """Các box con trong moov/uuid(Canon) của CR3 → {type: (payload_start, box_end)}."""
+    for box_type, start, end in iter_boxes(buf):
+        if box_type != b"moov":
+            continue
+        for sub_type, sub_start, sub_end in iter_boxes(buf, start, end):
+            if sub_type == b"uuid" and bytes(buf[sub_start:sub_start + 16]) == CANON_UUID:
+                return {t: (s, e) for t, s, e in iter_boxes(buf, sub_start + 16, sub_end)}
+    return {}
+
+
+def read_ifd(buf, offset, endian, with_next=False):
+    """
+    Đọc 1 IFD tại offset → {tag: value}.
+    value: bytes cho ASCII/UNDEFINED, list số cho kiểu khác, rational = (num, den).
+    with_next=True → trả thêm offset IFD kế tiếp.
+    """
+    tags = {}
+    next_offset = 0
+    if not offset or offset + 2 > len(buf):
+        return (tags, next_offset) if with_next else tags
+
+    count = struct.unpack_from(endian + "H", buf, offset)[0]
+    pos = offset + 2
+    for _ in range(count):
+        if pos + 12 > len(buf):
+            break
+        tag, typ, n = struct.unpack_from(endian + "HHL", buf, pos)
+        if typ in _TYPES:
+            size, fmt = _TYPES[typ]
+            total = size * n
+            data_pos = pos + 8
+            if total > 4:
+                data_pos = struct.unpack_from(endian + "L", buf, pos + 8)[0]
+            if data_pos + total <= len(buf):
+                tags[tag] = _unpack_value(buf, data_pos, typ, n, fmt, endian)
+        pos += 12
+
+    if with_next and pos + 4 <= len(buf):
+        next_offset = struct.unpack_from(endian + "L", buf, pos)[0]
+    return (tags, next_offset) if with_next else tags
+
+
+def _unpack_value(buf, pos, typ, n, fmt, endian):
+    if typ in (2, 7):
+        return bytes(buf[pos:pos + n])
+    if typ in (5, 10):
+        values = struct.unpack_from(endian + fmt * n, buf, pos)
+        return [(values[i], values[i + 1]) for i in range(0, len(values), 2)]
+    return list(struct.unpack_from(endian + fmt * n, buf, pos))
+
+
+# ---------------------------------------------------------
+# CONVERT
+# ---------------------------------------------------------
+def _first(value):
+    if not value:
+        return None
+    v = value[0]
+    return v if isinstance(v, int) else None
+
+
+def _rational(value, index=0):
+    if not value or len(value) <= index or not isinstance(value[index], tuple):
+        return None
+    num, den = value[index]
+    return num / den if den else None
+
+
+def _text(value):
+    if not value:
+        return None
+    text = bytes(value).split(b"\x00", 1)[0].decode("utf-8", "replace").strip()
+    return text or None
+
+
+def _datetime(value):
+    text = _text(value)
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text, "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def _gps_coord(value, ref, negative_ref):
+    if not value or len(value) < 3:
+        return None
+    degrees = _rational(value, 0)
+    minutes = _rational(value, 1)
+    seconds = _rational(value, 2)
+    if degrees is None or minutes is None or seconds is None:
+        return None
+    coord = degrees + minutes / 60 + seconds / 3600
+    if ref and bytes(ref)[:1] == negative_ref:
+        coord = -coord
+    return round(coord, 7)
@@ -1,63 +1,264 @@
 import os
 import json
-from PIL import Image
+import atexit
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ..backend.project_manager import get_current_project_path
+from .raw_preview import open_image, is_raw, raw_dimensions
 
-CACHE_DIR = os.path.join(os.getcwd(), ".cache")
-CACHE_FILE = os.path.join(CACHE_DIR, "photo_meta.json")
+# Cache metadata (kích thước, dung lượng, thời gian) theo đường dẫn ảnh, 1 kho / project:
+# - SQLite (WAL) <project>/.metadata/photo_meta.sqlite, khóa = file_path → tra từng ảnh O(log n),
+#   không load / ghi lại cả cache như file JSON trước đây
+# - write-behind: entry mới nằm trong RAM (đọc được ngay), ghi xuống theo lô
+#   khi đủ FLUSH_COUNT entry hoặc sau FLUSH_DELAY giây; thoát app → flush nốt
+# - cache JSON cũ (<cwd>/.cache/photo_meta.json) được nhập vào 1 lần / kho
 
-def load_cache():
-    """Đọc cache JSON nếu có."""
-    if not os.path.exists(CACHE_FILE):
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump({}, f)
-        return {}
+STORE_NAME = "photo_meta.sqlite"
+LEGACY_CACHE_FILE = os.path.join(os.getcwd(), ".cache", "photo_meta.json")
 
-    try:
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+FLUSH_COUNT = 500
+FLUSH_DELAY = 2.0
+
+# get_metadata_many: số thread đọc header song song (I/O, Pillow nhả GIL khi đọc file)
+METADATA_WORKERS = 8
+SQL_BATCH = 500  # số tham số tối đa / câu IN (...)
+
+_COLUMNS = ("filename", "width", "height", "size_mb", "created", "modified")
+
+_stores = {}  # file kho → MetaStore
+_stores_lock = threading.Lock()
+
+
+class MetaStore:
+    """Dùng chung giữa các thread → mọi thao tác có lock."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._pending = {}  # file_path → meta, chưa ghi xuống SQLite
+        self._timer = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta(
+                file_path TEXT PRIMARY KEY,
+                filename TEXT,
+                width INTEGER,
+                height INTEGER,
+                size_mb REAL,
+                created REAL,
+                modified REAL
+            );
+            CREATE TABLE IF NOT EXISTS info(key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    # ---------------------------------------------------------
+    # ĐỌC
+    # ---------------------------------------------------------
+    def get(self, file_path: str):
+        """Meta đã cache của file_path (chưa kiểm tra còn hợp lệ), chưa có → None."""
+        with self._lock:
+            meta = self._pending.get(file_path)
+            if meta is not None:
+                return meta
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM meta WHERE file_path = ?", (file_path,)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def get_many(self, file_paths) -> dict:
+        """{file_path: meta} của các path đã cache (1 câu SELECT / SQL_BATCH path)."""
+        file_paths = list(file_paths)
+        found = {}
+        with self._lock:
+            for i in range(0, len(file_paths), SQL_BATCH):
+                chunk = file_paths[i:i + SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT file_path, {', '.join(_COLUMNS)} FROM meta "
+                    f"WHERE file_path IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for row in rows:
+                    found[row[0]] = dict(zip(_COLUMNS, row[1:]))
+            for path in file_paths:
+                if path in self._pending:
+                    found[path] = self._pending[path]
+        return found
+
+    # ---------------------------------------------------------
+    # GHI (write-behind)
+    # ---------------------------------------------------------
+    def put_many(self, entries: dict):
+        """{file_path: meta} → hàng đợi ghi; flush ngay nếu đủ lô, không thì hẹn giờ."""
+        if not entries:
+            return
+        with self._lock:
+            self._pending.update(entries)
+            if len(self._pending) >= FLUSH_COUNT:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(FLUSH_DELAY, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            rows = [
+                (path,) + tuple(meta.get(col) for col in _COLUMNS)
+                for path, meta in self._pending.items()
+            ]
+            self._pending = {}
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO meta(file_path, {', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(_COLUMNS) + 1))})",
+                    rows,
+                )
+
+    def import_json(self, json_path: str):
+        """Nhập cache JSON cũ 1 lần (đánh dấu trong bảng info, file JSON giữ nguyên)."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM info WHERE key = 'json_imported'").fetchone():
+                return
+            entries = {}
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    entries = {path: meta for path, meta in data.items() if isinstance(meta, dict)}
+                except Exception as e:
+                    print(f"[META ERROR] Cannot import {json_path}: {e}")
+            self._pending.update(entries)
+            self.flush()
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO info(key, value) VALUES ('json_imported', ?)", (json_path,))
+            if entries:
+                print(f"[META] Imported {len(entries)} entries from {json_path}")
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+def get_store(project_root: str = None) -> MetaStore:
+    """MetaStore của project (chưa mở project → thư mục hiện tại), mở 1 lần / process."""
+    if project_root is None:
+        project_root = get_current_project_path() or os.getcwd()
+    meta_dir = os.path.join(project_root, ".metadata")
+    path = os.path.join(meta_dir, STORE_NAME)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            os.makedirs(meta_dir, exist_ok=True)
+            store = _stores[path] = MetaStore(path)
+            store.import_json(LEGACY_CACHE_FILE)
+        return store
 
-def save_cache(data: dict):
-    """Lưu lại cache JSON."""
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+
+@atexit.register
+def flush_all():
+    """Ghi nốt entry đang chờ của mọi kho (thoát app)."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
+
+
+def probe_metadata(file_path: str) -> dict:
+    """Đọc kích thước + thông tin file (không đụng tới cache)."""
+    st = os.stat(file_path)
+
+    # RAW: kích thước sensor từ tag TIFF / EXIF (preview nhúng nhỏ hơn ảnh thật)
+    size = raw_dimensions(file_path) if is_raw(file_path) else None
+    if size is None:
+        # Image.open chỉ đọc header → lấy được size mà không decode ảnh
+        with open_image(file_path) as img:
+            size = img.size
+    w, h = size
+
+    return {
+        "filename": os.path.basename(file_path),
+        "width": w,
+        "height": h,
+        "size_mb": round(st.st_size / 1024 / 1024, 2),
+        "created": st.st_ctime,
+        "modified": st.st_mtime,
+    }
+
+def update_cache(entries: dict):
+    """Ghi nhiều entry {file_path: meta} vào cache (write-behind, không chờ ghi đĩa)."""
+    get_store().put_many(entries)
 
 def get_metadata(file_path: str) -> dict:
-    cache = load_cache()
-    modified_time = os.path.getmtime(file_path) if os.path.exists(file_path) else 0
+    store = get_store()
+    cached = store.get(file_path)
+    if _is_fresh(cached, file_path):
+        return cached  # Cache còn hợp lệ
+
+    meta = _probe_or_empty(file_path)
+    if meta.get("modified") is not None:
+        store.put_many({file_path: meta})
+    return meta
 
-    if file_path in cache:
-        cached = cache[file_path]
-        if abs(cached.get("modified", 0) - modified_time) < 0.01:
-            return cached  # Cache còn hợp lệ
+def get_metadata_many(file_paths, workers: int = METADATA_WORKERS) -> list:
+    """Metadata của nhiều ảnh, cùng thứ tự với file_paths (xem iter_metadata)."""
+    file_paths = list(file_paths)
+    found = dict(iter_metadata(file_paths, workers))
+    return [found[path] for path in file_paths]
 
-    meta = {}
+def iter_metadata(file_paths, workers: int = METADATA_WORKERS):
+    """
+    Yield (file_path, meta) theo thứ tự xong:
+    - hit: 1 lượt tra kho cho cả danh sách, kiểm tra mtime bằng stat → trả ngay
+    - miss: đọc header song song trên thread pool (≤ workers luồng), ghi vào kho theo lô
+    """
+    file_paths = list(dict.fromkeys(file_paths))
+    store = get_store()
+    cached = store.get_many(file_paths)
+
+    misses = []
+    for path in file_paths:
+        meta = cached.get(path)
+        if _is_fresh(meta, path):
+            yield path, meta
+        else:
+            misses.append(path)
+    if not misses:
+        return
+
+    batch = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_probe_or_empty, path): path for path in misses}
+        for future in as_completed(futures):
+            path, meta = futures[future], future.result()
+            if meta.get("modified") is not None:
+                batch[path] = meta
+                if len(batch) >= FLUSH_COUNT:
+                    store.put_many(batch)
+                    batch = {}
+            yield path, meta
+    store.put_many(batch)
+
+def _is_fresh(meta, file_path) -> bool:
+    if meta is None:
+        return False
     try:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(file_path)
-
-        img = Image.open(file_path)
-        w, h = img.size
-        img.close()
-        size_kb = os.path.getsize(file_path) / 1024
-        created = os.path.getctime(file_path)
-
-        meta = {
-            "filename": os.path.basename(file_path),
-            "width": w,
-            "height": h,
-            "size_mb": round(size_kb / 1024, 2),
-            "created": created,
-            "modified": modified_time,
-        }
-
-        cache[file_path] = meta
-        save_cache(cache)
+        modified_time = os.path.getmtime(file_path)
+    except OSError:
+        modified_time = 0
+    return abs((meta.get("modified") or 0) - modified_time) < 0.01
+
+def _probe_or_empty(file_path) -> dict:
+    try:
+        return probe_metadata(file_path)
     except Exception as e:
         print(f"[META ERROR] {e}")
-        meta = {"filename": os.path.basename(file_path), "width": 0, "height": 0, "size_mb": 0}
-
-    return meta
+        return {"filename": os.path.basename(file_path), "width": 0, "height": 0, "size_mb": 0}
@@ -0,0 +1,56 @@
+import io
+from PIL import Image
+
+# Placeholder lưu thẳng trong hàng Photo → gallery vẽ lưới ngay từ query, không đọc file nào:
+# - micro-JPEG: ảnh thu nhỏ còn cạnh dài 24px (~300-600 bytes), UI phóng to ra ô → ảnh mờ
+# - dominant_color: màu chiếm nhiều nhất ("#rrggbb"), nền của ô khi chưa có gì khác
+
+PLACEHOLDER_SIZE = 24
+PLACEHOLDER_QUALITY = 40
+PALETTE_COLORS = 4
+
+
+def make_placeholder(img: Image.Image):
+    """Ảnh (đã đúng orientation) → (micro-JPEG bytes, "#rrggbb")."""
+    small = img.convert("RGB")
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BOX)
+
+    buf = io.BytesIO()
+    small.save(buf, "JPEG", quality=PLACEHOLDER_QUALITY, optimize=True)
+
+    quantized = small.quantize(colors=PALETTE_COLORS)
+    _, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+    return buf.getvalue(), f"#{r:02x}{g:02x}{b:02x}"
+
+
+def placeholder_from_jpeg(data: bytes):
+    """Placeholder từ JPEG thumbnail đã render (rendition "grid"), lỗi → None."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.draft("RGB", (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+            return make_placeholder(img)
+    except Exception as e:
+        print(f"[PLACEHOLDER ERROR] {e}")
+        return None
+
+
+def placeholder_columns(placeholder) -> dict:
+    """(bytes, color) → cột của Photo; None → {} (không ghi đè giá trị đang có)."""
+    if not placeholder:
+        return {}
+    data, color = placeholder
+    return {"placeholder": data, "dominant_color": color}
+
+
+def extract_palette(img: Image.Image, color_count: int = 5, box=(256, 256)):
+    """
+    Màu chính của ảnh (median cut, như ColorThief) → [(r, g, b)] theo độ phổ biến giảm dần.
+    Dùng ảnh đã decode sẵn (decode_cache) thay vì mở lại file gốc; img không bị sửa.
+    """
+    scale = min(1.0, box[0] / img.width, box[1] / img.height)
+    small = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                       Image.Resampling.BOX)
+    quantized = small.convert("RGB").quantize(colors=color_count, method=Image.Quantize.MEDIANCUT)
+    palette = quantized.getpalette()
+    return [tuple(palette[i * 3:i * 3 + 3]) for _, i in sorted(quantized.getcolors(), reverse=True)]
@@ -0,0 +1,237 @@
+import io
+import os
+import mmap
+import struct
+from PIL import Image
+
+from .exif_reader import (
+    read_ifd, tiff_endian, iter_boxes, canon_boxes, read_exif_header, read_exif_bytes,
+    parse_tiff, parse_cr3, TIFF_HEADERS, BMFF_FTYP, JPEG_SOI,
+)
+
+# RAW: không demosaic, chỉ lấy JPEG preview nhúng sẵn trong file.
+# - CR2 / NEF / ARW / DNG (TIFF): duyệt chuỗi IFD + SubIFDs, lấy JPEG lớn nhất
+#   (JPEGInterchangeFormat 0x0201/0x0202 hoặc strip nén JPEG)
+# - CR3 (ISO-BMFF): box PRVW trong uuid preview, fallback THMB
+# File được mmap → chỉ đọc phần header + đúng đoạn JPEG cần dùng.
+# Kích thước ảnh RAW (raw_dimensions) lấy từ tag TIFF / EXIF của ảnh sensor, không phải preview.
+
+RAW_EXTENSIONS = {".cr2", ".cr3", ".nef", ".arw", ".dng"}
+
+TAG_NEW_SUBFILE_TYPE = 0x00FE
+TAG_IMAGE_WIDTH = 0x0100
+TAG_IMAGE_LENGTH = 0x0101
+TAG_COMPRESSION = 0x0103
+TAG_STRIP_OFFSETS = 0x0111
+TAG_STRIP_BYTE_COUNTS = 0x0117
+TAG_SUB_IFDS = 0x014A
+TAG_JPEG_OFFSET = 0x0201
+TAG_JPEG_LENGTH = 0x0202
+TAG_DNG_VERSION = 0xC612
+EXIF_ORIENTATION = 0x0112
+
+JPEG_COMPRESSIONS = (6, 7)
+MAX_IFDS = 32
+CR3_PREVIEW_UUID = bytes.fromhex("eaf42b5e1c984b88b9fbb7dc406e4d16")
+
+# orientation EXIF → (góc xoay theo chiều kim đồng hồ, lật ngang sau khi xoay)
+ORIENTATION_OPS = {
+    1: (0, False), 2: (0, True), 3: (180, False), 4: (180, True),
+    5: (90, True), 6: (90, False), 7: (270, True), 8: (270, False),
+}
+
+
+def is_raw(path) -> bool:
+    return os.path.splitext(str(path))[1].lower() in RAW_EXTENSIONS
+
+
+def extract_preview(path) -> bytes:
+    """JPEG preview lớn nhất nhúng trong file RAW (bytes), không có → None."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                span = _preview_span(mm)
+                return mm[span[0]:span[1]] if span else None
+    except (OSError, ValueError, struct.error) as e:
+        print(f"[RAW ERROR] {path}: {e}")
+        return None
+
+
+def raw_dimensions(path):
+    """(width, height) của ảnh sensor trong file RAW (chưa xoay theo orientation), không đọc được → None."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return raw_dimensions_bytes(mm)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"[RAW ERROR] {path}: {e}")
+        return None
+
+
+def raw_dimensions_bytes(buf):
+    """
+    raw_dimensions cho nội dung trong RAM / mmap:
+    - TIFF-based: IFD lớn nhất (ImageWidth / ImageLength, kể cả SubIFDs) hoặc ExifImageWidth / Height
+    - CR3: ExifImageWidth / Height trong CMT2
+    Preview nhúng luôn nhỏ hơn ảnh sensor → lấy kích thước lớn nhất.
+    """
+    sizes = []
+    if buf[:4] in TIFF_HEADERS:
+        exif = parse_tiff(buf)
+        for tags in _iter_ifds(buf):
+            width, height = tags.get(TAG_IMAGE_WIDTH), tags.get(TAG_IMAGE_LENGTH)
+            if width and height:
+                sizes.append((width[0], height[0]))
+    elif buf[4:8] == BMFF_FTYP:
+        exif = parse_cr3(buf)
+    else:
+        return None
+    if exif["width"] and exif["height"]:
+        sizes.append((exif["width"], exif["height"]))
+    return max(sizes, key=lambda size: size[0] * size[1]) if sizes else None
+
+
+def _preview_span(buf):
+    if buf[:4] in TIFF_HEADERS:
+        return _tiff_preview(buf)
+    if buf[4:8] == BMFF_FTYP:
+        return _cr3_preview(buf)
+    return None
+
+
+def raw_orientation(path) -> int:
+    """Orientation của ảnh RAW (preview nhúng thường chưa xoay)."""
+    try:
+        return read_exif_header(str(path))["orientation"] or 1
+    except Exception:
+        return 1
+
+
+def open_image(path) -> Image.Image:
+    """
+    Mở ảnh bằng Pillow (lazy, chưa decode). RAW → ảnh preview nhúng,
+    orientation của RAW được ghi vào EXIF của ảnh → xử lý giống JPEG (exif_transpose / thumbnail).
+    """
+    if not is_raw(path):
+        return Image.open(path)
+
+    data = extract_preview(path)
+    if not data:
+        raise ValueError(f"No embedded preview in RAW file: {path}")
+    return _with_orientation(Image.open(io.BytesIO(data)), raw_orientation(path))
+
+
+def open_image_bytes(data: bytes, name: str) -> Image.Image:
+    """open_image cho nội dung trong RAM (member của archive), name dùng để nhận RAW."""
+    if not is_raw(name):
+        return Image.open(io.BytesIO(data))
+
+    span = _preview_span(data)
+    if not span:
+        raise ValueError(f"No embedded preview in RAW file: {name}")
+    try:
+        orientation = read_exif_bytes(data)["orientation"] or 1
+    except Exception:
+        orientation = 1
+    return _with_orientation(Image.open(io.BytesIO(data[span[0]:span[1]])), orientation)
+
+
+def _with_orientation(img, orientation):
+    """Preview nhúng thường không mang orientation → dùng orientation của file RAW."""
+    img.getexif()[EXIF_ORIENTATION] = orientation
+    return img
+
+
+# ---------------------------------------------------------
+# TIFF-BASED RAW
+# ---------------------------------------------------------
+def _iter_ifds(buf):
+    """Tags của từng IFD: chuỗi IFD0 → IFD1... + SubIFDs (tối đa MAX_IFDS)."""
+    endian = tiff_endian(buf)
+    queue = [struct.unpack_from(endian + "L", buf, 4)[0]]
+    seen = set()
+    while queue and len(seen) < MAX_IFDS:
+        offset = queue.pop(0)
+        if not offset or offset in seen or offset >= len(buf):
+            continue
+        seen.add(offset)
+        tags, next_offset = read_ifd(buf, offset, endian, with_next=True)
+        queue.append(next_offset)
+        queue.extend(tags.get(TAG_SUB_IFDS) or [])
+        yield tags
+
+
+def _tiff_preview(buf):
+    """(start, end) của JPEG preview lớn nhất trong các IFD."""
+    best = None
+    is_dng = False
+
+    for tags in _iter_ifds(buf):
+        is_dng = is_dng or TAG_DNG_VERSION in tags
+
+        for start, length in _jpeg_candidates(tags, is_dng):
+            end = start + length
+            if length <= 0 or end > len(buf) or buf[start:start + 2] != JPEG_SOI:
+                continue
+            if not _is_baseline_jpeg(buf, start, end):
+                continue  # JPEG lossless = dữ liệu RAW, không phải preview
+            if best is None or length > best[1] - best[0]:
+                best = (start, end)
+    return best
+
+
+def _jpeg_candidates(tags, is_dng):
+    if TAG_JPEG_OFFSET in tags and TAG_JPEG_LENGTH in tags:
+        yield tags[TAG_JPEG_OFFSET][0], tags[TAG_JPEG_LENGTH][0]
+    compression = (tags.get(TAG_COMPRESSION) or [None])[0]
+    offsets = tags.get(TAG_STRIP_OFFSETS)
+    counts = tags.get(TAG_STRIP_BYTE_COUNTS)
+    if compression in JPEG_COMPRESSIONS and offsets and counts and len(offsets) == 1:
+        # DNG: chỉ IFD ảnh thu nhỏ (NewSubfileType = 1) mới là preview
+        if not is_dng or (tags.get(TAG_NEW_SUBFILE_TYPE) or [0])[0] == 1:
+            yield offsets[0], counts[0]
+
+
+def _is_baseline_jpeg(buf, start, end):
+    """Đọc marker tới SOF: baseline / progressive → True, lossless (SOF3...) → False."""
+    pos = start + 2
+    while pos + 4 <= end:
+        if buf[pos] != 0xFF:
+            return False
+        code = buf[pos + 1]
+        if code == 0xFF:
+            pos += 1
+            continue
+        if code in (0xC0, 0xC1, 0xC2):
+            return True
+        if (0xC3 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC)) or code in (0xD9, 0xDA):
+            return False
+        pos += 2 + struct.unpack_from(">H", buf, pos + 2)[0]
+    return False
+
+
+# ---------------------------------------------------------
+# CR3 (ISO-BMFF)
+# ---------------------------------------------------------
+def _cr3_preview(buf):
+    """PRVW (~1620px) trong uuid preview; không có → THMB (160x120) trong moov/uuid."""
+    for box_type, start, end in iter_boxes(buf):
+        if box_type == b"uuid" and bytes(buf[start:start + 16]) == CR3_PREVIEW_UUID:
+            for sub_type, sub_start, sub_end in iter_boxes(buf, start + 24, end):
+                if sub_type == b"PRVW":
+                    span = _jpeg_in_box(buf, sub_start, sub_end)
+                    if span:
+                        return span
+
+    thumb = canon_boxes(buf).get(b"THMB")
+    return _jpeg_in_box(buf, *thumb) if thumb else None
+
+
+def _jpeg_in_box(buf, start, end):
+    """JPEG nằm sau vài field header (kích thước, version) trong payload box."""
+    pos = bytes(buf[start:min(start + 32, end)]).find(JPEG_SOI)
+    return (start + pos, end) if pos >= 0 else None
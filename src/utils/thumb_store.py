@@ -0,0 +1,344 @@
+import os
+import re
+import mmap
+import time
+import sqlite3
+import threading
+
+# Kho thumbnail dạng pack thay cho 1 file JPEG / ảnh (100k ảnh = 100k inode):
+# - segment: file append-only <thumbnails>/NNNNNN.pack chứa JPEG nối liền nhau, đọc qua mmap
+# - index:   SQLite (WAL) <thumbnails>/index.sqlite, khóa (photo_id, rendition)
+#            → (version, segment, offset, length)
+# - version: định danh nội dung của ảnh gốc lúc render; khác version → coi như chưa có
+# - last_access: lần đọc gần nhất → quota đĩa bỏ rendition lâu không xem trước (LRU)
+# - ghi đè / xóa chỉ sửa index, byte cũ thành "rác" → compact() chép lại phần còn sống
+# - thumbnail dạng file cũ (<id>_<md5>.jpg) được chuyển vào pack 1 lần (thread nền khi mở kho)
+
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+SEGMENT_SUFFIX = ".pack"
+INDEX_NAME = "index.sqlite"
+
+# Tự compact khi mở kho nếu rác chiếm > 50% và > 64MB
+COMPACT_GARBAGE_RATIO = 0.5
+COMPACT_MIN_GARBAGE = 64 * 1024 * 1024
+
+# last_access được gom trong RAM, ghi xuống index theo lô (đọc thumbnail không phải ghi SQLite)
+TOUCH_FLUSH_COUNT = 256
+
+_COLUMNS = "photo_id, rendition, version, segment, offset, length, last_access"
+
+_LOOSE_NAME = re.compile(r"^(\d+)_([0-9a-f]{32})\.jpg$")
+
+
+class ThumbStore:
+    """Dùng chung giữa các thread (gallery trên GUI thread, import trên QThread) → mọi thao tác có lock."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.RLock()
+        self._maps = {}  # segment → mmap (đọc)
+        self._touched = {}  # (photo_id, rendition) → thời điểm đọc, chưa ghi xuống index
+        self._conn = sqlite3.connect(os.path.join(root, INDEX_NAME), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS thumbs(
+                photo_id INTEGER,
+                rendition TEXT,
+                version TEXT,
+                segment INTEGER,
+                offset INTEGER,
+                length INTEGER,
+                last_access REAL,
+                PRIMARY KEY (photo_id, rendition)
+            );
+            CREATE INDEX IF NOT EXISTS idx_thumbs_segment ON thumbs(segment);
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(thumbs)")}
+        if "last_access" not in columns:  # index tạo trước khi có quota
+            with self._conn:
+                self._conn.execute("ALTER TABLE thumbs ADD COLUMN last_access REAL")
+        self._segment = self._last_segment()
+
+    # ---------------------------------------------------------
+    # ĐỌC
+    # ---------------------------------------------------------
+    def get(self, photo_id: int, rendition: str, version: str = None):
+        """JPEG bytes của thumbnail; None nếu chưa có hoặc version khác (ảnh gốc đã đổi)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, segment, offset, length FROM thumbs WHERE photo_id = ? AND rendition = ?",
+                (photo_id, rendition),
+            ).fetchone()
+            if row is None or (version is not None and row[0] != version):
+                return None
+            _, segment, offset, length = row
+            mm = self._map(segment, offset + length)
+            if mm is None:
+                return None
+            self._touched[(photo_id, rendition)] = time.time()
+            if len(self._touched) >= TOUCH_FLUSH_COUNT:
+                self._flush_touched()
+            return mm[offset:offset + length]
+
+    def contains(self, photo_id: int, rendition: str, version: str = None) -> bool:
+        """Có thumbnail hợp lệ không (không đọc dữ liệu, không tính là 1 lần xem)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM thumbs WHERE photo_id = ? AND rendition = ?", (photo_id, rendition)
+            ).fetchone()
+        return row is not None and (version is None or row[0] == version)
+
+    def _map(self, segment, needed):
+        """mmap của segment; map lại nếu segment đã dài thêm từ lần map trước."""
+        mm = self._maps.get(segment)
+        if mm is not None and len(mm) >= needed:
+            return mm
+        if mm is not None:
+            mm.close()
+            del self._maps[segment]
+        path = self._segment_path(segment)
+        if not os.path.exists(path) or os.path.getsize(path) < needed:
+            return None
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = mm
+        return mm
+
+    # ---------------------------------------------------------
+    # GHI
+    # ---------------------------------------------------------
+    def put(self, photo_id: int, rendition: str, version: str, data: bytes):
+        self.put_many([(photo_id, rendition, version, data)])
+
+    def put_many(self, items):
+        """items: [(photo_id, rendition, version, jpeg bytes)] – 1 lần append + 1 transaction."""
+        items = [item for item in items if item[3]]
+        if not items:
+            return
+        with self._lock:
+            rows = []
+            now = time.time()
+            i = 0
+            while i < len(items):
+                path = self._segment_path(self._segment)
+                offset = os.path.getsize(path) if os.path.exists(path) else 0
+                if offset and offset + len(items[i][3]) > SEGMENT_MAX_BYTES:
+                    self._segment += 1
+                    continue
+                # Ghi dữ liệu trước, index sau → crash giữa chừng chỉ để lại byte rác
+                with open(path, "ab") as f:
+                    while i < len(items) and (offset == 0 or offset + len(items[i][3]) <= SEGMENT_MAX_BYTES):
+                        photo_id, rendition, version, data = items[i]
+                        f.write(data)
+                        rows.append((photo_id, rendition, version, self._segment, offset, len(data), now))
+                        offset += len(data)
+                        i += 1
+            with self._conn:
+                self._conn.executemany(f"INSERT OR REPLACE INTO thumbs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete(self, photo_ids):
+        """Xóa thumbnail (mọi rendition) của các photo id; byte trong segment được thu hồi khi compact."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM thumbs WHERE photo_id = ?", [(i,) for i in photo_ids])
+
+    def photo_ids(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT DISTINCT photo_id FROM thumbs")}
+
+    def evict_lru(self, max_bytes: int) -> int:
+        """
+        Bỏ rendition lâu không được xem nhất tới khi tổng thumbnail còn ≤ max_bytes.
+        Chỉ sửa index; caller compact() để trả dung lượng cho đĩa. Trả về số entry đã bỏ.
+        """
+        with self._lock:
+            self._flush_touched()
+            live = self._conn.execute("SELECT COALESCE(SUM(length), 0) FROM thumbs").fetchone()[0]
+            if live <= max_bytes:
+                return 0
+            victims = []
+            rows = self._conn.execute(
+                "SELECT photo_id, rendition, length FROM thumbs ORDER BY COALESCE(last_access, 0)"
+            ).fetchall()
+            for photo_id, rendition, length in rows:
+                if live <= max_bytes:
+                    break
+                victims.append((photo_id, rendition))
+                live -= length
+            with self._conn:
+                self._conn.executemany("DELETE FROM thumbs WHERE photo_id = ? AND rendition = ?", victims)
+            return len(victims)
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE thumbs SET last_access = ? WHERE photo_id = ? AND rendition = ?",
+                [(t, photo_id, rendition) for (photo_id, rendition), t in self._touched.items()],
+            )
+        self._touched.clear()
+
+    # ---------------------------------------------------------
+    # COMPACT
+    # ---------------------------------------------------------
+    def stats(self) -> dict:
+        """live_bytes: byte còn được index trỏ tới; total_bytes: tổng dung lượng segment."""
+        with self._lock:
+            count, live = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM thumbs").fetchone()
+            total = sum(os.path.getsize(self._segment_path(s)) for s in self._segments())
+        return {"count": count, "live_bytes": live, "total_bytes": total, "segments": len(self._segments())}
+
+    def maybe_compact(self):
+        info = self.stats()
+        garbage = info["total_bytes"] - info["live_bytes"]
+        if garbage > COMPACT_MIN_GARBAGE and garbage > info["total_bytes"] * COMPACT_GARBAGE_RATIO:
+            self.compact()
+
+    def compact(self):
+        """
+        Chép thumbnail còn sống sang segment mới (theo thứ tự photo id → đọc lưới tuần tự),
+        đổi index trong 1 transaction rồi xóa segment cũ.
+        """
+        with self._lock:
+            old_segments = self._segments()
+            if not old_segments:
+                return
+            self._flush_touched()
+            self._close_maps()
+            self._segment = old_segments[-1] + 1
+            first_new = self._segment
+
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM thumbs ORDER BY photo_id, rendition"
+            ).fetchall()
+            updates = []
+            out, out_offset = None, 0
+            handles = {}
+            try:
+                for photo_id, rendition, version, segment, offset, length, last_access in rows:
+                    src = handles.get(segment)
+                    if src is None:
+                        src = handles[segment] = open(self._segment_path(segment), "rb")
+                    src.seek(offset)
+                    data = src.read(length)
+                    if len(data) != length:
+                        continue  # segment hỏng / bị cắt → bỏ entry, thumbnail sẽ render lại
+                    if out is None or (out_offset and out_offset + length > SEGMENT_MAX_BYTES):
+                        if out is not None:
+                            out.close()
+                            self._segment += 1
+                        out, out_offset = open(self._segment_path(self._segment), "wb"), 0
+                    out.write(data)
+                    updates.append((photo_id, rendition, version, self._segment, out_offset, length, last_access))
+                    out_offset += length
+                if out is not None:
+                    out.flush()
+                    os.fsync(out.fileno())
+            finally:
+                if out is not None:
+                    out.close()
+                for f in handles.values():
+                    f.close()
+
+            with self._conn:
+                self._conn.execute("DELETE FROM thumbs")
+                self._conn.executemany(f"INSERT INTO thumbs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", updates)
+            for segment in old_segments:
+                if segment < first_new:
+                    os.remove(self._segment_path(segment))
+            print(f"[THUMB STORE] Compacted {len(old_segments)} → {self._segment - first_new + 1} segment(s), "
+                  f"{len(updates)} thumbnails")
+
+    # ---------------------------------------------------------
+    # MIGRATE
+    # ---------------------------------------------------------
+    def migrate_loose(self, renditions, legacy_rendition: str, versions=None):
+        """
+        Chuyển thumbnail dạng file (<id>_<md5(file_path)>.jpg) vào pack rồi xóa file.
+        - <thumbnails>/<rendition>/*.jpg: layout theo rendition
+        - <thumbnails>/*.jpg:             layout cũ 1 cỡ → coi là legacy_rendition
+        Version không suy ra được từ tên file → versions(photo_ids) → {photo_id: version}
+        (1 lần / lô, vd tra file_path trong DB); không có → version rỗng,
+        lần đọc đầu (có version) sẽ render lại và ghi đè.
+        """
+        sources = [(self.root, legacy_rendition)]
+        sources += [(os.path.join(self.root, r), r) for r in renditions]
+        moved = 0
+        for folder, rendition in sources:
+            if not os.path.isdir(folder):
+                continue
+            batch, files = [], []
+            for entry in os.scandir(folder):
+                match = _LOOSE_NAME.match(entry.name)
+                if not match or not entry.is_file():
+                    continue
+                with open(entry.path, "rb") as f:
+                    batch.append((int(match.group(1)), rendition, "", f.read()))
+                files.append(entry.path)
+                if len(batch) >= 500:
+                    moved += self._migrate_batch(batch, files, versions)
+            moved += self._migrate_batch(batch, files, versions)
+            if folder != self.root:
+                _remove_tree(folder)
+        _remove_tree(os.path.join(self.root, "pending"))  # thumbnail tạm của import cũ
+        if moved:
+            print(f"[THUMB STORE] Migrated {moved} thumbnail file(s) into pack")
+
+    def _migrate_batch(self, batch, files, versions=None):
+        """Ghi 1 lô vào pack, xóa file nguồn; batch / files của caller được làm rỗng."""
+        known = versions({item[0] for item in batch}) if versions and batch else {}
+        # Thumbnail đã có trong pack (render sau khi migrate dở) được giữ nguyên
+        with self._lock:
+            fresh = [
+                (photo_id, rendition, known.get(photo_id) or version, data)
+                for photo_id, rendition, version, data in batch
+                if not self.contains(photo_id, rendition)
+            ]
+            self.put_many(fresh)
+        for path in files:
+            os.remove(path)
+        del batch[:]
+        del files[:]
+        return len(fresh)
+
+    # ---------------------------------------------------------
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._close_maps()
+            self._conn.close()
+
+    def _close_maps(self):
+        for mm in self._maps.values():
+            mm.close()
+        self._maps.clear()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.root, f"{segment:06d}{SEGMENT_SUFFIX}")
+
+    def _segments(self):
+        return sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.root)
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        )
+
+    def _last_segment(self):
+        segments = self._segments()
+        return segments[-1] if segments else 1
+
+
+def _remove_tree(folder):
+    """Xóa thư mục (chỉ chứa file tạm / đã migrate); lỗi thì bỏ qua."""
+    if not os.path.isdir(folder):
+        return
+    for entry in os.scandir(folder):
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+    try:
+        os.rmdir(folder)
+    except OSError:
+        pass
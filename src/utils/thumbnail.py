@@ -1,37 +1,277 @@
+import io
 import os
-import hashlib
-from PIL import Image, ImageOps
+import threading
+from PIL import Image
 from ..backend.project_manager import get_current_project_path  # ✅ cần hàm này
+from .raw_preview import open_image, open_image_bytes
+from .thumb_store import ThumbStore
+from .decode_cache import decode_image
 
-def get_thumbnail(photo_id: int, file_path: str) -> str:
-    """
-    Tạo thumbnail từ ảnh gốc, lưu trong thư mục metadata của project.
-    """
-    # ✅ Lấy đường dẫn thư mục project hiện tại
-    project_root = get_current_project_path()
+# Rendition: khung tối đa (pixel thật) của từng cỡ thumbnail
+# - grid:    đúng ô ảnh của lưới gallery (200x150) ở màn hình DPR 1
+# - grid@2x: ô ảnh trên màn HiDPI (DPR 2)
+# - preview: xem full màn hình, thay cho việc decode bản gốc
+RENDITIONS = {
+    "grid": (200, 150),
+    "grid@2x": (400, 300),
+    "preview": (2048, 2048),
+}
+DEFAULT_RENDITION = "grid@2x"
+IMPORT_RENDITIONS = ("grid", "grid@2x")  # render sẵn khi import; preview tạo lazy khi mở xem
+THUMB_SIZE = RENDITIONS[DEFAULT_RENDITION]
+LEGACY_RENDITION = "grid@2x"  # thumbnail 1 cỡ (400px) trước khi có rendition
+
+_stores = {}  # thư mục thumbnail → ThumbStore
+_stores_lock = threading.Lock()
+
+EXIF_ORIENTATION = 0x0112
+# EXIF orientation → phép transpose áp lên ảnh ĐÃ thu nhỏ
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def thumbnail_dir(project_root: str = None) -> str:
+    """Thư mục chứa kho thumbnail của project (tạo nếu chưa có)."""
+    if project_root is None:
+        project_root = get_current_project_path()
     meta_dir = os.path.join(project_root, ".metadata", "thumbnails")
     os.makedirs(meta_dir, exist_ok=True)
+    return meta_dir
+
+
+def get_store(project_root: str = None) -> ThumbStore:
+    """
+    ThumbStore (pack + index) của project, mở 1 lần / process.
+    Lần mở đầu: chuyển thumbnail dạng file cũ vào pack + compact nếu nhiều rác ở thread nền
+    → không chặn GUI / scheduler (trong lúc đó thumbnail chưa chuyển được render lại khi cần).
+    """
+    root = thumbnail_dir(project_root)
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = ThumbStore(root)
+            threading.Thread(target=_prepare_store, args=(store,), name="thumb-migrate", daemon=True).start()
+        return store
+
+
+def _prepare_store(store):
+    try:
+        store.migrate_loose(RENDITIONS, LEGACY_RENDITION, versions=_loose_versions)
+        store.maybe_compact()
+    except Exception as e:
+        print(f"[THUMB STORE ERROR] {store.root}: {e}")
+
+
+def _loose_versions(photo_ids):
+    """
+    Version hiện tại của ảnh gốc cho thumbnail dạng file cũ (1 query / lô)
+    → thumbnail migrate dùng được ngay, không render lại ở lần xem đầu.
+    """
+    from sqlalchemy import select
+    from ..backend.database_manager import get_session, Photo  # import muộn: tránh import vòng
+    try:
+        session = get_session()
+        try:
+            rows = session.execute(select(Photo.id, Photo.file_path).where(Photo.id.in_(list(photo_ids))))
+            return {photo_id: thumbnail_version(file_path) for photo_id, file_path in rows}
+        finally:
+            session.close()
+    except Exception as e:
+        print(f"[THUMB STORE WARN] Cannot read photo versions, thumbnails re-render on first view: {e}")
+        return {}
+
+
+def thumbnail_version(file_path: str):
+    """
+    Version nội dung của ảnh gốc: size + mtime (1 lần stat, không đọc file).
+    Ảnh gốc bị sửa → version đổi → thumbnail tự render lại.
+    Không stat được (ổ ngoài chưa cắm) → None: dùng thumbnail đang có, không kiểm tra.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return f"{st.st_size:x}-{st.st_mtime_ns:x}"
+
+
+def delete_thumbnails(photo_ids, project_root: str = None):
+    """Ảnh bị xóa khỏi DB → bỏ thumbnail khỏi kho (dung lượng thu hồi khi compact / GC)."""
+    photo_ids = list(photo_ids)
+    if photo_ids:
+        get_store(project_root).delete(photo_ids)
 
-    # ✅ Hash theo file_path để tránh trùng
-    hash_name = hashlib.md5(file_path.encode("utf-8")).hexdigest()
-    thumb_path = os.path.join(meta_dir, f"{photo_id}_{hash_name}.jpg")
 
-    # Nếu đã có thumbnail thì trả về luôn
-    if os.path.exists(thumb_path):
-        return thumb_path
+def rendition_for(width: int, height: int, dpr: float = 1.0) -> str:
+    """Rendition nhỏ nhất phủ được khung width x height (logical) ở devicePixelRatio dpr."""
+    need_w, need_h = width * dpr, height * dpr
+    for name, (w, h) in sorted(RENDITIONS.items(), key=lambda item: item[1][0] * item[1][1]):
+        if w >= need_w and h >= need_h:
+            return name
+    return "preview"
 
+
+def render_thumbnail(file_path: str, thumb_path: str, rendition: str = DEFAULT_RENDITION) -> bool:
+    """Render 1 rendition ra file thumb_path (benchmark / export)."""
+    thumbs = render_renditions(file_path, (rendition,))
+    if not thumbs:
+        return False
+    with open(thumb_path, "wb") as f:
+        f.write(thumbs[rendition])
+    return True
+
+
+def render_renditions(file_path: str, renditions=IMPORT_RENDITIONS):
+    """
+    Render nhiều rendition từ 1 lần decode ảnh gốc → {rendition: JPEG bytes}, lỗi → None.
+    Không phụ thuộc project hiện tại → dùng được trong process con khi import
+    (bytes trả về parent qua pickle, không ghi file tạm).
+    RAW: dùng JPEG preview nhúng trong file (xem raw_preview), không demosaic.
+    """
     try:
         if not os.path.exists(file_path):
             raise FileNotFoundError(file_path)
 
-        img = Image.open(file_path)
-        img = ImageOps.exif_transpose(img)  # Giữ đúng orientation
-        img = img.convert("RGB")
-        img.thumbnail((400, 400), Image.Resampling.LANCZOS)
-        img.save(thumb_path, "JPEG", quality=85)
-        print(f"[THUMB] Created: {thumb_path}")
+        return _encode_renditions(open_image(file_path), renditions)
+    except Exception as e:
+        print(f"[THUMB ERROR] {file_path}: {e}")
+        return None
+
+
+def render_renditions_bytes(data: bytes, name: str, renditions=IMPORT_RENDITIONS):
+    """render_renditions từ nội dung trong RAM (member của archive, chưa ghi ra đĩa)."""
+    try:
+        return _encode_renditions(open_image_bytes(data, name), renditions)
+    except Exception as e:
+        print(f"[THUMB ERROR] {name}: {e}")
+        return None
+
+
+def _encode_renditions(img, renditions):
+    """
+    Ảnh vừa mở (chưa load) → {rendition: JPEG bytes}.
+    JPEG: draft() → libjpeg scale 1/2, 1/4, 1/8 ngay lúc decode (DCT), chọn mức nhỏ nhất
+    còn ≥ rendition lớn nhất cần render.
+    """
+    if img.format == "JPEG":
+        largest = max(renditions, key=lambda r: RENDITIONS[r][0] * RENDITIONS[r][1])
+        img.draft("RGB", _decode_box(largest))
+    return {rendition: _jpeg(out) for rendition, out in _scale_renditions(img, renditions).items()}
+
+
+def _scale_renditions(img, renditions):
+    """
+    Ảnh đã decode → {rendition: ảnh RGB đã thu nhỏ + đúng orientation}.
+    - thu nhỏ dần từ rendition lớn → nhỏ, mỗi bước resize ra ảnh mới → không sửa img
+      (img có thể là ảnh dùng chung của decode_cache)
+    - orientation: transpose ảnh đã thu nhỏ thay vì exif_transpose bản full-size
+    """
+    orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+
+    def box_of(rendition):
+        w, h = RENDITIONS[rendition]
+        # Orientation 5-8 xoay 90° → khung đích trước khi xoay bị đảo chiều
+        return (w, h) if orientation < 5 else (h, w)
+
+    order = sorted(renditions, key=lambda r: RENDITIONS[r][0] * RENDITIONS[r][1], reverse=True)
+    work = _flatten(img)
+    outputs = {}
+    for rendition in order:
+        box = box_of(rendition)
+        if work.width > box[0] or work.height > box[1]:
+            scale = min(box[0] / work.width, box[1] / work.height)
+            size = (max(1, round(work.width * scale)), max(1, round(work.height * scale)))
+            work = work.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        out = work
+        if orientation in _ORIENTATION_TRANSPOSE:
+            out = work.transpose(_ORIENTATION_TRANSPOSE[orientation])
+        outputs[rendition] = out
+    return outputs
+
+
+def _flatten(img):
+    """
+    Ảnh → RGB để encode JPEG, nền trong suốt (PNG / GIF) thành trắng.
+    GIF động: Pillow mở ở frame đầu và load() chỉ decode frame đó → thumbnail = frame đầu.
+    Không gọi n_frames / is_animated / seek() ở đây: các thuộc tính này quét cả file.
+    """
+    if img.mode == "RGB":
+        return img
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _decode_box(rendition):
+    """Khung decode đủ cho rendition ở mọi orientation (cạnh dài theo cả 2 chiều)."""
+    side = max(RENDITIONS[rendition])
+    return side, side
+
+
+def _jpeg(img) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def store_renditions(items, project_root: str = None):
+    """items: [(photo_id, file_path, {rendition: bytes})] → ghi vào kho 1 lần (import)."""
+    get_store(project_root).put_many(
+        (photo_id, rendition, thumbnail_version(file_path) or "", data)
+        for photo_id, file_path, thumbs in items
+        for rendition, data in (thumbs or {}).items()
+    )
+
+
+def get_thumbnail(photo_id: int, file_path: str, rendition: str = DEFAULT_RENDITION, render: bool = True):
+    """
+    JPEG bytes của thumbnail (rendition) trong kho của project; chưa có → render từ ảnh gốc
+    (render=False → trả None). Ảnh gốc lỗi → None (caller tự fallback).
+    """
+    data = get_store().get(photo_id, rendition, thumbnail_version(file_path))
+    if data is not None or not render:
+        return data
+    rendered = _render_and_store(photo_id, file_path, rendition)
+    return rendered[1] if rendered else None
+
+
+def render_thumbnail_image(photo_id: int, file_path: str, rendition: str = DEFAULT_RENDITION):
+    """
+    Render rendition từ ảnh gốc (decode dùng chung, xem decode_cache), ghi JPEG vào kho
+    và trả về luôn ảnh Pillow → UI hiển thị thẳng, không decode lại JPEG vừa ghi. Lỗi → None.
+    """
+    rendered = _render_and_store(photo_id, file_path, rendition)
+    return rendered[0] if rendered else None
+
+
+def _render_and_store(photo_id, file_path, rendition):
+    """(ảnh Pillow, JPEG bytes) của rendition vừa render + ghi vào kho; lỗi → None."""
+    try:
+        img = decode_image(file_path, _decode_box(rendition))
+        out = _scale_renditions(img, (rendition,))[rendition]
+        data = _jpeg(out)
     except Exception as e:
         print(f"[THUMB ERROR] {file_path}: {e}")
-        return file_path
+        return None
+    get_store().put(photo_id, rendition, thumbnail_version(file_path) or "", data)
+    print(f"[THUMB] Created: {photo_id} ({rendition})")
+    return out, data
+
+
+def has_thumbnail(photo_id: int, file_path: str, rendition: str = DEFAULT_RENDITION) -> bool:
+    """Thumbnail đã có trong kho và còn khớp ảnh gốc (get_thumbnail sẽ không phải render)."""
+    return get_store().contains(photo_id, rendition, thumbnail_version(file_path))
+
 
-    return thumb_path
+def get_rendition(photo_id: int, file_path: str, width: int, height: int, dpr: float = 1.0):
+    """Thumbnail cho khung width x height (logical) ở DPR dpr – rendition nhỏ nhất đủ nét."""
+    return get_thumbnail(photo_id, file_path, rendition_for(width, height, dpr))